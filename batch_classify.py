@@ -0,0 +1,224 @@
+"""Headless batch classification of a folder of leaf images.
+
+Example:
+    python batch_classify.py survey_dump/ --output survey_results.csv --batch-size 64
+
+Images are decoded and preprocessed by a pool of worker processes while the
+model classifies them in batches. Results are appended to a CSV or JSONL file
+(picked from the output extension) and flushed after every batch, so an
+interrupted run can be continued with --resume.
+
+With --cache-db, probabilities are stored by file content hash, so re-running
+over a folder only runs the model on new or modified images:
+    python batch_classify.py survey_dump/ --output rerun.csv --cache-db batch_cache.sqlite
+
+With --embeddings (Keras backend), each image's backbone embedding is saved
+so a retrained head can re-score the survey later (see embedding_store.py).
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+import plant_classifier as pc
+import result_cache
+
+CSV_FIELDS = ["path", "class_index", "class_name", "confidence", "top_k", "error"]
+
+
+def _init_worker():
+    # One decode per process; let the pool provide the parallelism
+    cv2.setNumThreads(1)
+
+
+def _load(args):
+    """path -> (path, content key of the file bytes, preprocessed array or None)"""
+    path, size = args
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            return path, None, None
+        return path, result_cache.content_key(data), pc.preprocess_frame(frame, size)
+    except Exception:
+        return path, None, None
+
+
+def read_done_paths(output_path):
+    """Paths already present in an existing output file (for --resume)"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        if output_path.lower().endswith(".jsonl"):
+            for line in f:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    pass # Truncated last line of an interrupted run
+        else:
+            for row in csv.DictReader(f):
+                if row.get("path"):
+                    done.add(row["path"])
+    return done
+
+
+class ResultWriter:
+    """Appends result rows to CSV or JSONL"""
+
+    def __init__(self, output_path, append):
+        self.jsonl = output_path.lower().endswith(".jsonl")
+        write_header = not (append and os.path.exists(output_path) and os.path.getsize(output_path) > 0)
+        self.file = open(output_path, "a" if append else "w", encoding="utf-8", newline="")
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            if write_header:
+                self.csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self.file.write(json.dumps(row) + "\n")
+        else:
+            row = dict(row)
+            row["top_k"] = "|".join(f"{name}={prob:.4f}" for name, prob in row["top_k"])
+            self.csv.writerow(row)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def classify_batch(backend, class_names, paths, arrays, k, cache=None, keys=None, embeddings=None):
+    """Run one forward pass (for the images not in the cache) and build the output rows"""
+    if embeddings is not None:
+        features = backend.features_batch(np.stack(arrays))
+        embeddings.add(features, [{"source": "batch", "path": path} for path in paths])
+        probs = backend.head_batch(features)
+    else:
+        probs = result_cache.cached_predict(cache, backend.predict_batch, np.stack(arrays), keys)
+    rows = []
+    for path, p in zip(paths, probs):
+        idx = int(np.argmax(p))
+        rows.append({
+            "path": path,
+            "class_index": idx,
+            "class_name": class_names[idx],
+            "confidence": round(float(p[idx]), 6),
+            "top_k": [(name, round(prob, 6)) for name, prob in pc.top_k(p, class_names, k)],
+            "error": "",
+        })
+    return rows
+
+
+def run(args):
+    class_names = pc.load_class_names(args.class_names)
+    paths = pc.find_images(args.image_dir)
+
+    if args.resume:
+        done = read_done_paths(args.output)
+        paths = [p for p in paths if p not in done]
+        print(f"✓ Resuming: {len(done)} images already classified")
+    print(f"✓ {len(paths)} images to classify")
+    if not paths:
+        return
+
+    # Start the decode pool before TensorFlow is imported (spawn keeps workers TF-free)
+    cache = embeddings = None
+    ctx = multiprocessing.get_context("spawn")
+    pool = ctx.Pool(args.workers, initializer=_init_worker)
+    writer = ResultWriter(args.output, append=args.resume)
+    try:
+        backend = pc.load_backend(args.backend, args.model, args.threads)
+        if backend.num_classes != len(class_names):
+            raise SystemExit(f"ERROR: model has {backend.num_classes} outputs but "
+                             f"{args.class_names} lists {len(class_names)} classes")
+        size = backend.input_size
+        cache = result_cache.open_cache(backend, args.class_names, args.cache_db)
+        if args.embeddings:
+            if not hasattr(backend, "features_batch"):
+                raise SystemExit(f"ERROR: --embeddings needs the keras backend, not {backend.name}")
+            from embedding_store import open_store
+            embeddings = open_store(args.embeddings, backend, args.class_names)
+
+        start = time.perf_counter()
+        processed = 0
+        batch_paths, batch_keys, batch_arrays = [], [], []
+
+        def flush_batch():
+            nonlocal processed
+            if batch_paths:
+                for row in classify_batch(backend, class_names, batch_paths, batch_arrays, args.top_k,
+                                          cache, batch_keys, embeddings):
+                    writer.write(row)
+                processed += len(batch_paths)
+                batch_paths.clear()
+                batch_keys.clear()
+                batch_arrays.clear()
+            writer.flush()
+
+        jobs = ((p, size) for p in paths)
+        for i, (path, key, array) in enumerate(pool.imap(_load, jobs, chunksize=8), 1):
+            if array is None:
+                writer.write({"path": path, "class_index": -1, "class_name": "", "confidence": 0.0,
+                              "top_k": [], "error": "unreadable image"})
+                processed += 1
+            else:
+                batch_paths.append(path)
+                batch_keys.append(key)
+                batch_arrays.append(array)
+                if len(batch_paths) >= args.batch_size:
+                    flush_batch()
+
+            if i % (args.batch_size * 10) == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {i}/{len(paths)} images  ({processed / elapsed:.1f} images/sec)")
+
+        flush_batch()
+        elapsed = time.perf_counter() - start
+        print(f"✓ Classified {processed} images in {elapsed:.1f}s "
+              f"({processed / max(elapsed, 1e-9):.1f} images/sec)")
+        stats = cache.stats()
+        print(f"✓ Result cache: {stats['hits']} hits, {stats['misses']} misses")
+        print(f"✓ Results written to: {args.output}")
+    finally:
+        writer.close()
+        pool.terminate()
+        if cache is not None:
+            cache.close()
+        if embeddings is not None:
+            embeddings.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Classify a folder of leaf images without the GUI")
+    parser.add_argument("image_dir", help="Directory to scan (recursively) for images")
+    parser.add_argument("--output", default="batch_results.csv", help="Output .csv or .jsonl file")
+    parser.add_argument("--backend", choices=sorted(pc.BACKENDS),
+                        help="Inference backend (default: from the model file extension)")
+    parser.add_argument("--model", default=None, help=f"Model file (default: {pc.MODEL_PATH})")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite/ONNX Runtime threads")
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Decode/preprocess worker processes")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip images already in --output and append to it")
+    parser.add_argument("--cache-db", default=None,
+                        help="SQLite result cache keyed by file content (reused across runs)")
+    parser.add_argument("--embeddings", default=None,
+                        help="Also save backbone embeddings to this store directory (keras backend)")
+    return parser
+
+
+if __name__ == "__main__":
+    run(build_parser().parse_args())
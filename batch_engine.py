@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class DynamicBatcher:
+    """Merges inference requests from many threads into shared forward passes.
+
+    Each ``submit(batch)`` call adds an (N, H, W, 3) array of model inputs (for
+    example all leaf crops of one frame) and returns a Future for its (N, C)
+    probabilities. A single engine thread collects pending requests until
+    ``max_batch_size`` inputs are waiting or the oldest has waited
+    ``max_wait`` seconds, runs them through ``predict_fn`` in one call and
+    splits the output back per request. After ``stop`` every request is
+    resolved: pending ones are cancelled and new ones fail immediately.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait=0.01):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+
+        self.batches_run = 0
+        self.inputs_run = 0
+        self.busy_time = 0.0
+
+        self._running = True
+        self._lock = threading.Lock() 	# Orders submit() against stop()
+        self._thread = threading.Thread(target=self._run, name="DynamicBatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, batch):
+        future = Future()
+        with self._lock:
+            if not self._running:
+                future.set_exception(RuntimeError("DynamicBatcher is stopped"))
+                return future
+            self.requests.put((batch, future))
+        return future
+
+    def predict(self, batch):
+        """Blocking helper with the same signature as backend.predict_batch"""
+        return self.submit(batch).result()
+
+    def _collect(self):
+        """Wait for the first request, then gather more until full or timed out"""
+        first = self.requests.get()
+        if first is None:
+            return None
+        pending = [first]
+        count = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while count < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            pending.append(item)
+            count += len(item[0])
+        return pending
+
+    def _run(self):
+        while self._running:
+            pending = self._collect()
+            if pending is None:
+                break
+
+            start = time.perf_counter()
+            try:
+                batch = np.concatenate([b for b, _ in pending]) if len(pending) > 1 else pending[0][0]
+                probs = self.predict_fn(batch)
+            except Exception as e:
+                traceback.print_exc()
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.busy_time += time.perf_counter() - start
+            self.batches_run += 1
+            self.inputs_run += len(batch)
+
+            offset = 0
+            for b, future in pending:
+                future.set_result(probs[offset:offset + len(b)])
+                offset += len(b)
+
+    def metrics(self):
+        return {
+            "batches": self.batches_run,
+            "inputs": self.inputs_run,
+            "avg_batch_size": self.inputs_run / self.batches_run if self.batches_run else 0.0,
+            "busy_seconds": self.busy_time,
+        }
+
+    def stop(self, timeout=2.0):
+        with self._lock:
+            self._running = False
+            self.requests.put(None)
+        self._thread.join(timeout)
+
+        # Release anyone still waiting on a request that will never run
+        while True:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].cancel()
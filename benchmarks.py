@@ -0,0 +1,218 @@
+"""Benchmarks for the preprocessing, inference and display hot paths.
+
+Runs without a camera or a display, on synthetic 1280x720 frames:
+    python benchmarks.py --output bench_results.json
+    python benchmarks.py --save-baseline                 # record bench_baseline.json
+    python benchmarks.py --baseline bench_baseline.json  # flag regressions
+
+Inference uses the real model when it is present (--backend/--model) and a
+small stand-in model otherwise, so the harness itself can always be checked.
+Exit status is 1 when a regression beyond --tolerance is found.
+"""
+import argparse
+import json
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import display_pipeline
+import leaf_localizer
+import lesion_severity
+import plant_classifier as pc
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+
+
+def synthetic_frame(width=1280, height=720, seed=0):
+    """Camera-like frame: noisy background with two leaf-coloured blobs"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+    cv2.ellipse(frame, (width // 3, height // 2), (width // 8, height // 3), 20, 0, 360, (40, 150, 50), -1)
+    cv2.ellipse(frame, (2 * width // 3, height // 2), (width // 10, height // 4), -30, 0, 360, (50, 170, 60), -1)
+    cv2.circle(frame, (width // 3, height // 2), height // 20, (30, 60, 110), -1)
+    return frame
+
+
+class StandInBackend:
+    """Tiny numpy model (pooling + dense) used when the real model is missing"""
+
+    name = "stand-in"
+
+    def __init__(self, num_classes=38, input_size=pc.INPUT_SIZE):
+        rng = np.random.default_rng(0)
+        self.input_size = input_size
+        self.num_classes = num_classes
+        self.weights = rng.standard_normal((7 * 7 * 3, num_classes)).astype(np.float32)
+
+    def predict_batch(self, batch):
+        n, h, w, c = batch.shape
+        h, w = h // 7 * 7, w // 7 * 7
+        pooled = batch[:, :h, :w].reshape(n, 7, h // 7, 7, w // 7, c).mean(axis=(2, 4))
+        logits = pooled.reshape(n, -1) @ self.weights / 255.0
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+def measure(fn, repeat=50, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1000
+    return {
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+    }
+
+
+def bench_display(results, frame, repeat):
+    canvas_w, canvas_h = 1100, 700
+    new_w, new_h = display_pipeline.fit_size(frame.shape[1], frame.shape[0], canvas_w, canvas_h)
+
+    def legacy():
+        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA))
+        img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+
+    scaler = display_pipeline.FrameScaler()
+
+    def current():
+        scaler.scale(frame, canvas_w, canvas_h)
+        scaler.to_image()
+
+    results["display.legacy_pil_lanczos"] = measure(legacy, repeat)
+    results["display.frame_scaler"] = measure(current, repeat)
+
+    display = scaler.scale(frame, canvas_w, canvas_h)
+    results["overlay.bounding_box"] = measure(
+        lambda: display_pipeline.draw_bounding_box(display, [250, 200, 750, 700], "Diseased", "Early blight"), repeat)
+    results["overlay.scanning"] = measure(lambda: display_pipeline.draw_scanning_overlay(display), repeat)
+
+
+def bench_preprocessing(results, frame, backend, repeat):
+    size = backend.input_size
+    results["preprocess.frame"] = measure(lambda: pc.preprocess_frame(frame, size), repeat)
+    results["preprocess.leaf_boxes"] = measure(lambda: leaf_localizer.find_leaf_boxes(frame), repeat)
+    analyzer = pc.FrameAnalyzer(backend, class_names=[str(i) for i in range(backend.num_classes)])
+    results["preprocess.localize_and_crop"] = measure(lambda: analyzer.prepare(frame), repeat)
+    crops = analyzer.prepare(frame)[1]
+    results["severity.crop"] = measure(lambda: lesion_severity.assess(crops[0]), repeat)
+
+
+def bench_inference(results, frame, backend, batch_sizes, repeat):
+    sample = pc.preprocess_frame(frame, backend.input_size)
+    for n in batch_sizes:
+        batch = np.repeat(sample[np.newaxis], n, axis=0)
+        stats = measure(lambda: backend.predict_batch(batch), max(3, repeat // max(1, n // 4)), warmup=2)
+        stats["images_per_sec"] = 1000.0 * n / stats["mean_ms"]
+        stats["ms_per_image"] = stats["mean_ms"] / n
+        results[f"inference.batch_{n}"] = stats
+
+
+def load_benchmark_backend(args):
+    model_path = args.model or pc.MODEL_PATH
+    if args.backend or os.path.exists(model_path):
+        try:
+            return pc.load_backend(args.backend, args.model, args.threads)
+        except Exception as e:
+            print(f"⚠ Could not load model ({e}); using the stand-in model")
+    else:
+        print(f"⚠ {model_path} not found; using the stand-in model")
+    return StandInBackend()
+
+
+def compare(results, baseline, tolerance):
+    """Benchmarks whose median got slower than baseline by more than ``tolerance``.
+
+    The median is compared rather than the mean so one scheduler hiccup does
+    not flag a regression.
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        change = stats["p50_ms"] / base["p50_ms"] - 1.0
+        stats["vs_baseline"] = change
+        if change > tolerance:
+            regressions.append((name, base["p50_ms"], stats["p50_ms"], change))
+    return regressions
+
+
+def run(args):
+    frame = synthetic_frame()
+    backend = load_benchmark_backend(args)
+    results = {}
+
+    print("Benchmarking display path...")
+    bench_display(results, frame, args.repeat)
+    print("Benchmarking preprocessing...")
+    bench_preprocessing(results, frame, backend, args.repeat)
+    print(f"Benchmarking inference ({backend.name})...")
+    bench_inference(results, frame, backend, [n for n in BATCH_SIZES if n <= args.max_batch], args.repeat)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "backend": backend.name,
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("backend") != backend.name:
+            print(f"⚠ Baseline was recorded with backend '{baseline.get('meta', {}).get('backend')}'")
+        regressions = compare(results, baseline, args.tolerance)
+
+    print("\n" + "=" * 70)
+    print(f"{'Benchmark':<34}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'vs base':>10}")
+    for name, stats in results.items():
+        change = f"{stats['vs_baseline']:+.0%}" if "vs_baseline" in stats else "-"
+        print(f"{name:<34}{stats['mean_ms']:>10.3f}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{change:>10}")
+    print("=" * 70)
+
+    output = args.baseline_out if args.save_baseline else args.output
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Results saved to: {output}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance:.0%}:")
+        for name, base, now, change in regressions:
+            print(f"    {name}: {base:.3f} ms -> {now:.3f} ms ({change:+.0%})")
+        return 1
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing, inference and display hot paths")
+    parser.add_argument("--backend", choices=sorted(pc.BACKENDS))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--baseline-out", default="bench_baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed slowdown before a benchmark counts as a regression")
+    return parser
+
+
+if __name__ == "__main__":
+    raise SystemExit(run(build_parser().parse_args()))
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+
+import cv2
+
+
+def parse_source(source):
+    """'0' -> camera index 0; anything else (file path, rtsp:// URL) unchanged"""
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+class CapturedFrame:
+    """A frame plus its sequence number and capture timestamp (perf_counter)"""
+
+    __slots__ = ("seq", "timestamp", "frame")
+
+    def __init__(self, seq, timestamp, frame):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+
+
+class FrameRingBuffer:
+    """Small ring of the most recent frames for one writer and many readers.
+
+    No locks are taken: the writer fills a slot and then publishes it by
+    bumping ``seq``. Both are single reference/int assignments, which are
+    atomic under the GIL, so a reader always sees a complete CapturedFrame.
+    """
+
+    def __init__(self, capacity=4):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.seq = 0
+
+    def push(self, frame, timestamp):
+        seq = self.seq + 1
+        self.slots[seq % self.capacity] = CapturedFrame(seq, timestamp, frame)
+        self.seq = seq
+
+    def latest(self):
+        seq = self.seq
+        if seq == 0:
+            return None
+        return self.slots[seq % self.capacity]
+
+
+class FrameReader:
+    """One consumer's view of the ring: only returns frames it has not seen"""
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.last_seq = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.latency = None 	# Capture-to-use latency (EMA, seconds)
+
+    def read(self):
+        """Newest unseen frame (CapturedFrame) or None if nothing new arrived"""
+        item = self.ring.latest()
+        if item is None or item.seq == self.last_seq:
+            return None
+        if self.last_seq:
+            self.dropped += item.seq - self.last_seq - 1
+        self.last_seq = item.seq
+        self.consumed += 1
+        return item
+
+    def record_latency(self, captured_at, now=None):
+        """Call when the frame has actually been used (e.g. shown on screen)"""
+        now = time.perf_counter() if now is None else now
+        latency = now - captured_at
+        self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+
+
+class CameraCapture:
+    """Grabs frames from cv2.VideoCapture on its own thread.
+
+    The newest frames are kept in a FrameRingBuffer, so camera I/O never
+    blocks the Tk loop and consumers always get the latest frame instead of
+    whatever is queued up in the driver. ``source`` may also be a video file
+    (played back at its native frame rate, optionally looping) or an
+    RTSP/HTTP stream URL.
+    """
+
+    def __init__(self, source=0, width=1280, height=720, buffer_size=4, loop=False, monitor=None):
+        self.source = source
+        self.monitor = monitor 	# Optional perf_metrics.PerfMonitor
+        self.ring = FrameRingBuffer(buffer_size)
+        self.frames_captured = 0
+        self.read_failures = 0
+        self.fps = 0.0
+        self.finished = False
+
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.loop = loop
+
+        self.vid = cv2.VideoCapture(source)
+        self.opened = self.vid.isOpened()
+        self.source_fps = self.vid.get(cv2.CAP_PROP_FPS) if self.opened and self.is_file else 0.0
+        if self.opened and self.is_file:
+            self.width = int(self.vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        elif self.opened:
+            self.vid.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.vid.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            # Keep the driver queue short so we never read stale frames
+            self.vid.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.width = int(self.vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        else:
+            self.width, self.height = 640, 480
+
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if not self.opened or self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="CameraCapture", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last = None
+        frame_period = 1.0 / self.source_fps if self.source_fps > 0 else 0.0
+        next_frame = time.perf_counter()
+        while self._running:
+            if frame_period:
+                # Play files back in real time instead of as fast as they decode
+                delay = next_frame - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_frame = max(next_frame + frame_period, time.perf_counter() - frame_period)
+
+            read_start = time.perf_counter()
+            ret, frame = self.vid.read()
+            now = time.perf_counter()
+            if self.monitor is not None:
+                self.monitor.record("capture.read", now - read_start)
+            if not ret:
+                if self.is_file:
+                    if self.loop:
+                        self.vid.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    self.finished = True
+                    break
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+
+            self.ring.push(frame, now)
+            self.frames_captured += 1
+            if last is not None and now > last:
+                self.fps = 0.9 * self.fps + 0.1 * (1.0 / (now - last)) if self.fps else 1.0 / (now - last)
+            last = now
+
+    def reader(self):
+        """Create an independent consumer (display, inference, ...)"""
+        return FrameReader(self.ring)
+
+    def metrics(self, reader=None):
+        data = {
+            "capture_fps": self.fps,
+            "frames_captured": self.frames_captured,
+            "read_failures": self.read_failures,
+        }
+        if reader is not None:
+            data["dropped_frames"] = reader.dropped
+            data["capture_to_display_ms"] = (reader.latency or 0.0) * 1000
+        return data
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(1.0)
+        if self.vid.isOpened():
+            self.vid.release()
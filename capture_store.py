@@ -0,0 +1,74 @@
+"""Opt-in store of operator-reviewed field scans, used for incremental fine-tuning.
+
+Each capture is the classified leaf crop (saved as a model-sized JPEG), the
+prediction, and what the operator said about it: "confirmed" (prediction
+was right) or "corrected" (with the right class). The index is a small
+SQLite file next to the images:
+    <dir>/captures.sqlite
+    <dir>/images/<id>.jpg
+
+finetune.py trains on the labelled captures plus a replay subset of the
+original training data.
+"""
+import json
+import os
+import sqlite3
+import time
+
+import cv2
+
+import leaf_localizer
+import plant_classifier as pc
+
+DB_FILE = "captures.sqlite"
+IMAGE_DIR = "images"
+LABELLED_STATUSES = ("confirmed", "corrected")
+
+
+class CaptureStore:
+    def __init__(self, path, image_size=pc.INPUT_SIZE, jpeg_quality=92):
+        self.path = path
+        self.image_size = image_size
+        self.jpeg_quality = jpeg_quality
+        os.makedirs(os.path.join(path, IMAGE_DIR), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(path, DB_FILE))
+        self.db.execute("CREATE TABLE IF NOT EXISTS captures ("
+                        "id INTEGER PRIMARY KEY AUTOINCREMENT, time REAL NOT NULL, image TEXT NOT NULL, "
+                        "plant_type TEXT, predicted TEXT, confidence TEXT, label TEXT, status TEXT NOT NULL, "
+                        "bbox TEXT)")
+        self.db.commit()
+
+    def add(self, frame, result, label, status, plant_type=None):
+        """Save the leaf crop of a result with the operator's verdict; returns the capture id"""
+        if status not in LABELLED_STATUSES:
+            raise ValueError(f"Unknown capture status '{status}'")
+        bbox = result.get("bbox", leaf_localizer.FULL_FRAME_BBOX)
+        crop = cv2.resize(leaf_localizer.crop(frame, bbox), self.image_size, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError("Could not JPEG-encode capture")
+
+        cursor = self.db.execute(
+            "INSERT INTO captures (time, image, plant_type, predicted, confidence, label, status, bbox) "
+            "VALUES (?, '', ?, ?, ?, ?, ?, ?)",
+            (time.time(), plant_type, result.get("class_name"), result.get("confidence"), label, status,
+             json.dumps(list(bbox))))
+        capture_id = cursor.lastrowid
+        image = os.path.join(IMAGE_DIR, f"{capture_id:07d}.jpg")
+        with open(os.path.join(self.path, image), "wb") as f:
+            f.write(encoded.tobytes())
+        self.db.execute("UPDATE captures SET image = ? WHERE id = ?", (image, capture_id))
+        self.db.commit()
+        return capture_id
+
+    def labelled(self):
+        """[(image path, class name), ...] for every reviewed capture"""
+        rows = self.db.execute("SELECT image, label FROM captures WHERE status IN (?, ?) AND image != '' "
+                               "ORDER BY id", LABELLED_STATUSES).fetchall()
+        return [(os.path.join(self.path, image), label) for image, label in rows]
+
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM captures GROUP BY status").fetchall())
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,269 @@
+"""Training input pipeline: pre-resized TFRecord shards read through tf.data.
+
+The Colab script decodes, resizes and augments every JPEG in Python
+(ImageDataGenerator.flow_from_directory) on every epoch. Here the dataset is
+packed once into TFRecord shards of 224x224 JPEGs, and training reads them
+with parallel interleave/decode, batch-level (vectorized) augmentation and
+prefetching, so the CPU keeps the model fed.
+
+Pack once (same class order and 80/20 split idea as the Colab script):
+    python dataset_records.py pack dataset/color --output records/ --shards 32
+
+Check input throughput (images/sec the pipeline can deliver):
+    python dataset_records.py bench records/ --batch-size 32 --steps 200
+
+train_model.py trains on these records.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import cv2
+
+import plant_classifier as pc
+
+MANIFEST_FILE = "manifest.json"
+JPEG_QUALITY = 95
+
+# Same augmentation ranges as the Colab ImageDataGenerator
+ROTATION_RANGE = 40.0 	# degrees
+SHIFT_RANGE = 0.2 	# fraction of width/height
+SHEAR_RANGE = 0.2 	# degrees (Keras interprets shear_range in degrees)
+ZOOM_RANGE = 0.2
+
+
+def list_labelled_images(data_dir):
+    """(class_names, [(path, label), ...]) with flow_from_directory's class order"""
+    class_names = sorted(d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d)))
+    samples = []
+    for label, name in enumerate(class_names):
+        for path in pc.find_images(os.path.join(data_dir, name)):
+            samples.append((path, label))
+    return class_names, samples
+
+
+def split_samples(samples, val_split=0.2, seed=42):
+    """Per-class shuffled train/val split, so both keep the class balance"""
+    rng = random.Random(seed)
+    by_label = {}
+    for path, label in samples:
+        by_label.setdefault(label, []).append((path, label))
+    train, val = [], []
+    for label in sorted(by_label):
+        items = by_label[label]
+        rng.shuffle(items)
+        n_val = int(round(len(items) * val_split))
+        val.extend(items[:n_val])
+        train.extend(items[n_val:])
+    rng.shuffle(train)
+    return train, val
+
+
+def _write_shard(args):
+    """Worker: resize + JPEG-encode one shard's images into a TFRecord file"""
+    shard_path, items, size = args
+    import tensorflow as tf
+
+    cv2.setNumThreads(1)
+    written = 0
+    with tf.io.TFRecordWriter(shard_path) as writer:
+        for path, label in items:
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            if frame.shape[1::-1] != tuple(size):
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            if not ok:
+                continue
+            example = tf.train.Example(features=tf.train.Features(feature={
+                "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[encoded.tobytes()])),
+                "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[label])),
+            }))
+            writer.write(example.SerializeToString())
+            written += 1
+    return shard_path, written
+
+
+def pack(data_dir, output_dir, shards=32, val_split=0.2, size=pc.INPUT_SIZE, seed=42, workers=None):
+    """Pack a class-per-folder dataset into train/val TFRecord shards plus a manifest"""
+    class_names, samples = list_labelled_images(data_dir)
+    if not samples:
+        raise SystemExit(f"ERROR: no images found under {data_dir}")
+    train, val = split_samples(samples, val_split, seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for split, items in (("train", train), ("val", val)):
+        n_shards = max(1, min(shards if split == "train" else max(1, shards // 4), len(items)))
+        for i in range(n_shards):
+            path = os.path.join(output_dir, f"{split}-{i:05d}-of-{n_shards:05d}.tfrecord")
+            jobs.append((path, items[i::n_shards], tuple(size)))
+
+    start = time.perf_counter()
+    counts = {"train": 0, "val": 0}
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers or os.cpu_count() or 1) as pool:
+        for shard_path, written in pool.imap_unordered(_write_shard, jobs):
+            counts[os.path.basename(shard_path).split("-")[0]] += written
+            print(f"  {os.path.basename(shard_path)}: {written} images")
+
+    manifest = {"class_names": class_names, "image_size": list(size), "counts": counts,
+                "val_split": val_split, "seed": seed}
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    with open(os.path.join(output_dir, pc.CLASS_NAMES_PATH), "w", encoding="utf-8") as f:
+        json.dump({"class_names": class_names}, f)
+    print(f"✓ Packed {counts['train']} train / {counts['val']} val images in "
+          f"{time.perf_counter() - start:.1f}s -> {output_dir}")
+    return manifest
+
+
+def load_manifest(record_dir):
+    with open(os.path.join(record_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def augment_batch(images):
+    """Random rotation/shift/shear/zoom/flip for a whole (N, H, W, 3) float batch.
+
+    One projective resample per batch instead of per-image Python work; the
+    ranges mirror the Colab ImageDataGenerator (fill_mode='nearest').
+    """
+    import tensorflow as tf
+
+    shape = tf.shape(images)
+    n, h, w = shape[0], tf.cast(shape[1], tf.float32), tf.cast(shape[2], tf.float32)
+
+    def uniform(limit):
+        return tf.random.uniform([n], -limit, limit)
+
+    theta = uniform(ROTATION_RANGE) * (math.pi / 180.0)
+    shear = uniform(SHEAR_RANGE) * (math.pi / 180.0)
+    zx = 1.0 + uniform(ZOOM_RANGE)
+    zy = 1.0 + uniform(ZOOM_RANGE)
+    tx = uniform(SHIFT_RANGE) * w
+    ty = uniform(SHIFT_RANGE) * h
+    flip = tf.where(tf.random.uniform([n]) < 0.5, -1.0, 1.0)
+
+    zeros, ones = tf.zeros([n]), tf.ones([n])
+
+    def matrix(rows):
+        return tf.reshape(tf.stack([v for row in rows for v in row], axis=1), [-1, 3, 3])
+
+    # Output pixel -> input pixel, composed about the image centre
+    cx, cy = (w - 1.0) / 2.0, (h - 1.0) / 2.0
+    to_center = matrix([[ones, zeros, zeros + cx], [zeros, ones, zeros + cy], [zeros, zeros, ones]])
+    from_center = matrix([[ones, zeros, zeros - cx], [zeros, ones, zeros - cy], [zeros, zeros, ones]])
+    rotate = matrix([[tf.cos(theta), -tf.sin(theta), zeros], [tf.sin(theta), tf.cos(theta), zeros],
+                     [zeros, zeros, ones]])
+    shift = matrix([[ones, zeros, tx], [zeros, ones, ty], [zeros, zeros, ones]])
+    shear_m = matrix([[ones, -tf.sin(shear), zeros], [zeros, tf.cos(shear), zeros], [zeros, zeros, ones]])
+    zoom_flip = matrix([[zx * flip, zeros, zeros], [zeros, zy, zeros], [zeros, zeros, ones]])
+
+    m = to_center @ rotate @ shift @ shear_m @ zoom_flip @ from_center
+    transforms = tf.reshape(m, [-1, 9])[:, :8]
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=shape[1:3], fill_value=0.0,
+        interpolation="BILINEAR", fill_mode="NEAREST")
+
+
+def make_dataset(record_dir, split="train", batch_size=32, training=None, augment=True,
+                 shuffle_buffer=2048, num_classes=None, cache=False, repeat=False, ordered=False):
+    """tf.data pipeline over packed shards -> (float32 0-255 RGB images, one-hot labels).
+
+    Files are interleaved and decoded in parallel, augmentation runs once
+    per batch, and batches are prefetched. ``cache`` keeps decoded images in
+    memory after the first epoch (sensible for the validation split).
+    ``ordered`` reads the shards one after another in sorted order instead,
+    so records come out in the same order on every machine.
+    """
+    import tensorflow as tf
+
+    autotune = tf.data.AUTOTUNE
+    training = split == "train" if training is None else training
+    manifest = load_manifest(record_dir)
+    num_classes = num_classes or len(manifest["class_names"])
+    height, width = manifest["image_size"][1], manifest["image_size"][0]
+
+    pattern = os.path.join(record_dir, f"{split}-*.tfrecord")
+    if ordered:
+        ds = tf.data.TFRecordDataset(sorted(tf.io.gfile.glob(pattern)))
+    else:
+        files = tf.data.Dataset.list_files(pattern, shuffle=training)
+        ds = files.interleave(tf.data.TFRecordDataset, cycle_length=autotune, num_parallel_calls=autotune,
+                              deterministic=not training)
+
+    features = {"image": tf.io.FixedLenFeature([], tf.string), "label": tf.io.FixedLenFeature([], tf.int64)}
+
+    def parse(record):
+        example = tf.io.parse_single_example(record, features)
+        image = tf.io.decode_jpeg(example["image"], channels=3)
+        image = tf.cast(tf.reshape(image, [height, width, 3]), tf.float32)
+        return image, tf.one_hot(example["label"], num_classes)
+
+    ds = ds.map(parse, num_parallel_calls=autotune, deterministic=ordered or not training)
+    if cache:
+        ds = ds.cache()
+    if training:
+        ds = ds.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+    if repeat:
+        ds = ds.repeat()
+    ds = ds.batch(batch_size, drop_remainder=training, num_parallel_calls=autotune)
+    if training and augment:
+        ds = ds.map(lambda images, labels: (augment_batch(images), labels), num_parallel_calls=autotune)
+    return ds.prefetch(autotune)
+
+
+def measure_throughput(dataset, steps=200, warmup=10):
+    """Images/sec the pipeline delivers on its own (no model)"""
+    iterator = iter(dataset)
+    for _ in range(warmup):
+        next(iterator)
+    images = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        batch, _ = next(iterator)
+        images += int(batch.shape[0])
+    elapsed = time.perf_counter() - start
+    return {"images_per_sec": images / elapsed, "ms_per_batch": 1000 * elapsed / steps, "steps": steps}
+
+
+def run_bench(args):
+    ds = make_dataset(args.records, args.split, args.batch_size, augment=not args.no_augment, repeat=True)
+    stats = measure_throughput(ds, args.steps)
+    print(f"✓ {args.split} pipeline: {stats['images_per_sec']:.0f} images/sec "
+          f"({stats['ms_per_batch']:.1f} ms per batch of {args.batch_size})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Pack the training set into TFRecords and benchmark input")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack_cmd = commands.add_parser("pack", help="Pack a class-per-folder dataset into TFRecord shards")
+    pack_cmd.add_argument("data_dir")
+    pack_cmd.add_argument("--output", default="records")
+    pack_cmd.add_argument("--shards", type=int, default=32)
+    pack_cmd.add_argument("--val-split", type=float, default=0.2)
+    pack_cmd.add_argument("--seed", type=int, default=42)
+    pack_cmd.add_argument("--workers", type=int, default=None)
+
+    bench_cmd = commands.add_parser("bench", help="Measure input pipeline throughput")
+    bench_cmd.add_argument("records")
+    bench_cmd.add_argument("--split", default="train", choices=["train", "val"])
+    bench_cmd.add_argument("--batch-size", type=int, default=32)
+    bench_cmd.add_argument("--steps", type=int, default=200)
+    bench_cmd.add_argument("--no-augment", action="store_true")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.command == "pack":
+        pack(args.data_dir, args.output, args.shards, args.val_split, seed=args.seed, workers=args.workers)
+    else:
+        run_bench(args)
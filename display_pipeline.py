@@ -0,0 +1,143 @@
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+STATUS_COLORS = {
+    "Healthy": (0, 255, 0), "Diseased": (0, 0, 255), "Stressed": (0, 255, 255)
+}
+
+
+def fit_size(src_w, src_h, canvas_w, canvas_h):
+    """Largest size with the source aspect ratio that fits in the canvas"""
+    ratio = min(canvas_w / src_w, canvas_h / src_h)
+    return int(src_w * ratio), int(src_h * ratio)
+
+
+class FrameScaler:
+    """Scales camera frames into preallocated display buffers.
+
+    The BGR display buffer, the RGBA conversion buffer and the PIL image that
+    wraps it are only reallocated when the target size changes, so the
+    per-frame work is one ``cv2.resize`` and one ``cv2.cvtColor`` into
+    existing memory.
+    """
+
+    def __init__(self):
+        self.src_size = None
+        self.canvas_size = None
+        self.size = None
+        self.bgr = None
+        self.rgba = None
+        self.image = None
+
+    def layout(self, src_w, src_h, canvas_w, canvas_h):
+        """Recompute the display size only when the source or canvas changed"""
+        if (src_w, src_h) == self.src_size and (canvas_w, canvas_h) == self.canvas_size:
+            return False
+
+        self.src_size = (src_w, src_h)
+        self.canvas_size = (canvas_w, canvas_h)
+        size = fit_size(src_w, src_h, canvas_w, canvas_h)
+        if size == self.size:
+            return False
+
+        self.size = size
+        if size[0] <= 0 or size[1] <= 0:
+            self.bgr = self.rgba = self.image = None
+            return True
+
+        w, h = size
+        self.bgr = np.empty((h, w, 3), dtype=np.uint8)
+        self.rgba = np.empty((h, w, 4), dtype=np.uint8)
+        # RGBA images share the numpy memory instead of copying it
+        self.image = Image.frombuffer("RGBA", (w, h), self.rgba, "raw", "RGBA", 0, 1)
+        return True
+
+    def scale(self, frame, canvas_w, canvas_h):
+        """Resize a BGR frame into the display buffer and return the buffer.
+
+        The source frame is never modified, so overlays can be drawn on the
+        returned buffer. Returns None when the canvas is too small to draw.
+        """
+        src_h, src_w = frame.shape[:2]
+        self.layout(src_w, src_h, canvas_w, canvas_h)
+        if self.bgr is None:
+            return None
+
+        if self.size == (src_w, src_h):
+            np.copyto(self.bgr, frame)
+        else:
+            cv2.resize(frame, self.size, dst=self.bgr, interpolation=cv2.INTER_AREA)
+        return self.bgr
+
+    def to_image(self):
+        """Convert the display buffer to the shared RGBA PIL image"""
+        cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+        return self.image
+
+
+def draw_bounding_box(frame, bbox_normalized, status, disease_name):
+    """Draw a labelled box; bbox coordinates are normalized to 0-1000"""
+    H, W, _ = frame.shape
+
+    x1 = int(bbox_normalized[0] * W / 1000)
+    y1 = int(bbox_normalized[1] * H / 1000)
+    x2 = int(bbox_normalized[2] * W / 1000)
+    y2 = int(bbox_normalized[3] * H / 1000)
+
+    color = STATUS_COLORS.get(status, (255, 255, 255))
+
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+
+    label = f"{status.upper()} - {disease_name}"
+    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
+
+    cv2.rectangle(frame, (x1, y1 - label_size[1] - 20),
+                  (x1 + label_size[0] + 10, y1), color, -1)
+
+    cv2.putText(frame, label, (x1 + 5, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
+
+
+def draw_scanning_overlay(frame):
+    """Draw the pulsing SCANNING... banner, dimming only the banner area"""
+    H, W, _ = frame.shape
+
+    text = "SCANNING..."
+    text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.5, 3)[0]
+    text_x = int((W - text_size[0]) / 2)
+    text_y = int((H + text_size[1]) / 2)
+
+    pulse = int((np.sin(time.time() * 10) + 1) * 127.5)
+    color = (255, pulse, 0)
+
+    # Same result as blending a black rectangle at 40%, without copying the frame
+    x1, y1 = max(text_x - 20, 0), max(text_y - text_size[1] - 10, 0)
+    x2, y2 = min(text_x + text_size[0] + 20, W), min(text_y + 10, H)
+    roi = frame[y1:y2, x1:x2]
+    np.multiply(roi, 0.6, out=roi, casting='unsafe')
+
+    cv2.putText(frame, text, (text_x, text_y),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.5, color, 3, cv2.LINE_AA)
+
+
+def draw_text_panel(frame, lines, origin=(10, 10), scale=0.45, line_height=18):
+    """Draw lines of small white text on a dimmed panel (used for the perf HUD)"""
+    if not lines:
+        return
+    H, W, _ = frame.shape
+    width = max(cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, scale, 1)[0][0] for line in lines)
+
+    x1, y1 = origin
+    x2 = min(W, x1 + width + 16)
+    y2 = min(H, y1 + line_height * len(lines) + 10)
+    roi = frame[y1:y2, x1:x2]
+    np.multiply(roi, 0.35, out=roi, casting='unsafe')
+
+    y = y1 + line_height
+    for line in lines:
+        cv2.putText(frame, line, (x1 + 8, y), cv2.FONT_HERSHEY_SIMPLEX, scale,
+                    (255, 255, 255), 1, cv2.LINE_AA)
+        y += line_height
@@ -0,0 +1,341 @@
+"""Distil the EfficientNetB0 classifier into a small student for low-end tablets.
+
+The teacher (Plant_Disease_Model_Final.h5) runs once over the packed records
+(dataset_records.py, read shard by shard in sorted order) and its
+log-probabilities are cached next to them, one row per record in that
+order; the student then trains on CPU from those soft labels plus the hard
+labels:
+    python distill.py teacher records/
+    python distill.py train records/ --arch mobilenetv3small --size 160 --output Plant_Disease_Model_Student.h5
+
+The student keeps the teacher's head layout (backbone -> pooling ->
+BatchNorm -> Dropout -> Dense softmax) and raw 0-255 RGB input, so every
+backend, the result cache and the GUI run it unchanged (gui --student).
+
+Per-class accuracy against CPU latency and memory, each model measured in a
+fresh process:
+    python distill.py report records/ Plant_Disease_Model_Final.h5 Plant_Disease_Model_Student.h5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+import dataset_records
+import plant_classifier as pc
+import result_cache
+
+TEACHER_INFO_FILE = "teacher.json"
+STUDENT_ARCHS = ("mobilenetv3small", "narrow")
+
+
+def teacher_path(record_dir, split):
+    return os.path.join(record_dir, f"teacher-{split}.npy")
+
+
+def record_files(record_dir, split):
+    """[(shard name, size), ...] of a split, in the order ordered datasets read them"""
+    names = sorted(n for n in os.listdir(record_dir) if n.startswith(f"{split}-") and n.endswith(".tfrecord"))
+    return [[name, os.path.getsize(os.path.join(record_dir, name))] for name in names]
+
+
+def cache_teacher(record_dir, model_path=pc.MODEL_PATH, class_names_path=pc.CLASS_NAMES_PATH, batch_size=64):
+    """Run the teacher once over both splits and store its log-probabilities (float16)"""
+    backend = pc.KerasBackend(model_path)
+    version = result_cache.model_version_id(model_path, class_names_path)
+    counts = {}
+    for split in ("train", "val"):
+        start = time.perf_counter()
+        dataset = dataset_records.make_dataset(record_dir, split, batch_size, training=False, augment=False,
+                                               ordered=True)
+        logp = [np.log(np.maximum(backend.predict_batch(images.numpy()), 1e-8)).astype(np.float16)
+                for images, _ in dataset]
+        logp = np.concatenate(logp)
+        np.save(teacher_path(record_dir, split), logp)
+        counts[split] = len(logp)
+        print(f"✓ Teacher {split}: {len(logp)} images in {time.perf_counter() - start:.1f}s")
+    with open(os.path.join(record_dir, TEACHER_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump({"model_version": version, "counts": counts,
+                   "records": {split: record_files(record_dir, split) for split in counts}}, f, indent=2)
+
+
+def load_teacher(record_dir, model_path=pc.MODEL_PATH, class_names_path=pc.CLASS_NAMES_PATH):
+    """{split: log-probabilities}, computing them first when missing, stale or from another model"""
+    info_path = os.path.join(record_dir, TEACHER_INFO_FILE)
+    version = result_cache.model_version_id(model_path, class_names_path)
+    info = {}
+    if os.path.exists(info_path):
+        with open(info_path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+    records = {split: record_files(record_dir, split) for split in ("train", "val")}
+    if info.get("model_version") != version or info.get("records") != records:
+        print("Caching teacher predictions (runs once per teacher model)...")
+        cache_teacher(record_dir, model_path, class_names_path)
+    return {split: np.load(teacher_path(record_dir, split)) for split in ("train", "val")}
+
+
+def narrow_cnn(input_shape, widths=(24, 48, 96, 160, 256)):
+    """Small depthwise-separable CNN, built as a nested model like the Keras applications"""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    model = keras.Sequential([keras.Input(input_shape), layers.Rescaling(1.0 / 255)], name="narrow_cnn")
+    model.add(layers.Conv2D(widths[0], 3, strides=2, padding="same", use_bias=False))
+    model.add(layers.BatchNormalization())
+    model.add(layers.ReLU(6.0))
+    for width in widths[1:]:
+        model.add(layers.SeparableConv2D(width, 3, padding="same", use_bias=False))
+        model.add(layers.BatchNormalization())
+        model.add(layers.ReLU(6.0))
+        model.add(layers.SeparableConv2D(width, 3, strides=2, padding="same", use_bias=False))
+        model.add(layers.BatchNormalization())
+        model.add(layers.ReLU(6.0))
+    return model
+
+
+def build_student(num_classes, arch="mobilenetv3small", input_size=(160, 160)):
+    """Student with the teacher's input convention (0-255 RGB) and head layout"""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    shape = (input_size[1], input_size[0], 3)
+    if arch == "mobilenetv3small":
+        base_model = keras.applications.MobileNetV3Small(input_shape=shape, include_top=False, weights="imagenet",
+                                                         include_preprocessing=True)
+    elif arch == "narrow":
+        base_model = narrow_cnn(shape)
+    else:
+        raise ValueError(f"Unknown student architecture '{arch}' (choose from {', '.join(STUDENT_ARCHS)})")
+
+    inputs = keras.Input(shape=shape)
+    x = base_model(inputs)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.Dropout(0.2)(x)
+    outputs = layers.Dense(num_classes, activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+def distillation_loss(num_classes, temperature=4.0, alpha=0.7):
+    """alpha * T^2 * KL(teacher_T || student_T) + (1 - alpha) * cross-entropy on the hard label.
+
+    ``y_true`` is [teacher log-probabilities, one-hot label]; the student
+    outputs probabilities, whose log is its logits up to a constant.
+    """
+    import tensorflow as tf
+
+    def loss(y_true, y_pred):
+        teacher_logp, onehot = y_true[:, :num_classes], y_true[:, num_classes:]
+        student_logp = tf.math.log(tf.clip_by_value(y_pred, 1e-7, 1.0))
+        soft_teacher = tf.nn.softmax(teacher_logp / temperature)
+        kd = tf.reduce_sum(soft_teacher * (tf.math.log(soft_teacher + 1e-8)
+                                           - tf.nn.log_softmax(student_logp / temperature)), axis=1)
+        ce = -tf.reduce_sum(onehot * student_logp, axis=1)
+        return alpha * temperature ** 2 * kd + (1.0 - alpha) * ce
+
+    return loss
+
+
+def label_accuracy(num_classes):
+    import tensorflow as tf
+
+    def accuracy(y_true, y_pred):
+        return tf.cast(tf.equal(tf.argmax(y_true[:, num_classes:], axis=1), tf.argmax(y_pred, axis=1)),
+                       tf.float32)
+
+    return accuracy
+
+
+def student_dataset(record_dir, split, teacher_logp, input_size, batch_size, training):
+    """(resized images, [teacher log-probs, one-hot]) in the order the teacher saw them"""
+    import tensorflow as tf
+
+    expected = dataset_records.load_manifest(record_dir)["counts"][split]
+    if len(teacher_logp) != expected:
+        raise ValueError(f"Teacher cache has {len(teacher_logp)} {split} rows for {expected} records; "
+                         f"rebuild it with 'python distill.py teacher {record_dir}'")
+
+    autotune = tf.data.AUTOTUNE
+    images = dataset_records.make_dataset(record_dir, split, 256, training=False, augment=False,
+                                          ordered=True).unbatch()
+    soft = tf.data.Dataset.from_tensor_slices(teacher_logp.astype(np.float32))
+    height, width = input_size[1], input_size[0]
+
+    def combine(pair, logp):
+        image, onehot = pair
+        image = tf.image.resize(image, (height, width), method="area")
+        return image, tf.concat([logp, onehot], axis=0)
+
+    ds = tf.data.Dataset.zip((images, soft)).map(combine, num_parallel_calls=autotune)
+    if training:
+        # Only label-preserving augmentation: the cached soft labels are for the unaugmented image
+        ds = ds.shuffle(2048, reshuffle_each_iteration=True)
+        ds = ds.map(lambda image, target: (tf.image.random_flip_left_right(image), target),
+                    num_parallel_calls=autotune)
+    return ds.batch(batch_size).prefetch(autotune)
+
+
+def train(args):
+    from tensorflow import keras
+    from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
+
+    manifest = dataset_records.load_manifest(args.records)
+    class_names = manifest["class_names"]
+    num_classes = len(class_names)
+    teacher = load_teacher(args.records, args.teacher, args.class_names)
+    size = (args.size, args.size)
+
+    train_ds = student_dataset(args.records, "train", teacher["train"], size, args.batch_size, training=True)
+    val_ds = student_dataset(args.records, "val", teacher["val"], size, args.batch_size, training=False)
+
+    model = build_student(num_classes, args.arch, size)
+    print(f"✓ Student {args.arch} at {args.size}x{args.size}: {model.count_params():,} parameters")
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=args.learning_rate),
+                  loss=distillation_loss(num_classes, args.temperature, args.alpha),
+                  metrics=[label_accuracy(num_classes)])
+    model.fit(train_ds, validation_data=val_ds, epochs=args.epochs, callbacks=[
+        ModelCheckpoint(args.output, save_best_only=True, monitor="val_loss", verbose=1),
+        EarlyStopping(patience=5, restore_best_weights=True, verbose=1),
+        ReduceLROnPlateau(factor=0.3, patience=2, verbose=1),
+    ])
+    model.save(args.output)
+    print(f"✓ Student saved to: {args.output}")
+
+
+def rss_mb():
+    """Current resident memory of this process in MB"""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 	# Peak, KB on Linux/BSD
+
+
+def _profile(job):
+    """Worker (fresh process): accuracy per class, latency and memory of one model"""
+    model_path, record_dir, per_class, threads, repeat = job
+    import finetune
+
+    class_names = dataset_records.load_manifest(record_dir)["class_names"]
+    images, labels = finetune.load_records_sample(record_dir, "val", per_class, len(class_names))
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    backend = pc.load_backend(None, model_path, threads)
+    load_s = time.perf_counter() - start
+    if tuple(backend.input_size) != images.shape[2:0:-1]:
+        images = np.stack([cv2.resize(image, backend.input_size, interpolation=cv2.INTER_AREA) for image in images])
+
+    probs = np.concatenate([backend.predict_batch(images[i:i + 32]) for i in range(0, len(images), 32)])
+    preds = probs.argmax(axis=1)
+    per_class_accuracy = {name: float(np.mean(preds[labels == i] == i)) if np.any(labels == i) else None
+                          for i, name in enumerate(class_names)}
+
+    single = images[:1]
+    backend.predict_batch(single)
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        backend.predict_batch(single)
+        samples.append(time.perf_counter() - t)
+    batch = images[:16]
+    t = time.perf_counter()
+    for _ in range(max(1, repeat // 4)):
+        backend.predict_batch(batch)
+    batch_s = (time.perf_counter() - t) / max(1, repeat // 4)
+
+    return {
+        "model": model_path,
+        "backend": backend.name,
+        "input_size": list(backend.input_size),
+        "accuracy": float(np.mean(preds == labels)),
+        "per_class_accuracy": per_class_accuracy,
+        "evaluation_images": int(len(labels)),
+        "load_s": load_s,
+        "ms_per_image_batch1": 1000 * float(np.median(samples)),
+        "images_per_sec_batch16": len(batch) / batch_s,
+        "model_rss_mb": rss_mb() - baseline,
+        "file_mb": os.path.getsize(model_path) / 1e6,
+    }
+
+
+def report(args):
+    """Run _profile for every model in its own process and print the trade-off table"""
+    ctx = multiprocessing.get_context("spawn")
+    reports = []
+    for model_path in args.models:
+        with ctx.Pool(1) as pool:
+            reports.append(pool.apply(_profile, ((model_path, args.records, args.per_class, args.threads,
+                                                  args.repeat),)))
+        print(f"✓ Profiled {model_path}")
+
+    names = [os.path.basename(r["model"]) for r in reports]
+    width = max(12, *(len(n) + 2 for n in names))
+    print("\n" + "=" * (44 + width * len(names)))
+    print(f"{'Class':<44}" + "".join(f"{n:>{width}}" for n in names))
+    for class_name in reports[0]["per_class_accuracy"]:
+        cells = [r["per_class_accuracy"].get(class_name) for r in reports]
+        print(f"{class_name[:43]:<44}" + "".join(f"{'-' if c is None else f'{c:.1%}':>{width}}" for c in cells))
+    print("-" * (44 + width * len(names)))
+    for label, key, fmt in (("Top-1 accuracy", "accuracy", "{:.2%}"),
+                            ("Input size", "input_size", "{0[0]}x{0[1]}"),
+                            ("ms/image (batch 1)", "ms_per_image_batch1", "{:.1f}"),
+                            ("images/sec (batch 16)", "images_per_sec_batch16", "{:.1f}"),
+                            ("Memory (MB, RSS)", "model_rss_mb", "{:.0f}"),
+                            ("File (MB)", "file_mb", "{:.1f}")):
+        print(f"{label:<44}" + "".join(f"{fmt.format(r[key]):>{width}}" for r in reports))
+    print("=" * (44 + width * len(names)))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "models": reports}, f, indent=2)
+    print(f"✓ Report saved to: {args.output}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Distil the classifier into a small student model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    teacher_cmd = commands.add_parser("teacher", help="Cache the teacher's predictions over the records")
+    teacher_cmd.add_argument("records", help="Directory written by 'dataset_records.py pack'")
+    teacher_cmd.add_argument("--teacher", default=pc.MODEL_PATH)
+    teacher_cmd.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+
+    train_cmd = commands.add_parser("train", help="Train the student from cached teacher predictions")
+    train_cmd.add_argument("records")
+    train_cmd.add_argument("--teacher", default=pc.MODEL_PATH)
+    train_cmd.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    train_cmd.add_argument("--arch", choices=STUDENT_ARCHS, default="mobilenetv3small")
+    train_cmd.add_argument("--size", type=int, default=160, help="Student input size (square)")
+    train_cmd.add_argument("--output", default=pc.STUDENT_MODEL_PATH)
+    train_cmd.add_argument("--batch-size", type=int, default=64)
+    train_cmd.add_argument("--epochs", type=int, default=20)
+    train_cmd.add_argument("--learning-rate", type=float, default=1e-3)
+    train_cmd.add_argument("--temperature", type=float, default=4.0)
+    train_cmd.add_argument("--alpha", type=float, default=0.7, help="Weight of the soft-label loss")
+
+    report_cmd = commands.add_parser("report", help="Per-class accuracy vs latency and memory of models")
+    report_cmd.add_argument("records")
+    report_cmd.add_argument("models", nargs="+", help="Model files (.h5 / .tflite / .onnx)")
+    report_cmd.add_argument("--per-class", type=int, default=50, help="Validation images per class")
+    report_cmd.add_argument("--threads", type=int, default=None)
+    report_cmd.add_argument("--repeat", type=int, default=50)
+    report_cmd.add_argument("--output", default="distill_report.json")
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.command == "teacher":
+        cache_teacher(args.records, args.teacher, args.class_names)
+    elif args.command == "train":
+        train(args)
+    else:
+        report(args)
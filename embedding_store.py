@@ -0,0 +1,199 @@
+"""Compact store of backbone embeddings for re-scoring and similar-case lookups.
+
+Nearly all of the model's FLOPs are in the EfficientNet backbone; the head is
+one Dense layer on the pooled 1280-d embedding. Saving the embeddings of
+scanned frames and batch images lets a retrained head re-score everything,
+and lets "similar past cases" be found, without running the backbone again.
+
+Layout of a store directory:
+    embeddings.f16   float16 rows, appended (read back through np.memmap)
+    meta.jsonl       one JSON object per row (source, time, predicted class...)
+    info.json        embedding dim and the model version the rows came from
+
+Examples:
+    python batch_classify.py survey_dump/ --backend keras --embeddings survey_emb/
+    python embedding_store.py survey_emb/ info
+    python embedding_store.py survey_emb/ rescore --head new_head.npz --output rescored.jsonl
+    python embedding_store.py survey_emb/ similar --image leaf.jpg --k 5
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import plant_classifier as pc
+import result_cache
+
+EMBEDDINGS_FILE = "embeddings.f16"
+META_FILE = "meta.jsonl"
+INFO_FILE = "info.json"
+
+
+def load_head(path):
+    """(kernel, bias) of a classifier head saved with np.savez(kernel=..., bias=...)"""
+    with np.load(path) as data:
+        return data["kernel"].astype(np.float32), data["bias"].astype(np.float32)
+
+
+class EmbeddingStore:
+    """Append-only float16 embedding matrix plus per-row metadata.
+
+    Rows from a different model version are meaningless for the current
+    backbone, so opening a store with a new ``model_version`` starts it over.
+    """
+
+    def __init__(self, path, dim=None, model_version=None):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        info_path = os.path.join(path, INFO_FILE)
+        info = {}
+        if os.path.exists(info_path):
+            with open(info_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+
+        stale = ((model_version is not None and info.get("model_version") not in (None, model_version))
+                 or (dim is not None and info.get("dim") not in (None, dim)))
+        if stale:
+            print(f"⚠ {path} holds embeddings from another model; starting a new store")
+            for name in (EMBEDDINGS_FILE, META_FILE):
+                if os.path.exists(os.path.join(path, name)):
+                    os.remove(os.path.join(path, name))
+            info = {}
+
+        self.dim = info.get("dim", dim)
+        self.model_version = info.get("model_version", model_version)
+        if self.dim is None:
+            raise ValueError(f"{path} is empty and no embedding dim was given")
+        with open(info_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "model_version": self.model_version}, f)
+
+        self._data = open(os.path.join(path, EMBEDDINGS_FILE), "ab")
+        self._meta = open(os.path.join(path, META_FILE), "a", encoding="utf-8")
+
+    def __len__(self):
+        return os.path.getsize(os.path.join(self.path, EMBEDDINGS_FILE)) // (self.dim * 2)
+
+    def add(self, embeddings, metas):
+        """Append (N, dim) embeddings and their N metadata dicts; returns the first row id"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float16)
+        if embeddings.ndim != 2 or embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected (N, {self.dim}) embeddings, got {embeddings.shape}")
+        with self._lock:
+            first = len(self)
+            self._data.write(embeddings.tobytes())
+            self._data.flush()
+            for meta in metas:
+                self._meta.write(json.dumps(meta) + "\n")
+            self._meta.flush()
+        return first
+
+    def matrix(self):
+        """Read-only (N, dim) float16 memmap of all rows"""
+        n = len(self)
+        if n == 0:
+            return np.zeros((0, self.dim), dtype=np.float16)
+        return np.memmap(os.path.join(self.path, EMBEDDINGS_FILE), dtype=np.float16, mode="r",
+                         shape=(n, self.dim))
+
+    def metadata(self):
+        with open(os.path.join(self.path, META_FILE), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def iter_chunks(self, chunk_size=65536):
+        """(start, float32 chunk) pairs, so the whole store never has to fit in RAM as float32"""
+        matrix = self.matrix()
+        for start in range(0, len(matrix), chunk_size):
+            yield start, np.asarray(matrix[start:start + chunk_size], dtype=np.float32)
+
+    def rescore(self, kernel, bias, chunk_size=65536):
+        """Probabilities of every stored row under a (possibly retrained) head"""
+        return np.concatenate([pc.softmax(chunk @ kernel + bias) for _, chunk in self.iter_chunks(chunk_size)]
+                              or [np.zeros((0, kernel.shape[1]), dtype=np.float32)])
+
+    def nearest(self, query, k=5, chunk_size=65536):
+        """[(row, cosine similarity), ...] for the k stored rows most similar to query"""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        best_rows, best_scores = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        for start, chunk in self.iter_chunks(chunk_size):
+            scores = chunk @ query / np.maximum(np.linalg.norm(chunk, axis=1), 1e-12)
+            rows = np.arange(start, start + len(chunk))
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+        order = np.argsort(-best_scores)
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+    def close(self):
+        self._data.close()
+        self._meta.close()
+
+
+def open_store(path, backend, class_names_path=pc.CLASS_NAMES_PATH):
+    """EmbeddingStore versioned by the backend's model file"""
+    version = result_cache.model_version_id(getattr(backend, "model_path", None), class_names_path)
+    return EmbeddingStore(path, backend.embedding_dim, version)
+
+
+def run_info(store, args):
+    print(f"{store.path}: {len(store)} embeddings, dim {store.dim}, model version {store.model_version}")
+
+
+def run_rescore(store, args):
+    class_names = pc.load_class_names(args.class_names)
+    kernel, bias = load_head(args.head)
+    start = time.perf_counter()
+    probs = store.rescore(kernel, bias)
+    elapsed = time.perf_counter() - start
+    with open(args.output, "w", encoding="utf-8") as f:
+        for meta, p in zip(store.metadata(), probs):
+            f.write(json.dumps({**meta, "top_k": pc.top_k(p, class_names, args.top_k)}) + "\n")
+    print(f"✓ Re-scored {len(probs)} embeddings in {elapsed * 1000:.1f} ms -> {args.output}")
+
+
+def run_similar(store, args):
+    backend = pc.load_backend("keras", args.model)
+    array = pc.load_image(args.image, backend.input_size)
+    if array is None:
+        raise SystemExit(f"ERROR: could not read {args.image}")
+    query = backend.features_batch(array[np.newaxis])[0]
+    metas = store.metadata()
+    for row, score in store.nearest(query, args.k):
+        print(f"  {score:.3f}  {json.dumps(metas[row])}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Inspect, re-score and search an embedding store")
+    parser.add_argument("store", help="Embedding store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info")
+
+    rescore = commands.add_parser("rescore", help="Score all embeddings with a classifier head")
+    rescore.add_argument("--head", required=True, help=".npz with 'kernel' and 'bias'")
+    rescore.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    rescore.add_argument("--top-k", type=int, default=3)
+    rescore.add_argument("--output", default="rescored.jsonl")
+
+    similar = commands.add_parser("similar", help="Stored cases most similar to an image")
+    similar.add_argument("--image", required=True)
+    similar.add_argument("--model", default=pc.MODEL_PATH)
+    similar.add_argument("--k", type=int, default=5)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if not os.path.exists(os.path.join(args.store, INFO_FILE)):
+        raise SystemExit(f"ERROR: {args.store} is not an embedding store")
+    store = EmbeddingStore(args.store)
+    try:
+        {"info": run_info, "rescore": run_rescore, "similar": run_similar}[args.command](store, args)
+    finally:
+        store.close()
@@ -0,0 +1,183 @@
+"""Export the trained Keras model to int8 TFLite / ONNX for fast CPU inference.
+
+Example:
+    python export_model.py --data-dir dataset/color --format both
+
+--data-dir is the PlantVillage folder used for training (one sub-folder per
+class, as read by flow_from_directory). A sample of it calibrates the int8
+quantization, and a disjoint sample is used to compare every exported model
+against the original .h5 (accuracy, top-1 agreement and latency).
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+import plant_classifier as pc
+
+
+def sample_labelled_images(data_dir, class_names, count, seed=42, exclude=()):
+    """Pick up to ``count`` (path, label) pairs spread evenly over the classes"""
+    rng = random.Random(seed)
+    exclude = set(exclude)
+    per_class = []
+    for label, name in enumerate(class_names):
+        class_dir = os.path.join(data_dir, name)
+        if not os.path.isdir(class_dir):
+            print(f"⚠ Missing class folder: {class_dir}")
+            continue
+        paths = [p for p in pc.find_images(class_dir) if p not in exclude]
+        rng.shuffle(paths)
+        per_class.append([(p, label) for p in paths])
+
+    # Round-robin over classes so small samples still cover every class
+    samples = []
+    while len(samples) < count and any(per_class):
+        for items in per_class:
+            if items and len(samples) < count:
+                samples.append(items.pop())
+    return samples
+
+
+def load_batch(samples, size):
+    arrays, labels = [], []
+    for path, label in samples:
+        array = pc.load_image(path, size)
+        if array is not None:
+            arrays.append(array)
+            labels.append(label)
+    return np.stack(arrays), np.array(labels)
+
+
+def export_tflite(model, calibration, output_path):
+    """Full-integer quantization with float32 input/output"""
+    import tensorflow as tf
+
+    def representative_dataset():
+        for array in calibration:
+            yield [array[np.newaxis]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"✓ TFLite int8 model saved to: {output_path}")
+
+
+def export_onnx(model, calibration, output_path):
+    """Convert with tf2onnx, then static int8 (QDQ) quantization with ONNX Runtime"""
+    import tensorflow as tf
+    import tf2onnx
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+
+    float_path = os.path.splitext(output_path)[0] + "_fp32.onnx"
+    spec = [tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name="input")]
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=float_path)
+    print(f"✓ ONNX float model saved to: {float_path}")
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self.items = iter({"input": array[np.newaxis]} for array in calibration)
+
+        def get_next(self):
+            return next(self.items, None)
+
+    quantize_static(float_path, output_path, Reader(),
+                    quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QInt8, weight_type=QuantType.QInt8)
+    print(f"✓ ONNX int8 model saved to: {output_path}")
+
+
+def evaluate(backend, images, labels, reference=None, batch_size=32):
+    """Accuracy, agreement with the reference predictions and per-image latency"""
+    probs = []
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        probs.append(backend.predict_batch(images[i:i + batch_size]))
+    elapsed = time.perf_counter() - start
+    probs = np.concatenate(probs)
+    preds = probs.argmax(axis=1)
+
+    report = {
+        "accuracy": float(np.mean(preds == labels)),
+        "ms_per_image": 1000 * elapsed / len(images),
+    }
+    if reference is not None:
+        report["top1_agreement"] = float(np.mean(preds == reference.argmax(axis=1)))
+        report["mean_abs_prob_delta"] = float(np.mean(np.abs(probs - reference)))
+    return report, probs
+
+
+def run(args):
+    class_names = pc.load_class_names(args.class_names)
+    keras_backend = pc.KerasBackend(args.model)
+    size = keras_backend.input_size
+
+    calibration_samples = sample_labelled_images(args.data_dir, class_names, args.calibration_samples)
+    eval_samples = sample_labelled_images(args.data_dir, class_names, args.eval_samples, seed=7,
+                                          exclude=[p for p, _ in calibration_samples])
+    print(f"✓ {len(calibration_samples)} calibration images, {len(eval_samples)} evaluation images")
+
+    calibration, _ = load_batch(calibration_samples, size)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    exported = {}
+    if args.format in ("tflite", "both"):
+        path = os.path.join(args.output_dir, pc.TFLITE_MODEL_PATH)
+        export_tflite(keras_backend.model, calibration, path)
+        exported["tflite"] = path
+    if args.format in ("onnx", "both"):
+        path = os.path.join(args.output_dir, pc.ONNX_MODEL_PATH)
+        export_onnx(keras_backend.model, calibration, path)
+        exported["onnx"] = path
+
+    # --- Accuracy-delta report against the original .h5 ---
+    images, labels = load_batch(eval_samples, size)
+    reference_report, reference = evaluate(keras_backend, images, labels)
+    report = {"evaluation_images": int(len(labels)), "keras_h5": reference_report}
+    for kind, path in exported.items():
+        backend = pc.load_backend(kind, path, args.threads)
+        model_report, _ = evaluate(backend, images, labels, reference)
+        model_report["accuracy_delta"] = model_report["accuracy"] - reference_report["accuracy"]
+        model_report["file_mb"] = os.path.getsize(path) / 1e6
+        report[kind] = model_report
+
+    report["keras_h5"]["file_mb"] = os.path.getsize(args.model) / 1e6
+
+    print("\n" + "=" * 70)
+    print(f"{'Model':<10}{'Accuracy':>10}{'Delta':>10}{'Agree':>10}{'ms/img':>10}{'MB':>10}")
+    for name, r in report.items():
+        if not isinstance(r, dict):
+            continue
+        print(f"{name:<10}{r['accuracy']:>10.4f}{r.get('accuracy_delta', 0.0):>+10.4f}"
+              f"{r.get('top1_agreement', 1.0):>10.4f}{r['ms_per_image']:>10.2f}{r['file_mb']:>10.1f}")
+    print("=" * 70)
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Report saved to: {args.report}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export an int8 TFLite/ONNX version of the classifier")
+    parser.add_argument("--data-dir", required=True, help="Training data folder (one sub-folder per class)")
+    parser.add_argument("--model", default=pc.MODEL_PATH)
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--format", choices=["tflite", "onnx", "both"], default="tflite")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--calibration-samples", type=int, default=300)
+    parser.add_argument("--eval-samples", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=None, help="Threads for the exported runtimes")
+    parser.add_argument("--report", default="export_report.json")
+    return parser
+
+
+if __name__ == "__main__":
+    run(build_parser().parse_args())
@@ -0,0 +1,181 @@
+"""Incremental fine-tuning on operator-reviewed captures.
+
+Instead of the full 25-epoch Colab retrain, this updates the trained model
+with the captures saved from the GUI (--capture-dir) plus a replay subset of
+the original training records, so it adapts to field conditions without
+forgetting the rest of PlantVillage:
+
+    python finetune.py captures/ --records records/ --output Plant_Disease_Model_finetuned.h5
+
+By default only the Dense head is trained: backbone embeddings are computed
+once (with a few augmented copies of every capture) and the head is fitted
+on them, which takes seconds on a CPU. --unfreeze N additionally trains the
+last N backbone layers end to end at a low learning rate, like stage 2 of
+the Colab script. Accuracy on held-out validation records and on the
+captures is printed before and after.
+"""
+import argparse
+import collections
+
+import numpy as np
+
+import dataset_records
+import plant_classifier as pc
+from capture_store import CaptureStore
+
+
+def load_captures(store, class_names, size):
+    """(images, labels) arrays for the labelled captures with a known class"""
+    index = {name: i for i, name in enumerate(class_names)}
+    images, labels = [], []
+    for path, label in store.labelled():
+        array = pc.load_image(path, size)
+        if array is None or label not in index:
+            print(f"⚠ Skipping capture {path} ({'unreadable' if array is None else 'unknown class ' + label})")
+            continue
+        images.append(array)
+        labels.append(index[label])
+    return np.array(images, dtype=np.float32).reshape(-1, size[1], size[0], 3), np.array(labels, dtype=np.int64)
+
+
+def load_records_sample(record_dir, split, per_class, num_classes, max_batches=2000):
+    """Up to per_class images of every class from packed records"""
+    dataset = dataset_records.make_dataset(record_dir, split, batch_size=64, training=False, augment=False)
+    taken = collections.Counter()
+    images, labels = [], []
+    for i, (batch, onehot) in enumerate(dataset):
+        for image, label in zip(batch.numpy(), np.argmax(onehot.numpy(), axis=1)):
+            if taken[label] < per_class:
+                taken[label] += 1
+                images.append(image)
+                labels.append(label)
+        if (len(taken) == num_classes and min(taken.values()) >= per_class) or i >= max_batches:
+            break
+    return np.array(images, dtype=np.float32), np.array(labels, dtype=np.int64)
+
+
+def batched(fn, arrays, batch_size=64):
+    return np.concatenate([fn(arrays[i:i + batch_size]) for i in range(0, len(arrays), batch_size)])
+
+
+def accuracy(backend, images, labels):
+    if not len(images):
+        return float("nan")
+    probs = batched(backend.predict_batch, images)
+    return float(np.mean(np.argmax(probs, axis=1) == labels))
+
+
+def augmented_copies(images, copies):
+    """The images plus ``copies`` randomly augmented versions of them"""
+    if copies <= 0 or not len(images):
+        return images
+    return np.concatenate([images] + [batched(lambda b: dataset_records.augment_batch(b).numpy(), images)
+                                      for _ in range(copies)])
+
+
+def train_head(backend, images, labels, weights, num_classes, epochs, learning_rate):
+    """Fit only the final Dense layer on frozen backbone embeddings"""
+    from tensorflow import keras
+
+    features = batched(backend.features_batch, images)
+    head = keras.Sequential([keras.Input((features.shape[1],)),
+                             keras.layers.Dense(num_classes, activation="softmax")])
+    head.layers[-1].set_weights(backend.head_weights())
+    head.compile(optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                 loss="categorical_crossentropy", metrics=["accuracy"])
+    head.fit(features, keras.utils.to_categorical(labels, num_classes), sample_weight=weights,
+             epochs=epochs, batch_size=32, shuffle=True, verbose=2)
+    backend.model.layers[-1].set_weights(head.layers[-1].get_weights())
+
+
+def train_end_to_end(backend, images, labels, weights, num_classes, epochs, unfreeze, learning_rate):
+    """Stage-2 style fine-tuning of the head and the last ``unfreeze`` backbone layers"""
+    import tensorflow as tf
+    from tensorflow import keras
+
+    model = backend.model
+    base_model = next(layer for layer in model.layers if isinstance(layer, keras.Model))
+    base_model.trainable = True
+    for layer in base_model.layers[:-unfreeze]:
+        layer.trainable = False
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss="categorical_crossentropy", metrics=["accuracy"])
+
+    dataset = (tf.data.Dataset.from_tensor_slices((images, tf.one_hot(labels, num_classes), weights))
+               .shuffle(len(images)).batch(16)
+               .map(lambda x, y, w: (dataset_records.augment_batch(x), y, w), num_parallel_calls=tf.data.AUTOTUNE)
+               .prefetch(tf.data.AUTOTUNE))
+    model.fit(dataset, epochs=epochs, verbose=2)
+
+
+def run(args):
+    class_names = pc.load_class_names(args.class_names)
+    backend = pc.KerasBackend(args.model)
+    size = backend.input_size
+
+    store = CaptureStore(args.captures)
+    new_images, new_labels = load_captures(store, class_names, size)
+    store.close()
+    if not len(new_images):
+        raise SystemExit("ERROR: no confirmed or corrected captures to train on")
+    print(f"✓ {len(new_images)} reviewed captures")
+
+    replay_images = np.zeros((0, size[1], size[0], 3), dtype=np.float32)
+    replay_labels = np.zeros(0, dtype=np.int64)
+    eval_images, eval_labels = replay_images, replay_labels
+    if args.records:
+        replay_images, replay_labels = load_records_sample(args.records, "train", args.replay_per_class,
+                                                           len(class_names))
+        eval_images, eval_labels = load_records_sample(args.records, "val", args.eval_per_class,
+                                                       len(class_names))
+        print(f"✓ Replay: {len(replay_images)} training images, evaluation: {len(eval_images)} held-out images")
+    else:
+        print("⚠ No --records given: training on captures only (risk of forgetting other classes)")
+
+    before = (accuracy(backend, eval_images, eval_labels), accuracy(backend, new_images, new_labels))
+
+    if args.unfreeze:
+        images = np.concatenate([new_images, replay_images])
+        labels = np.concatenate([new_labels, replay_labels])
+        weights = np.concatenate([np.full(len(new_images), args.new_weight, np.float32),
+                                  np.ones(len(replay_images), np.float32)])
+        train_end_to_end(backend, images, labels, weights, len(class_names), args.epochs, args.unfreeze,
+                         args.learning_rate or 1e-5)
+    else:
+        copies = augmented_copies(new_images, args.augment_copies)
+        images = np.concatenate([copies, replay_images])
+        labels = np.concatenate([np.tile(new_labels, len(copies) // len(new_images)), replay_labels])
+        weights = np.concatenate([np.full(len(copies), args.new_weight, np.float32),
+                                  np.ones(len(replay_images), np.float32)])
+        train_head(backend, images, labels, weights, len(class_names), args.epochs, args.learning_rate or 1e-3)
+    backend.kernel, backend.bias = backend.head_weights()
+
+    after = (accuracy(backend, eval_images, eval_labels), accuracy(backend, new_images, new_labels))
+    print(f"✓ Held-out accuracy: {before[0]:.2%} -> {after[0]:.2%}")
+    print(f"✓ Capture accuracy:  {before[1]:.2%} -> {after[1]:.2%}")
+
+    backend.model.save(args.output)
+    print(f"✓ Fine-tuned model saved to: {args.output}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fine-tune the model on reviewed field captures")
+    parser.add_argument("captures", help="Capture directory written by the GUI (--capture-dir)")
+    parser.add_argument("--model", default=pc.MODEL_PATH)
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--records", default=None, help="Packed training records for replay and evaluation")
+    parser.add_argument("--output", default="Plant_Disease_Model_finetuned.h5")
+    parser.add_argument("--replay-per-class", type=int, default=20)
+    parser.add_argument("--eval-per-class", type=int, default=10)
+    parser.add_argument("--augment-copies", type=int, default=4,
+                        help="Augmented copies of each capture (head-only training)")
+    parser.add_argument("--new-weight", type=float, default=2.0, help="Loss weight of captures vs replay")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--unfreeze", type=int, default=0,
+                        help="Also train the last N backbone layers (0: head only)")
+    parser.add_argument("--learning-rate", type=float, default=None)
+    return parser
+
+
+if __name__ == "__main__":
+    run(build_parser().parse_args())
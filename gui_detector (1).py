@@ -1,20 +1,30 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from tkinter.filedialog import askopenfilename
 import cv2
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import time
 import numpy as np
 import traceback
 
-# Import the analysis functions
-try:
-    import analysis_logic as al
-    print("✓ analysis_logic module imported successfully")
-except ImportError as e:
-    print(f"ERROR: Could not import analysis_logic: {e}")
-    print("Make sure analysis_logic.py is in the same directory!")
-    exit(1)
+STARTUP_TIME = time.perf_counter()
+
+from inference_worker import InferenceWorker, AdaptiveScanRate
+from scene_gate import SceneChangeGate
+from temporal_smoothing import TemporalSmoother
+import display_pipeline
+import plant_classifier as pc
+import knowledge_base as kb
+from model_loader import ModelLoader
+from camera_capture import CameraCapture, parse_source
+from perf_metrics import PerfMonitor, MetricsExporter
+from capture_store import CaptureStore
+from scan_history import ScanHistory
+
+# The analysis functions (and TensorFlow) are imported in the background by
+# ModelLoader so the window and camera feed come up immediately.
+al = None
 
 # --- Tkinter Colors and Styles ---
 BG_COLOR = "#f0fdf4" 	# Light green background
@@ -25,28 +35,55 @@ RED_COLOR = "#ef4444" 	# Red-500
 YELLOW_COLOR = "#f59e0b" 	# Yellow-600
 SCAN_COLOR = "#3b82f6" 	# Blue-500
 WAITING_COLOR = "#6b7280" 	# Gray-500
+STATUS_BACKGROUNDS = {"Healthy": PRIMARY_COLOR, "Diseased": RED_COLOR, "Stressed": YELLOW_COLOR}
 
 class PlantDetectorApp:
-    def __init__(self, window, window_title):
+    def __init__(self, window, window_title, backend_config=None, source=0, server_url=None,
+                 show_hud=False, metrics_file=None, metrics_interval=5.0, capture_dir=None,
+                 history_dir=None):
         self.window = window
         self.window.title(window_title)
         self.window.configure(bg=BG_COLOR)
         
         self.window.geometry("1500x850")
         
+        # --- Performance Instrumentation ---
+        self.perf = PerfMonitor()
+        self.show_hud = show_hud 	# Toggle with F2
+        self.hud_lines = []
+        self.hud_updated = 0.0
+        self.metrics_exporter = None
+        if metrics_file:
+            self.metrics_exporter = MetricsExporter(self.perf, metrics_file, metrics_interval)
+            self.metrics_exporter.start()
+        
         # --- State Variables ---
-        self.vid = None
+        self.capture = None
+        self.display_reader = None 	# Display's view of the capture ring buffer
         self.camera_available = False
-        self.initialize_camera()
+        self.initialize_camera(source)
         
         self.current_bbox = None
         self.is_scanning = False
         self.last_analysis_result = None
         self.frame_count = 0
-        self.analysis_interval = 30 # No longer used for auto-scan, but kept
+        self.auto_scan = False 	# True: classify live frames continuously in the background
+        self.scan_rate = AdaptiveScanRate(target_fps=2.0)
+        self.scene_gate = SceneChangeGate(threshold=6.0, timeout=10.0)
+        self.pending_signature = None 	# Scene signature of the auto-scan frame in flight
+        self.smoother = TemporalSmoother(alpha=0.4) 	# Steadies auto-scan results across frames
         
         self.selected_plant_var = tk.StringVar(self.window)
         
+        # --- Operator Review (opt-in: reviewed scans are saved for finetune.py) ---
+        self.capture_store = CaptureStore(capture_dir) if capture_dir else None
+        self.review_target = None 	# (frame, result, plant_type) of the scan shown in the panel
+        
+        # --- Scan History (opt-in: every analysis is kept, written in the background) ---
+        self.scan_history = ScanHistory(history_dir) if history_dir else None
+        self.camera_id = str(source)
+        self.correction_var = tk.StringVar(self.window)
+        
         # NEW STATE VARIABLES FOR CONTROL BUTTONS
         self.is_live = True 	# True: Video runs live; False: Video is paused on a frame
         self.paused_frame = None 	# Stores the frame when analysis is triggered
@@ -54,33 +91,85 @@ class PlantDetectorApp:
         # --- UI Setup ---
         self.setup_ui()
         
-        if al.PLANT_TYPES:
-            self.selected_plant_var.set(al.PLANT_TYPES[0])
-            
+        # --- Background Inference (created once the model is loaded) ---
+        self.scan_job_id = None 	# Id of the frame whose result we are waiting for
+        self.inference_worker = None
+        self.model_ready = False
+        self.knowledge_base = None 	# knowledge_base.KnowledgeBase once the model is loaded
+        self.show_loading_state()
+        
+        # backend_config: optional plant_classifier.load_backend() arguments (TFLite/ONNX/Keras)
+        # server_url: thin-client mode, analysis runs on an inference_server.py box
+        self.model_loader = ModelLoader(self.post_model_loaded, backend_config,
+                                        warmup_shape=(self.vid_height, self.vid_width, 3),
+                                        server_url=server_url, monitor=self.perf)
+        self.model_loader.start()
+        
+        # --- Display Buffers ---
+        self.frame_scaler = display_pipeline.FrameScaler()
+        self.photo = None
+        self.canvas_image = None 	# Single canvas item reused for every frame
+        self.canvas_center = None
+        self.dummy_frame = None
+        
         # --- Start Video Loop ---
         self.delay = 15
         self.update_video()
         
         # --- Handle closing ---
         self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.window.bind("<F2>", lambda e: self.toggle_hud())
+        
+        self.window_ready_time = time.perf_counter()
+        print(f"✓ Window ready after {self.window_ready_time - STARTUP_TIME:.2f}s (model loading in background)")
+
+    def post_model_loaded(self, module, analyze_fn, timings, error):
+        """Called on the loader thread: hand over to the Tk loop"""
+        self.window.after(0, self.on_model_loaded, module, analyze_fn, timings, error)
+
+    def on_model_loaded(self, module, analyze_fn, timings, error):
+        """Finish startup once analysis_logic and the model are ready"""
+        global al
+        
+        if error is not None:
+            print(f"ERROR: Could not load the analysis module / model: {error}")
+            print("Make sure analysis_logic.py and the model files are in the same directory!")
+            self.status_frame.config(bg=RED_COLOR)
+            self.status_label.config(text="MODEL FAILED TO LOAD", bg=RED_COLOR)
+            return
+        
+        al = module
+        if al.PLANT_TYPES:
+            self.plant_selector.config(values=al.PLANT_TYPES)
+            self.selected_plant_var.set(al.PLANT_TYPES[0])
+        else:
+            print("⚠ No plant types found in analysis_logic")
+        
+        self.knowledge_base = self.model_loader.knowledge_base
+        self.inference_worker = InferenceWorker(analyze_fn, self.post_analysis_result)
+        self.model_ready = True
+        self.show_waiting_state()
+        
+        print("✓ Model ready. Startup breakdown:")
+        print(f"    import analysis_logic : {timings.get('import', 0):.2f}s")
+        print(f"    model load            : {timings.get('model_load', 0):.2f}s")
+        print(f"    first inference       : {timings.get('first_inference', 0):.2f}s")
+        print(f"    total until ready     : {time.perf_counter() - STARTUP_TIME:.2f}s")
 
-    def initialize_camera(self):
-        """Initialize camera"""
+    def initialize_camera(self, source=0):
+        """Initialize camera (or video file / stream URL) and start the background capture thread"""
         try:
-            self.vid = cv2.VideoCapture(0)
+            self.capture = CameraCapture(source, width=1280, height=720, loop=True, monitor=self.perf)
+            self.vid_width = self.capture.width
+            self.vid_height = self.capture.height
             
-            if self.vid.isOpened():
+            if self.capture.opened:
                 self.camera_available = True
-                self.vid.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-                self.vid.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-                
-                self.vid_width = int(self.vid.get(cv2.CAP_PROP_FRAME_WIDTH))
-                self.vid_height = int(self.vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                self.display_reader = self.capture.reader()
+                self.capture.start()
                 print(f"✓ Camera opened: {self.vid_width}x{self.vid_height}")
             else:
                 self.camera_available = False
-                self.vid_width = 640
-                self.vid_height = 480
                 print("⚠ Camera not available")
         except Exception as e:
             print(f"⚠ Camera error: {e}")
@@ -124,6 +213,10 @@ class PlantDetectorApp:
                                      bg=PRIMARY_COLOR, fg='white', font=('Arial', 10, 'bold'), relief=tk.FLAT)
         self.scan_button.pack(side='right', padx=10)
 
+        self.auto_button = tk.Button(control_frame, text="Auto Scan: OFF 🔄", command=self.toggle_auto_scan, 
+                                     bg=WAITING_COLOR, fg='white', font=('Arial', 10, 'bold'), relief=tk.FLAT)
+        self.auto_button.pack(side='right', padx=10)
+
         self.quit_button = tk.Button(control_frame, text="Quit App 🛑", command=self.quit_app, 
                                      bg=RED_COLOR, fg='white', font=('Arial', 10, 'bold'), relief=tk.FLAT)
         self.quit_button.pack(side='right', padx=10)
@@ -134,15 +227,13 @@ class PlantDetectorApp:
                  fg=DARK_COLOR, 
                  bg='white').pack(side='right', padx=(10, 5))
                  
-        if al.PLANT_TYPES:
-            self.plant_selector = ttk.Combobox(control_frame, 
-                                               textvariable=self.selected_plant_var, 
-                                               values=al.PLANT_TYPES, 
-                                               state="readonly",
-                                               width=15)
-            self.plant_selector.pack(side='right')
-        else:
-            tk.Label(control_frame, text="No Plant Types Found", fg=RED_COLOR, bg='white').pack(side='right')
+        # Plant types are filled in once analysis_logic has been loaded
+        self.plant_selector = ttk.Combobox(control_frame, 
+                                           textvariable=self.selected_plant_var, 
+                                           values=[], 
+                                           state="readonly",
+                                           width=15)
+        self.plant_selector.pack(side='right')
 
         canvas_frame = tk.Frame(video_card, bg='black')
         canvas_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
@@ -159,6 +250,10 @@ class PlantDetectorApp:
         if not self.camera_available:
             messagebox.showinfo("Error", "Camera not available for scanning.")
             return
+        
+        if not self.model_ready:
+            messagebox.showinfo("Please wait", "The model is still loading.")
+            return
 
         if self.is_live:
             # 1. Capture the current frame and pause the video display
@@ -170,16 +265,48 @@ class PlantDetectorApp:
             if self.paused_frame is not None:
                 selected_plant = self.selected_plant_var.get()
                 if selected_plant and selected_plant != "N/A":
-                    self.run_analysis(self.paused_frame.copy(), selected_plant)
+                    self.run_analysis(self.paused_frame, selected_plant)
         else:
             # Resume live video
             self.is_live = True
             self.paused_frame = None
+            self.scan_job_id = None # Ignore any result still in flight
+            self.is_scanning = False
+            self.scene_gate.reset()
+            self.smoother.reset()
             self.scan_button.config(text="Scan/Hold 📸", bg=PRIMARY_COLOR)
             self.last_analysis_result = None # Clear analysis result when resuming live
             self.show_waiting_state()
             print("Resuming Live Feed.")
 
+    def toggle_auto_scan(self):
+        """Turns continuous background scanning of the live feed on or off."""
+        if not self.camera_available:
+            messagebox.showinfo("Error", "Camera not available for scanning.")
+            return
+        
+        if not self.model_ready:
+            messagebox.showinfo("Please wait", "The model is still loading.")
+            return
+
+        self.auto_scan = not self.auto_scan
+        if self.auto_scan:
+            self.auto_button.config(text="Auto Scan: ON 🔄", bg=SCAN_COLOR)
+            self.scan_rate.next_due = 0.0
+            self.scene_gate.reset()
+            self.smoother.reset()
+            print("Auto Scan enabled.")
+        else:
+            self.auto_button.config(text="Auto Scan: OFF 🔄", bg=WAITING_COLOR)
+            self.scan_job_id = None
+            stats = self.scene_gate.stats()
+            print(f"Auto Scan disabled. Inferences run: {stats['executed']}, "
+                  f"skipped (scene unchanged): {stats['skipped']}")
+            smoothing = self.smoother.stats()
+            print(f"Results panel redrawn for {smoothing['changes']} of {smoothing['updates']} results "
+                  f"(smoothed decision unchanged: {smoothing['skip_ratio']:.0%})")
+            self.scan_rate.backoff = 1.0
+
     def quit_app(self):
         """Handles graceful application shutdown when Quit button is pressed."""
         self.on_closing()
@@ -313,12 +440,15 @@ class PlantDetectorApp:
                                          fg='black')
         self.confidence_label.pack(side='right')
         
+        if self.capture_store:
+            self.create_review_section()
+        
         # === SEVERITY LEVEL ===
         severity_box = tk.Frame(self.results_frame, bg='white', relief='solid', bd=1)
         severity_box.pack(fill='x', padx=15, pady=10)
         
         tk.Label(severity_box,
-                 text="Severity Level (Simulated)",
+                 text="Severity Level (Lesion Area)",
                  font=('Arial', 11, 'bold'),
                  bg='white',
                  fg='black').pack(anchor='w', padx=15, pady=(10, 5))
@@ -327,7 +457,14 @@ class PlantDetectorApp:
                                              orient='horizontal',
                                              mode='determinate',
                                              length=400)
-        self.severity_bar.pack(fill='x', padx=15, pady=(0, 10))
+        self.severity_bar.pack(fill='x', padx=15, pady=(0, 5))
+        
+        self.severity_label = tk.Label(severity_box,
+                                       text="N/A",
+                                       font=('Arial', 10),
+                                       bg='white',
+                                       fg='black')
+        self.severity_label.pack(anchor='w', padx=15, pady=(0, 10))
         
         # === CAUSE/EXPLANATION ===
         self.create_info_section("Cause & Explanation", "cause", "#9333ea", "#f3e8ff")
@@ -338,6 +475,88 @@ class PlantDetectorApp:
         
         self.show_waiting_state()
 
+    def create_review_section(self):
+        """Confirm / correct buttons that save the scan to the capture store"""
+        review_box = tk.Frame(self.results_frame, bg='white', relief='solid', bd=1)
+        review_box.pack(fill='x', padx=15, pady=10)
+        
+        tk.Label(review_box,
+                 text="Operator Review",
+                 font=('Arial', 11, 'bold'),
+                 bg='white',
+                 fg='black').pack(anchor='w', padx=15, pady=(10, 5))
+        
+        button_row = tk.Frame(review_box, bg='white')
+        button_row.pack(fill='x', padx=15, pady=(0, 5))
+        
+        self.confirm_button = tk.Button(button_row, text="Prediction Correct ✔", command=self.confirm_scan,
+                                        bg=PRIMARY_COLOR, fg='white', font=('Arial', 10, 'bold'),
+                                        relief=tk.FLAT, state='disabled')
+        self.confirm_button.pack(side='left')
+        
+        self.correct_button = tk.Button(button_row, text="Save Correction ✎", command=self.correct_scan,
+                                        bg=YELLOW_COLOR, fg='white', font=('Arial', 10, 'bold'),
+                                        relief=tk.FLAT, state='disabled')
+        self.correct_button.pack(side='right')
+        
+        self.correction_selector = ttk.Combobox(review_box,
+                                                textvariable=self.correction_var,
+                                                values=[],
+                                                state="readonly")
+        self.correction_selector.pack(fill='x', padx=15, pady=(0, 5))
+        
+        self.review_label = tk.Label(review_box,
+                                     text=self.review_summary(),
+                                     font=('Arial', 9),
+                                     bg='white',
+                                     fg=WAITING_COLOR)
+        self.review_label.pack(anchor='w', padx=15, pady=(0, 10))
+
+    def review_summary(self):
+        counts = self.capture_store.counts()
+        return (f"Saved captures: {counts.get('confirmed', 0)} confirmed, "
+                f"{counts.get('corrected', 0)} corrected")
+
+    def set_review_target(self, frame, result, plant_type):
+        """Offer the scan now shown in the panel for review"""
+        if not self.capture_store or not result.get("class_name"):
+            return
+        self.review_target = (frame, result, plant_type)
+        
+        names = self.knowledge_base.class_names if self.knowledge_base else [n for n, _ in result.get("top_k", [])]
+        plant = result["class_name"].partition("___")[0]
+        # The predicted plant's classes first, they are the likely corrections
+        self.correction_selector.config(values=sorted(names, key=lambda n: n.partition("___")[0] != plant))
+        self.correction_var.set(result["class_name"])
+        self.confirm_button.config(state='normal')
+        self.correct_button.config(state='normal')
+
+    def save_review(self, label, status):
+        if self.review_target is None:
+            return
+        frame, result, plant_type = self.review_target
+        try:
+            capture_id = self.capture_store.add(frame, result, label, status, plant_type)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Capture Error", f"Could not save capture: {e}")
+            return
+        print(f"✓ Capture {capture_id} saved ({status}: {label})")
+        self.review_target = None
+        self.confirm_button.config(state='disabled')
+        self.correct_button.config(state='disabled')
+        self.review_label.config(text=self.review_summary())
+
+    def confirm_scan(self):
+        if self.review_target is not None:
+            self.save_review(self.review_target[1]["class_name"], "confirmed")
+
+    def correct_scan(self):
+        label = self.correction_var.get()
+        if self.review_target is None or not label:
+            return
+        status = "confirmed" if label == self.review_target[1]["class_name"] else "corrected"
+        self.save_review(label, status)
+
     def create_info_section(self, title, var_name, title_color, bg_color):
         """Create an information section with title and text area"""
         section_frame = tk.Frame(self.results_frame, bg='white', relief='solid', bd=1)
@@ -375,6 +594,7 @@ class PlantDetectorApp:
         self.type_label.config(text="N/A")
         self.confidence_label.config(text="0.00%")
         self.severity_bar['value'] = 0
+        self.severity_label.config(text="N/A")
         
         self.update_text_widget(self.cause_text, ["• Waiting for plant detection..."])
         self.update_text_widget(self.discoloration_text, ["• Waiting for plant detection..."])
@@ -382,21 +602,31 @@ class PlantDetectorApp:
         self.update_text_widget(self.recommendations_text, ["• Waiting for plant detection..."])
         self.update_text_widget(self.preventive_text, ["• Waiting for plant detection..."])
 
+    def show_loading_state(self):
+        """Show the model loading state during startup"""
+        self.status_frame.config(bg=WAITING_COLOR)
+        self.status_label.config(text="LOADING MODEL...", bg=WAITING_COLOR)
+        
+        for text_widget in (self.cause_text, self.discoloration_text, self.symptoms_text,
+                            self.recommendations_text, self.preventive_text):
+            self.update_text_widget(text_widget, ["• Loading model, please wait..."])
+
     def update_text_widget(self, text_widget, items):
         """Update a text widget with list of items"""
+        self.set_text_widget(text_widget, "".join(f"{item}\n" for item in items) if items else kb.EMPTY_BLOCK)
+
+    def set_text_widget(self, text_widget, text):
+        """Replace the contents of a read-only text widget with a preformatted block"""
         text_widget.config(state='normal')
         text_widget.delete('1.0', tk.END)
-        
-        if items:
-            for item in items:
-                text_widget.insert(tk.END, f"{item}\n")
-        else:
-            text_widget.insert(tk.END, "• No data available\n")
-        
+        text_widget.insert(tk.END, text)
         text_widget.config(state='disabled')
 
     def get_dummy_frame(self):
         """Generate placeholder frame when camera unavailable"""
+        if self.dummy_frame is not None:
+            return self.dummy_frame
+        
         frame = np.zeros((self.vid_height, self.vid_width, 3), dtype=np.uint8)
         frame[:] = (40, 40, 40)
         
@@ -415,17 +645,22 @@ class PlantDetectorApp:
                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (150, 150, 150), 1, cv2.LINE_AA)
             y_offset += 30
         
+        self.dummy_frame = frame
         return frame
 
     def update_video(self):
         """Main video update loop"""
         # --- Frame reading depends on self.is_live state ---
         if self.is_live:
-            if self.camera_available and self.vid and self.vid.isOpened():
-                ret, frame = self.vid.read()
+            if self.camera_available:
+                # Newest frame from the capture thread (None if nothing new since last tick)
+                captured = self.display_reader.read()
+                ret = captured is not None
                 # Store the last live frame for manual analysis
+                # (each capture is a new array and overlays never touch it, so no copy)
                 if ret:
-                    self.paused_frame = frame.copy()
+                    frame = captured.frame
+                    self.paused_frame = frame
             else:
                 ret = True
                 frame = self.get_dummy_frame()
@@ -440,121 +675,175 @@ class PlantDetectorApp:
                 frame = self.get_dummy_frame() # Fallback
 
         if ret:
-            # === AUTOMATIC SCANNING LOGIC REMOVED HERE ===
+            # === AUTOMATIC SCANNING (live mode only) ===
+            if self.auto_scan and self.is_live and self.paused_frame is not None:
+                self.schedule_auto_scan()
             
-            # Drawing overlays (Runs on both live and paused frame)
-            if self.camera_available:
-                if self.is_scanning:
-                    self.draw_scanning_overlay(frame)
+            with self.perf.time("display.scale"):
+                display = self.scale_frame(frame)
+            
+            if display is not None:
+                overlay_start = time.perf_counter()
+                # Drawing overlays on the display buffer (the source frame stays untouched)
+                if self.camera_available:
+                    if self.is_scanning:
+                        self.draw_scanning_overlay(display)
+                    
+                    if self.current_bbox and self.last_analysis_result:
+                        # One box per localized leaf when the analyzer found several
+                        regions = self.last_analysis_result.get('regions') or [
+                            dict(self.last_analysis_result, bbox=self.current_bbox)]
+                        for region in regions:
+                            self.draw_bounding_box(display, region['bbox'], 
+                                                     region['status'],
+                                                     region['disease'])
                 
-                if self.current_bbox and self.last_analysis_result:
-                    self.draw_bounding_box(frame, self.current_bbox, 
-                                             self.last_analysis_result['status'],
-                                             self.last_analysis_result['disease'])
+                if self.show_hud:
+                    self.draw_perf_hud(display)
+                self.perf.record("display.overlay", time.perf_counter() - overlay_start)
 
-            self.display_frame(frame)
+                self.display_frame()
+                self.perf.tick("display")
+                
+                if self.is_live and self.camera_available:
+                    self.display_reader.record_latency(captured.timestamp)
             
         self.window.after(self.delay, self.update_video)
 
-    def display_frame(self, frame):
-        """Display the frame on canvas"""
+    def display_frame(self):
+        """Display the frame scaler's display buffer (overlays included) on the canvas"""
         try:
-            cv2image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
-            img = Image.fromarray(cv2image)
-            
+            with self.perf.time("display.convert"):
+                img = self.frame_scaler.to_image()
+            paste_start = time.perf_counter()
             canvas_w = self.canvas.winfo_width()
             canvas_h = self.canvas.winfo_height()
-
-            if canvas_w > 1 and canvas_h > 1:
-                ratio = min(canvas_w / self.vid_width, canvas_h / self.vid_height)
-                new_w = int(self.vid_width * ratio)
-                new_h = int(self.vid_height * ratio)
-                
-                if new_w > 0 and new_h > 0:
-                    img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                    
-                    self.photo = ImageTk.PhotoImage(image=img)
-                    self.canvas.delete("all")
-                    self.canvas.create_image(canvas_w / 2, canvas_h / 2, 
-                                             image=self.photo, anchor=tk.CENTER)
+            
+            # Only rebuild the PhotoImage / canvas item when the size changes
+            if self.photo is None or (self.photo.width(), self.photo.height()) != img.size:
+                self.photo = ImageTk.PhotoImage(image=img)
+                if self.canvas_image is None:
+                    self.canvas_image = self.canvas.create_image(canvas_w / 2, canvas_h / 2, 
+                                                                 image=self.photo, anchor=tk.CENTER)
+                else:
+                    self.canvas.itemconfig(self.canvas_image, image=self.photo)
+            else:
+                self.photo.paste(img)
+            
+            if self.canvas_center != (canvas_w, canvas_h):
+                self.canvas_center = (canvas_w, canvas_h)
+                self.canvas.coords(self.canvas_image, canvas_w / 2, canvas_h / 2)
+            self.perf.record("display.paste", time.perf_counter() - paste_start)
         except Exception as e:
             pass
 
+    def toggle_hud(self):
+        """Show/hide the performance overlay (F2)"""
+        self.show_hud = not self.show_hud
+
+    def draw_perf_hud(self, frame):
+        """Draw FPS and stage latencies; the text is refreshed twice a second"""
+        now = time.perf_counter()
+        if now - self.hud_updated > 0.5:
+            self.hud_lines = self.perf.hud_lines()
+            self.hud_updated = now
+        display_pipeline.draw_text_panel(frame, self.hud_lines)
+
+    def scale_frame(self, frame):
+        """Resize the frame into the preallocated display buffer (None if canvas not ready)"""
+        canvas_w = self.canvas.winfo_width()
+        canvas_h = self.canvas.winfo_height()
+        if canvas_w <= 1 or canvas_h <= 1:
+            return None
+        return self.frame_scaler.scale(frame, canvas_w, canvas_h)
+
     def draw_bounding_box(self, frame, bbox_normalized, status, disease_name):
         """Draw bounding box on frame"""
-        H, W, _ = frame.shape
-        
-        x1 = int(bbox_normalized[0] * W / 1000)
-        y1 = int(bbox_normalized[1] * H / 1000)
-        x2 = int(bbox_normalized[2] * W / 1000)
-        y2 = int(bbox_normalized[3] * H / 1000)
+        display_pipeline.draw_bounding_box(frame, bbox_normalized, status, disease_name)
+
+    def draw_scanning_overlay(self, frame):
+        """Draw scanning indicator"""
+        display_pipeline.draw_scanning_overlay(frame)
 
-        color_map = {
-            "Healthy": (0, 255, 0), "Diseased": (0, 0, 255), "Stressed": (0, 255, 255)
-        }
-        color = color_map.get(status, (255, 255, 255))
+    def run_analysis(self, frame, plant_type):
+        """Queue a frame for CNN analysis on the background worker"""
+        self.is_scanning = True
+        self.update_results_panel_scanning()
+        self.pending_signature = None
+        self.scan_job_id = self.inference_worker.submit(frame, plant_type)
 
-        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+    def schedule_auto_scan(self):
+        """Send the latest live frame to the worker when the adaptive rate allows it"""
+        if not self.scan_rate.due(busy=self.inference_worker.busy):
+            return
+        
+        selected_plant = self.selected_plant_var.get()
+        if not selected_plant or selected_plant == "N/A":
+            return
         
-        label = f"{status.upper()} - {disease_name}"
-        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
+        self.scan_rate.mark_submitted()
         
-        cv2.rectangle(frame, (x1, y1 - label_size[1] - 20), 
-                      (x1 + label_size[0] + 10, y1), color, -1)
+        # Reuse the displayed result while the camera sees the same scene
+        needs_inference, signature = self.scene_gate.check(self.paused_frame, selected_plant)
+        if not needs_inference:
+            return
         
-        cv2.putText(frame, label, (x1 + 5, y1 - 10), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
+        # paused_frame is a fresh array each tick and is never drawn on, so the worker can share it
+        self.pending_signature = signature
+        self.scan_job_id = self.inference_worker.submit(self.paused_frame, selected_plant)
 
-    def draw_scanning_overlay(self, frame):
-        """Draw scanning indicator"""
-        H, W, _ = frame.shape
+    def post_analysis_result(self, job, result, error, latency):
+        """Called on the worker thread: hand the result over to the Tk loop"""
+        self.window.after(0, self.handle_analysis_result, job, result, error, latency)
+
+    def handle_analysis_result(self, job, result, error, latency):
+        """Apply a finished analysis to the UI (runs on the Tk main loop)"""
+        if job.job_id != self.scan_job_id:
+            return # Stale result (scan was cancelled or superseded)
         
-        text = "SCANNING..."
-        text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.5, 3)[0]
-        text_x = int((W - text_size[0]) / 2)
-        text_y = int((H + text_size[1]) / 2)
+        self.is_scanning = False
+        self.scan_rate.record_latency(latency)
+        self.perf.record("analysis.total", latency)
+        self.perf.tick("inference")
         
-        pulse = int((np.sin(time.time() * 10) + 1) * 127.5)
-        color = (255, pulse, 0)
+        if error is not None:
+            print(f"Analysis error: {error}")
+            return
         
-        overlay = frame.copy()
-        cv2.rectangle(overlay, 
-                      (text_x - 20, text_y - text_size[1] - 10), 
-                      (text_x + text_size[0] + 20, text_y + 10), 
-                      (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.4, frame, 0.6, 0, frame)
+        if not self.auto_scan:
+            print(f"✓ Analysis finished in {latency * 1000:.0f} ms")
+        plant_type = job.plant_type
         
-        cv2.putText(frame, text, (text_x, text_y), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, color, 3, cv2.LINE_AA)
-
-    def run_analysis(self, frame, plant_type):
-        """Run CNN analysis on frame, passing the selected plant type"""
-        self.is_scanning = True
-        self.update_results_panel_scanning()
-        self.window.update_idletasks()
+        if self.pending_signature is not None:
+            self.scene_gate.store(self.pending_signature, result, plant_type)
+            self.pending_signature = None
         
-        try:
-            result = al.analyze_frame_with_tf(frame, plant_type) 
-            
-            if result:
-                self.last_analysis_result = result
-                self.current_bbox = result.get('bbox', [250, 200, 750, 700]) 
-                self.update_results_panel(result)
+        if result and self.scan_history:
+            self.scan_history.record(result, plant_type, self.camera_id, job.frame)
+        
+        if result:
+            changed = True
+            if self.auto_scan:
+                # Show the smoothed decision; redraw the panel only when it changes
+                result, changed = self.smoother.update(result, plant_type)
+                self.scan_rate.backoff = min(3.0, 1.0 + 0.5 * self.smoother.stable_updates)
             else:
-                self.last_analysis_result = None
-                # Set a fallback bbox for visual debugging if analysis returns None
-                fallback_info = al.DISEASE_DATABASE.get(f"{plant_type} healthy") or {"bbox": [250, 200, 750, 700]}
-                self.current_bbox = fallback_info["bbox"]
-                
-                # Only show waiting state if still in live mode OR if manually paused and analysis failed
-                if self.is_live or not self.last_analysis_result:
-                    self.show_waiting_state()
-                
-        except Exception as e:
-            print(f"Analysis error: {e}")
-            traceback.print_exc()
-        finally:
-            self.is_scanning = False
+                self.smoother.reset()
+            self.last_analysis_result = result
+            self.current_bbox = result.get('bbox', [250, 200, 750, 700]) 
+            if changed:
+                with self.perf.time("ui.results_panel"):
+                    self.update_results_panel(result)
+                self.set_review_target(job.frame, result, plant_type)
+        else:
+            self.last_analysis_result = None
+            # Set a fallback bbox for visual debugging if analysis returns None
+            fallback_info = al.DISEASE_DATABASE.get(f"{plant_type} healthy") or {"bbox": [250, 200, 750, 700]}
+            self.current_bbox = fallback_info["bbox"]
+            
+            # Only show waiting state if still in live mode OR if manually paused and analysis failed
+            if self.is_live or not self.last_analysis_result:
+                self.show_waiting_state()
 
     def update_results_panel_scanning(self):
         """Update UI to show scanning state"""
@@ -563,34 +852,53 @@ class PlantDetectorApp:
 
     def update_results_panel(self, result):
         """Update the results display with analysis results"""
-        status = result["status"]
-        
-        if status == "Healthy": bg, status_text = PRIMARY_COLOR, f"HEALTH STATUS: {status.upper()} 🥬"
-        elif status == "Diseased": bg, status_text = RED_COLOR, f"HEALTH STATUS: {status.upper()} 🥀"
-        elif status == "Stressed": bg, status_text = YELLOW_COLOR, f"HEALTH STATUS: {status.upper()} ⚠️"
-        else: bg, status_text = WAITING_COLOR, "HEALTH STATUS: UNKNOWN"
+        record = self.knowledge_base.lookup(result) if self.knowledge_base else kb.record_from_result(result)
+        bg = STATUS_BACKGROUNDS.get(record.status, WAITING_COLOR)
         
         self.status_frame.config(bg=bg)
-        self.status_label.config(text=status_text, bg=bg)
+        self.status_label.config(text=record.status_text, bg=bg)
         
-        self.plant_label.config(text=result.get("plant", "N/A"))
-        self.disease_label.config(text=result["disease"])
-        self.type_label.config(text=result.get("type", "N/A"))
+        self.plant_label.config(text=record.plant)
+        self.disease_label.config(text=record.disease)
+        self.type_label.config(text=record.type)
         self.confidence_label.config(text=result["confidence"])
         
-        severity_map = {"none": 0, "mild": 33, "moderate": 66, "severe": 100}
-        self.severity_bar['value'] = severity_map.get(result["severity"].lower(), 0)
+        if record.status == "Healthy":
+            self.severity_bar['value'] = 0
+            self.severity_label.config(text="Healthy: no lesions")
+        elif "lesion_area" in result:
+            self.severity_bar['value'] = result["lesion_area"]
+            self.severity_label.config(text=f"{str(result['severity']).capitalize()}: "
+                                            f"{result['lesion_area']:.1f}% of leaf area affected")
+        else:
+            self.severity_bar['value'] = record.severity_value
+            self.severity_label.config(text=f"{record.severity.capitalize()} (typical for this disease)")
         
-        self.update_text_widget(self.cause_text, [result.get("cause", "• No information available")])
-        self.update_text_widget(self.discoloration_text, [f"• {item}" for item in result.get("discoloration", [])])
-        self.update_text_widget(self.symptoms_text, [f"• {item}" for item in result.get("symptoms", [])])
-        self.update_text_widget(self.recommendations_text, [f"• {item}" for item in result.get("recommendations", [])])
-        self.update_text_widget(self.preventive_text, [f"• {item}" for item in result.get("preventive", [])])
+        self.set_text_widget(self.cause_text, record.cause_text)
+        self.set_text_widget(self.discoloration_text, record.discoloration_text)
+        self.set_text_widget(self.symptoms_text, record.symptoms_text)
+        self.set_text_widget(self.recommendations_text, record.recommendations_text)
+        self.set_text_widget(self.preventive_text, record.preventive_text)
 
     def on_closing(self):
         """Clean up on close (called by window close and Quit button)"""
-        if self.vid and self.vid.isOpened():
-            self.vid.release()
+        if self.inference_worker:
+            self.inference_worker.stop()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        if self.capture:
+            if self.camera_available:
+                m = self.capture.metrics(self.display_reader)
+                print(f"Camera: {m['capture_fps']:.1f} FPS captured, {m['frames_captured']} frames, "
+                      f"{m['dropped_frames']} not displayed, "
+                      f"capture-to-display {m['capture_to_display_ms']:.1f} ms")
+            self.capture.stop()
+        if self.capture_store:
+            self.capture_store.close()
+        if self.scan_history:
+            self.scan_history.close()
+            print(f"Scan history: {self.scan_history.written} scans saved, "
+                  f"{self.scan_history.dropped} dropped")
         self.window.destroy()
 
 # --- Main Program ---
@@ -598,11 +906,68 @@ if __name__ == "__main__":
     print("\n" + "="*70)
     print("PLANT DISEASE DETECTOR - CNN GUI")
     print("="*70)
+    parser = argparse.ArgumentParser(description="Plant Disease Detector GUI")
+    parser.add_argument("--backend", choices=["analysis_logic", *sorted(pc.BACKENDS)], default="keras",
+                        help="Inference backend; 'analysis_logic' uses analyze_frame_with_tf on the whole frame")
+    parser.add_argument("--model", default=None, help="Model file for the chosen backend")
+    parser.add_argument("--student", action="store_true",
+                        help=f"Use the distilled student model ({pc.STUDENT_MODEL_PATH}, see distill.py)")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite/ONNX Runtime inference threads")
+    parser.add_argument("--server", default=None,
+                        help="Thin-client mode: URL of an inference_server.py (e.g. http://192.168.1.20:8765)")
+    parser.add_argument("--source", default="0",
+                        help="Camera index, video file or RTSP URL (see stream_manager.py for several)")
+    parser.add_argument("--hud", action="store_true", help="Show the performance overlay (toggle with F2)")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Periodically dump stage latencies to this .json or .prom file")
+    parser.add_argument("--metrics-interval", type=float, default=5.0)
+    parser.add_argument("--no-localize", action="store_true",
+                        help="Classify the whole frame instead of localized leaf crops")
+    parser.add_argument("--all-classes", action="store_true",
+                        help="Score all classes instead of only the selected plant's")
+    parser.add_argument("--species-heads", default=None,
+                        help="Per-species heads .npz (see species_heads.py; Keras backend only)")
+    parser.add_argument("--embeddings", default=None,
+                        help="Record backbone embeddings of every scan in this store (see embedding_store.py)")
+    parser.add_argument("--capture-dir", default=None,
+                        help="Enable operator review; confirmed/corrected scans are saved here for finetune.py")
+    parser.add_argument("--history-dir", default=None,
+                        help="Keep every scan in this history store (see scan_history.py)")
+    parser.add_argument("--no-severity", action="store_true",
+                        help="Use the disease's typical severity instead of measuring the lesion area")
+    parser.add_argument("--cam", action="store_true",
+                        help="Limit the lesion measurement to the model's activation map (Keras backend only)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the result cache")
+    parser.add_argument("--cache-db", default=None,
+                        help="SQLite file for a result cache that survives restarts")
+    args = parser.parse_args()
+    if args.student and not args.model:
+        if args.backend != "keras":
+            parser.error("--student selects the Keras student; pass --model for an exported student")
+        args.model = pc.STUDENT_MODEL_PATH
+    
     print("\n✓ Starting application...")
     
     try:
+        backend_config = None
+        if args.server:
+            print(f"✓ Thin-client mode: inference on {args.server}")
+        elif args.backend != "analysis_logic":
+            # Keep one core free for the video loop
+            backend_config = {"kind": args.backend, "model_path": args.model,
+                              "num_threads": args.threads or pc.default_num_threads(reserve=1),
+                              "localize": not args.no_localize,
+                              "cache": not args.no_cache, "cache_db": args.cache_db,
+                              "restrict_species": not args.all_classes,
+                              "species_heads": args.species_heads, "embeddings": args.embeddings,
+                              "severity": not args.no_severity, "cam": args.cam}
+            print(f"✓ Using {args.backend} inference backend")
+        
         root = tk.Tk()
-        app = PlantDetectorApp(root, "🌿 Plant Disease Detector (CNN)")
+        app = PlantDetectorApp(root, "🌿 Plant Disease Detector (CNN)", backend_config,
+                               parse_source(args.source), args.server,
+                               args.hud, args.metrics_file, args.metrics_interval, args.capture_dir,
+                               args.history_dir)
         root.mainloop()
     except Exception as e:
         print(f"\n❌ Fatal error: {e}")
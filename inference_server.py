@@ -0,0 +1,207 @@
+"""Local HTTP inference server with request micro-batching, plus its client.
+
+Start the server on the machine that has the model:
+    python inference_server.py --host 0.0.0.0 --port 8765 --backend tflite
+
+and point the GUI on a field laptop at it (no TensorFlow needed there):
+    python "gui_detector (1).py" --server http://192.168.1.20:8765
+
+Endpoints:
+    GET  /health                      backend info and plant types
+    POST /analyze?plant_type=Tomato   body: JPEG/PNG bytes (Content-Type image/*)
+                                      or a raw BGR uint8 frame (application/octet-stream
+                                      with an "X-Frame-Shape: H,W,3" header)
+
+/analyze returns the same result dict the GUI renders in update_results_panel.
+Concurrent requests are merged into shared forward passes by a DynamicBatcher.
+"""
+import argparse
+import json
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+import knowledge_base
+import plant_classifier as pc
+import result_cache
+from batch_engine import DynamicBatcher
+
+DEFAULT_PORT = 8765
+
+
+def decode_frame(body, content_type, shape_header=None):
+    """Request body -> BGR uint8 frame (None if it cannot be decoded)"""
+    if content_type.startswith("application/octet-stream"):
+        try:
+            shape = tuple(int(v) for v in shape_header.split(","))
+            return np.frombuffer(body, dtype=np.uint8).reshape(shape)
+        except (AttributeError, ValueError):
+            return None
+    return cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class InferenceService:
+    """The model, the shared batcher and the plant type list behind the server"""
+
+    def __init__(self, analyzer, plant_types, max_batch_size=16, max_wait=0.01):
+        self.analyzer = analyzer
+        self.plant_types = plant_types
+        self.batcher = DynamicBatcher(analyzer.backend.predict_batch, max_batch_size, max_wait)
+        self.requests_served = 0
+
+    def analyze(self, frame, plant_type=None):
+        # Preprocessing runs on the request thread; only the forward pass is shared
+        boxes, batch = self.analyzer.prepare(frame)
+        probs = self.analyzer.predict(batch, lambda rows: self.batcher.submit(rows).result(timeout=60))
+        probs, species = self.analyzer.restrict(probs, plant_type)
+        self.requests_served += 1
+        return self.analyzer.finish(boxes, probs, species, batch)
+
+    def health(self):
+        return {
+            "status": "ok",
+            "backend": self.analyzer.backend.name,
+            "plant_types": self.plant_types,
+            "requests_served": self.requests_served,
+            "engine": self.batcher.metrics(),
+            "cache": self.analyzer.cache.stats() if self.analyzer.cache else None,
+        }
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    service = None 	# Set by serve()
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).path == "/health":
+            self._send_json(200, self.service.health())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/analyze":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        frame = decode_frame(body, self.headers.get("Content-Type", ""), self.headers.get("X-Frame-Shape"))
+        if frame is None:
+            self._send_json(400, {"error": "could not decode image"})
+            return
+
+        plant_type = urllib.parse.parse_qs(url.query).get("plant_type", [None])[0]
+        try:
+            result = self.service.analyze(frame, plant_type)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        pass # Keep the console quiet; /health has the counters
+
+
+class RemoteAnalyzer:
+    """Thin client: same analyze(frame, plant_type) call as FrameAnalyzer, run on a server"""
+
+    def __init__(self, url, jpeg_quality=90, timeout=30):
+        self.url = url.rstrip("/")
+        self.jpeg_quality = jpeg_quality
+        self.timeout = timeout
+
+    def health(self):
+        with urllib.request.urlopen(f"{self.url}/health", timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def analyze(self, frame, plant_type=None):
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError("Could not JPEG-encode frame")
+
+        query = urllib.parse.urlencode({"plant_type": plant_type}) if plant_type else ""
+        request = urllib.request.Request(f"{self.url}/analyze?{query}", data=encoded.tobytes(),
+                                         headers={"Content-Type": "image/jpeg"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+def load_plant_types(class_names):
+    """(plant types, DISEASE_DATABASE), without loading analysis_logic's model when possible.
+
+    DISEASE_DATABASE is read from analysis_logic.py's source and resolved
+    through knowledge_base (the artifact when current). Only when that is
+    not possible is analysis_logic imported, which loads a second model; if
+    that fails too, results carry no disease details.
+    """
+    plants = sorted(pc.species_index(class_names))
+    knowledge = knowledge_base.read_disease_database()
+    if knowledge is not None:
+        for name in knowledge_base.load_or_compile(class_names, knowledge).missing:
+            print(f"⚠ No DISEASE_DATABASE entry for {name}")
+        return plants, knowledge
+    try:
+        import analysis_logic as al
+        return list(al.PLANT_TYPES), al.DISEASE_DATABASE
+    except Exception as e:
+        print(f"⚠ Could not load DISEASE_DATABASE from analysis_logic ({e}); results carry no disease details")
+        return plants, None
+
+
+def serve(args):
+    class_names = pc.load_class_names(args.class_names)
+    plant_types, knowledge = load_plant_types(class_names)
+    backend = pc.load_backend(args.backend, args.model, args.threads)
+    cache = None
+    if not args.no_cache:
+        cache = result_cache.open_cache(backend, args.class_names, args.cache_db)
+    analyzer = pc.FrameAnalyzer(backend, class_names, knowledge, localize=not args.no_localize, cache=cache)
+
+    InferenceRequestHandler.service = InferenceService(analyzer, plant_types, args.max_batch_size,
+                                                       args.max_wait_ms / 1000.0)
+    server = ThreadingHTTPServer((args.host, args.port), InferenceRequestHandler)
+    server.daemon_threads = True
+    print(f"✓ Inference server ({backend.name}) listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        InferenceRequestHandler.service.batcher.stop()
+        if cache:
+            cache.close()
+        print("\n✓ Server stopped")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve the plant disease classifier over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--backend", choices=sorted(pc.BACKENDS))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--no-localize", action="store_true")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the result cache")
+    parser.add_argument("--cache-db", default=None,
+                        help="SQLite file for a result cache that survives restarts")
+    return parser
+
+
+if __name__ == "__main__":
+    serve(build_parser().parse_args())
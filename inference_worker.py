@@ -0,0 +1,168 @@
+import os
+import queue
+import threading
+import time
+import traceback
+
+
+class InferenceJob:
+    """A single frame waiting to be classified"""
+
+    def __init__(self, job_id, frame, plant_type):
+        self.job_id = job_id
+        self.frame = frame
+        self.plant_type = plant_type
+        self.submitted_at = time.perf_counter()
+
+
+class InferenceWorker:
+    """Runs the CNN analysis on a background thread.
+
+    Frames are handed over through a small bounded queue. When the model falls
+    behind, the oldest pending frame is dropped so only the freshest frame is
+    ever classified. Results are handed to ``on_result(job, result, error,
+    latency)`` from the worker thread; the GUI wraps it in ``window.after`` so
+    all widget updates happen on the Tk main loop.
+    """
+
+    def __init__(self, analyze_fn, on_result, max_pending=1):
+        self.analyze_fn = analyze_fn
+        self.on_result = on_result
+        self.jobs = queue.Queue(maxsize=max_pending)
+
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.last_latency = None
+        self.busy = False
+
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="InferenceWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, plant_type):
+        """Queue a frame for analysis, replacing any stale pending frame"""
+        with self._lock:
+            if not self._running:
+                return None
+            self._next_id += 1
+            job = InferenceJob(self._next_id, frame, plant_type)
+            self.submitted += 1
+
+            while True:
+                try:
+                    self.jobs.put_nowait(job)
+                    break
+                except queue.Full:
+                    try:
+                        self.jobs.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        return job.job_id
+
+    def _run(self):
+        """Worker loop: classify frames until stopped"""
+        while self._running:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            self.busy = True
+            result, error = None, None
+            start = time.perf_counter()
+            try:
+                result = self.analyze_fn(job.frame, job.plant_type)
+            except Exception as e:
+                error = e
+                traceback.print_exc()
+            latency = time.perf_counter() - start
+
+            self.last_latency = latency
+            self.completed += 1
+            self.busy = False
+
+            try:
+                self.on_result(job, result, error, latency)
+            except Exception as e:
+                # The Tk window may already be gone during shutdown
+                print(f"⚠ Could not deliver analysis result: {e}")
+
+    def stop(self, timeout=2.0):
+        """Stop the worker thread, discarding any pending frame"""
+        with self._lock:
+            self._running = False
+            while True:
+                try:
+                    self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+            self.jobs.put_nowait(None)
+        self._thread.join(timeout)
+
+
+class AdaptiveScanRate:
+    """Paces continuous (auto) scanning from measured model latency and CPU load.
+
+    The scan interval starts at ``1 / target_fps``. It is stretched so the model
+    never uses more than ``max_duty`` of the wall clock (leaving the rest for
+    the display loop), and stretched further when the system load average
+    is above ``max_load`` per core. ``backoff`` (set from the temporal
+    smoother) stretches it while the displayed decision is stable.
+    """
+
+    def __init__(self, target_fps=2.0, max_duty=0.5, max_load=0.85,
+                 min_interval=0.1, max_interval=5.0):
+        self.target_fps = target_fps
+        self.max_duty = max_duty
+        self.max_load = max_load
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self.avg_latency = None
+        self.cpu_load = None
+        self.interval = self._clamp(1.0 / target_fps)
+        self.backoff = 1.0
+        self.next_due = 0.0
+
+    def _clamp(self, interval):
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _read_cpu_load(self):
+        """1-minute load average per core, or None where unsupported (Windows)"""
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return None
+
+    def record_latency(self, latency):
+        """Feed back the duration of a finished inference and re-plan the rate"""
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = 0.7 * self.avg_latency + 0.3 * latency
+
+        interval = max(1.0 / self.target_fps, self.avg_latency / self.max_duty)
+
+        self.cpu_load = self._read_cpu_load()
+        if self.cpu_load is not None and self.cpu_load > self.max_load:
+            interval *= self.cpu_load / self.max_load
+
+        self.interval = self._clamp(interval)
+
+    def due(self, busy=False, now=None):
+        """True when a new frame should be sent for analysis"""
+        if busy:
+            return False
+        now = time.perf_counter() if now is None else now
+        return now >= self.next_due
+
+    def mark_submitted(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self.next_due = now + self._clamp(self.interval * self.backoff)
+
+    @property
+    def effective_fps(self):
+        return 1.0 / self.interval
@@ -0,0 +1,221 @@
+"""Compiled disease knowledge base: class index -> display-ready record.
+
+analysis_logic.DISEASE_DATABASE is keyed by "<plant> <disease>" strings while
+class_names.json uses the training folder names ("Apple___Apple_scab"). This
+module resolves that mapping once, pre-formats every text block and the
+severity bar value, and validates the result against class_names.json, so
+rendering a result is a list index instead of string matching.
+
+Build the artifact offline (optional; the GUI compiles it at startup otherwise):
+    python knowledge_base.py --output knowledge_base.json
+
+Importing analysis_logic loads its own copy of the model, so next to a local
+backend DISEASE_DATABASE is read from analysis_logic.py's source instead
+(read_disease_database) when it is a plain literal.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+
+import plant_classifier as pc
+
+KNOWLEDGE_BASE_PATH = "knowledge_base.json"
+ANALYSIS_LOGIC_PATH = "analysis_logic.py"
+
+SEVERITY_VALUES = {"none": 0, "mild": 33, "moderate": 66, "severe": 100}
+STATUS_TEXT = {
+    "Healthy": "HEALTH STATUS: HEALTHY 🥬",
+    "Diseased": "HEALTH STATUS: DISEASED 🥀",
+    "Stressed": "HEALTH STATUS: STRESSED ⚠️",
+}
+LIST_FIELDS = ("discoloration", "symptoms", "recommendations", "preventive")
+EMPTY_BLOCK = "• No data available\n"
+
+
+def format_block(items):
+    """List of strings -> bulleted text block for a Text widget"""
+    if not items:
+        return EMPTY_BLOCK
+    return "".join(f"• {item}\n" for item in items)
+
+
+def digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class DiseaseRecord:
+    """Everything update_results_panel shows for one class, already formatted"""
+
+    __slots__ = ("class_index", "class_name", "plant", "disease", "type", "status", "status_text",
+                 "severity", "severity_value", "cause_text", "discoloration_text", "symptoms_text",
+                 "recommendations_text", "preventive_text", "bbox", "has_info")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def record_from_result(result, class_index=-1, has_info=True):
+    """Build a DiseaseRecord from a result dict (also the slow path for results without class_index)"""
+    status = result.get("status", "Unknown")
+    severity = str(result.get("severity", "none")).lower()
+    cause = result.get("cause")
+    fields = {
+        "class_index": class_index,
+        "class_name": result.get("class_name", ""),
+        "plant": result.get("plant", "N/A"),
+        "disease": result.get("disease", "N/A"),
+        "type": result.get("type", "N/A"),
+        "status": status,
+        "status_text": STATUS_TEXT.get(status, "HEALTH STATUS: UNKNOWN"),
+        "severity": severity,
+        "severity_value": SEVERITY_VALUES.get(severity, 0),
+        "cause_text": f"{cause}\n" if cause else "• No information available\n",
+        "bbox": result.get("bbox"),
+        "has_info": has_info,
+    }
+    for name in LIST_FIELDS:
+        fields[f"{name}_text"] = format_block(result.get(name, []))
+    return DiseaseRecord(**fields)
+
+
+class KnowledgeBase:
+    """Records indexed by model output index, plus the validation report"""
+
+    def __init__(self, class_names, records, knowledge_digest=None):
+        if len(records) != len(class_names):
+            raise ValueError(f"Knowledge base has {len(records)} records for {len(class_names)} classes")
+        for i, (name, record) in enumerate(zip(class_names, records)):
+            if record.class_index != i or record.class_name != name:
+                raise ValueError(f"Knowledge base record {i} is '{record.class_name}', "
+                                 f"class_names.json has '{name}'")
+        self.class_names = list(class_names)
+        self.records = records
+        self.knowledge_digest = knowledge_digest
+
+    @property
+    def missing(self):
+        """Diseased classes with no knowledge entry (rendered with placeholders)"""
+        return [r.class_name for r in self.records if not r.has_info and r.status != "Healthy"]
+
+    def lookup(self, result):
+        """The record for a result dict: O(1) by class_index, formatted on the fly otherwise"""
+        index = result.get("class_index")
+        if index is not None and 0 <= index < len(self.records):
+            return self.records[index]
+        return record_from_result(result)
+
+    def save(self, path=KNOWLEDGE_BASE_PATH):
+        data = {"class_names_sha256": digest(self.class_names),
+                "knowledge_sha256": self.knowledge_digest,
+                "class_names": self.class_names,
+                "records": [r.to_dict() for r in self.records]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def compile_knowledge_base(class_names, knowledge=None):
+    """Resolve every class against the disease database and format its record"""
+    records = []
+    for i, name in enumerate(class_names):
+        result = pc.build_result(name, 0.0, knowledge)
+        has_info = any(field in result for field in ("cause", *LIST_FIELDS))
+        records.append(record_from_result(result, i, has_info))
+    return KnowledgeBase(class_names, records, digest(knowledge or {}))
+
+
+def load_knowledge_base(path, class_names, knowledge=None):
+    """Load a compiled artifact.
+
+    Raises ValueError if it was built for other class names or, when
+    ``knowledge`` is given, from a different disease database.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("class_names_sha256") != digest(list(class_names)):
+        raise ValueError(f"{path} was compiled for a different class_names.json")
+    if knowledge is not None and data.get("knowledge_sha256") != digest(knowledge):
+        raise ValueError(f"{path} is out of date with DISEASE_DATABASE")
+    return KnowledgeBase(class_names, [DiseaseRecord(**r) for r in data["records"]],
+                         data.get("knowledge_sha256"))
+
+
+def load_or_compile(class_names, knowledge=None, path=KNOWLEDGE_BASE_PATH):
+    """The offline artifact when it is current, else compile in memory"""
+    if path and os.path.exists(path):
+        try:
+            return load_knowledge_base(path, class_names, knowledge)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠ Ignoring {path}: {e}")
+    return compile_knowledge_base(class_names, knowledge)
+
+
+def read_disease_database(path=ANALYSIS_LOGIC_PATH):
+    """DISEASE_DATABASE parsed from analysis_logic.py without running it; None if missing or not a literal"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+    value = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == "DISEASE_DATABASE" for t in targets):
+            value = node.value
+    if value is None:
+        return None
+    try:
+        knowledge = ast.literal_eval(value)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return knowledge if isinstance(knowledge, dict) else None
+
+
+def load_without_model(class_names, knowledge=None, path=KNOWLEDGE_BASE_PATH):
+    """Knowledge base that needs no analysis_logic import, or None.
+
+    With ``knowledge`` (see read_disease_database) the artifact is used when
+    it is current and compiled in memory otherwise; without it only a
+    matching artifact will do.
+    """
+    if knowledge is not None:
+        return load_or_compile(class_names, knowledge, path)
+    if not (path and os.path.exists(path)):
+        return None
+    try:
+        return load_knowledge_base(path, class_names)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠ Ignoring {path}: {e}")
+        return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compile the disease knowledge base for class_names.json")
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--output", default=KNOWLEDGE_BASE_PATH)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    knowledge = read_disease_database()
+    if knowledge is None:
+        import analysis_logic as al
+        knowledge = al.DISEASE_DATABASE
+
+    class_names = pc.load_class_names(args.class_names)
+    kb = compile_knowledge_base(class_names, knowledge)
+    kb.save(args.output)
+    print(f"✓ Compiled {len(kb.records)} records to {args.output}")
+    for name in kb.missing:
+        print(f"⚠ No DISEASE_DATABASE entry for {name}")
@@ -0,0 +1,60 @@
+import cv2
+
+FULL_FRAME_BBOX = [0, 0, 1000, 1000]
+
+# HSV range (OpenCV hue is 0-179) covering green through yellow leaf tissue
+LEAF_HSV_LOW = (18, 40, 35)
+LEAF_HSV_HIGH = (95, 255, 255)
+
+
+def leaf_mask(frame, work_width=320):
+    """Binary leaf mask of a BGR frame, computed on a downscaled copy.
+
+    Lesions inside a leaf are usually brown rather than green, so the mask is
+    closed morphologically to fill them in.
+    """
+    h, w = frame.shape[:2]
+    scale = min(1.0, work_width / w)
+    small = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                       interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, LEAF_HSV_LOW, LEAF_HSV_HIGH)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+    return mask
+
+
+def find_leaf_boxes(frame, min_area_ratio=0.02, max_regions=4, pad=0.08):
+    """Leaf bounding boxes, normalized to 0-1000 like the GUI's bbox, largest first"""
+    mask = leaf_mask(frame)
+    mh, mw = mask.shape
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = min_area_ratio * mh * mw
+    regions = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < min_area:
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        # A little context around the leaf helps the classifier
+        px, py = int(w * pad), int(h * pad)
+        x1, y1 = max(0, x - px), max(0, y - py)
+        x2, y2 = min(mw, x + w + px), min(mh, y + h + py)
+        bbox = [int(x1 * 1000 / mw), int(y1 * 1000 / mh), int(x2 * 1000 / mw), int(y2 * 1000 / mh)]
+        regions.append((area, bbox))
+
+    regions.sort(key=lambda r: r[0], reverse=True)
+    return [bbox for _, bbox in regions[:max_regions]]
+
+
+def crop(frame, bbox_normalized):
+    """View of the frame inside a 0-1000 normalized bbox (no copy)"""
+    H, W = frame.shape[:2]
+    x1 = int(bbox_normalized[0] * W / 1000)
+    y1 = int(bbox_normalized[1] * H / 1000)
+    x2 = max(x1 + 1, int(bbox_normalized[2] * W / 1000))
+    y2 = max(y1 + 1, int(bbox_normalized[3] * H / 1000))
+    return frame[y1:y2, x1:x2]
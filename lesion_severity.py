@@ -0,0 +1,104 @@
+"""Lesion-area severity of classified leaf crops.
+
+The severity shown in the GUI used to be a fixed value per disease. Here it
+is measured on every classified crop (the model input, RGB float32 224x224):
+HSV colour masks separate green tissue from chlorotic (yellow) and necrotic
+(brown/dark) tissue, the leaf outline is filled so lesions inside it count,
+and the affected share of the leaf area is mapped to a severity stage.
+
+An optional class activation map (KerasBackend.class_activation_maps,
+computed from the same forward pass) limits lesions to the part of the leaf
+the classifier looked at, which drops shadows and soil inside the outline.
+The colour masks run on the whole batch at once; a 224x224 crop takes about
+2 ms on a laptop CPU (``python benchmarks.py`` reports it as severity.crop).
+"""
+import cv2
+import numpy as np
+
+# HSV ranges (OpenCV hue is 0-179)
+GREEN_HUE = (35, 95)
+CHLOROTIC_HUE = (18, 35)
+NECROTIC_HUE_MAX = 18 	# and above 160: reddish brown wraps around
+TISSUE_MIN_SATURATION = 40
+TISSUE_MIN_VALUE = 35
+CHLOROTIC_MIN_VALUE = 80
+DARK_MAX_VALUE = 60 	# Near-black spots inside the leaf count as necrotic
+
+MIN_LEAF_FRACTION = 0.05 	# Leaf outlines smaller than this share of the crop are ignored
+CAM_THRESHOLD = 0.2
+
+# Upper bound of % leaf area affected for each stage (knowledge_base.SEVERITY_VALUES names)
+SEVERITY_STAGES = ((1.0, "none"), (10.0, "mild"), (25.0, "moderate"))
+
+_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (9, 9))
+
+
+def severity_stage(lesion_area):
+    """Severity name for a percentage of leaf area affected"""
+    for limit, stage in SEVERITY_STAGES:
+        if lesion_area < limit:
+            return stage
+    return "severe"
+
+
+def tissue_masks(crops):
+    """(green, chlorotic, necrotic) boolean masks for an (N, H, W, 3) RGB batch"""
+    crops = np.asarray(crops)
+    n, h, w = crops.shape[:3]
+    rgb = np.clip(crops, 0, 255).astype(np.uint8)
+    # One colour conversion for the whole batch: the crops are stacked vertically
+    hsv = cv2.cvtColor(rgb.reshape(n * h, w, 3), cv2.COLOR_RGB2HSV).reshape(n, h, w, 3)
+    hue, sat, val = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+
+    colored = (sat >= TISSUE_MIN_SATURATION) & (val >= TISSUE_MIN_VALUE)
+    green = colored & (hue >= GREEN_HUE[0]) & (hue <= GREEN_HUE[1])
+    chlorotic = colored & (hue >= CHLOROTIC_HUE[0]) & (hue < CHLOROTIC_HUE[1]) & (val >= CHLOROTIC_MIN_VALUE)
+    necrotic = ((colored & ((hue < NECROTIC_HUE_MAX) | (hue > 160)))
+                | (val < DARK_MAX_VALUE)) & ~green & ~chlorotic
+    return green, chlorotic, necrotic
+
+
+def leaf_area(green, chlorotic):
+    """Filled leaf outline (uint8 0/1) around the green and yellow tissue of one crop"""
+    tissue = (green | chlorotic).astype(np.uint8)
+    tissue = cv2.morphologyEx(tissue, cv2.MORPH_CLOSE, _KERNEL, iterations=2)
+    contours, _ = cv2.findContours(tissue, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = MIN_LEAF_FRACTION * tissue.size
+    leaf = np.zeros_like(tissue)
+    cv2.drawContours(leaf, [c for c in contours if cv2.contourArea(c) >= min_area], -1, 1, cv2.FILLED)
+    return leaf
+
+
+def assess_batch(crops, cams=None, cam_threshold=CAM_THRESHOLD):
+    """Lesion measurements for every crop of a batch.
+
+    ``cams`` are optional per-crop activation maps (any resolution, 0-1).
+    Returns [{"lesion_area", "chlorotic_area", "necrotic_area"}, ...] in
+    percent of the leaf area; all zero when no leaf is found.
+    """
+    green, chlorotic, necrotic = tissue_masks(crops)
+    h, w = green.shape[1:3]
+    results = []
+    for i in range(len(green)):
+        leaf = leaf_area(green[i], chlorotic[i]).view(bool)
+        chlorotic_i, necrotic_i = chlorotic[i] & leaf, necrotic[i] & leaf
+        if cams is not None and cams[i] is not None:
+            focus = cv2.resize(np.asarray(cams[i], dtype=np.float32), (w, h),
+                               interpolation=cv2.INTER_LINEAR) >= cam_threshold
+            chlorotic_i, necrotic_i = chlorotic_i & focus, necrotic_i & focus
+
+        leaf_pixels = int(np.count_nonzero(leaf))
+        scale = 100.0 / leaf_pixels if leaf_pixels else 0.0
+        chlorotic_area = np.count_nonzero(chlorotic_i) * scale
+        necrotic_area = np.count_nonzero(necrotic_i) * scale
+        results.append({
+            "lesion_area": round(float(chlorotic_area + necrotic_area), 1),
+            "chlorotic_area": round(float(chlorotic_area), 1),
+            "necrotic_area": round(float(necrotic_area), 1),
+        })
+    return results
+
+
+def assess(crop, cam=None):
+    """Lesion measurements of a single (H, W, 3) RGB crop"""
+    return assess_batch(np.asarray(crop)[np.newaxis], None if cam is None else [cam])[0]
@@ -0,0 +1,136 @@
+import importlib
+import threading
+import time
+import traceback
+from types import SimpleNamespace
+
+import numpy as np
+
+import knowledge_base
+import plant_classifier as pc
+import result_cache
+
+
+class ModelLoader:
+    """Imports analysis_logic, loads the model and warms it up off the Tk thread.
+
+    ``on_done(al, analyze_fn, timings, error)`` is called from the loader
+    thread once everything is ready (or failed). ``timings`` holds the seconds
+    spent in each startup phase: import, model_load and first_inference.
+    When no backend_config is given, analysis_logic loads its own model, so
+    that cost shows up under import.
+
+    For local backends the compiled knowledge base (class index -> display
+    record) is left in ``knowledge_base``; it stays None when results have
+    to be formatted as they arrive (analysis_logic, server mode). Importing
+    analysis_logic loads a second copy of the model, so local backends never
+    do: DISEASE_DATABASE is read from its source or the offline artifact
+    (``python knowledge_base.py``) is used, and ``al`` is a stand-in with the
+    plant types from class_names.json. When neither is available the local
+    backend is dropped and analysis_logic's own model runs instead.
+
+    With ``server_url`` nothing is loaded locally: analysis runs on an
+    inference_server and ``al`` is a stand-in carrying the server's
+    PLANT_TYPES.
+    """
+
+    def __init__(self, on_done, backend_config=None, warmup_shape=(480, 640, 3), server_url=None,
+                 monitor=None):
+        self.on_done = on_done
+        self.monitor = monitor
+        self.backend_config = backend_config
+        self.server_url = server_url
+        self.warmup_shape = warmup_shape
+        self.timings = {}
+        self.knowledge_base = None
+        self.knowledge = {}
+        self._thread = threading.Thread(target=self._run, name="ModelLoader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            analyzer = None
+            if self.server_url:
+                from inference_server import RemoteAnalyzer
+                analyzer = RemoteAnalyzer(self.server_url)
+                # Stand-in for analysis_logic: locally only the plant list is needed
+                al = SimpleNamespace(PLANT_TYPES=analyzer.health()["plant_types"], DISEASE_DATABASE={})
+            elif self.backend_config and self._load_knowledge():
+                plants = sorted(pc.species_index(self.knowledge_base.class_names))
+                al = SimpleNamespace(PLANT_TYPES=plants, DISEASE_DATABASE=self.knowledge)
+            else:
+                if self.backend_config:
+                    print(f"⚠ DISEASE_DATABASE can't be read without importing analysis_logic and there is no "
+                          f"usable {knowledge_base.KNOWLEDGE_BASE_PATH}: using analysis_logic's own model "
+                          f"instead of the {self.backend_config.get('kind') or 'default'} backend "
+                          "(run 'python knowledge_base.py' once to fix this)")
+                    self.backend_config = None
+                al = importlib.import_module("analysis_logic")
+            self.timings["import"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            if self.backend_config and not self.server_url:
+                config = dict(self.backend_config)
+                localize = config.pop("localize", True)
+                use_cache = config.pop("cache", True)
+                cache_db = config.pop("cache_db", None)
+                restrict_species = config.pop("restrict_species", True)
+                heads_path = config.pop("species_heads", None)
+                embeddings_path = config.pop("embeddings", None)
+                severity = config.pop("severity", True)
+                cam = config.pop("cam", False)
+                backend = pc.load_backend(**config)
+                cache = result_cache.open_cache(backend, pc.CLASS_NAMES_PATH, cache_db) if use_cache else None
+                heads = None
+                if heads_path:
+                    from species_heads import SpeciesHeads
+                    heads = SpeciesHeads.load(heads_path, pc.load_class_names())
+                embeddings = None
+                if embeddings_path and hasattr(backend, "features_batch"):
+                    from embedding_store import open_store
+                    embeddings = open_store(embeddings_path, backend)
+                elif embeddings_path:
+                    print(f"⚠ The {backend.name} backend has no separate backbone; embeddings are not recorded")
+                analyzer = pc.FrameAnalyzer(backend, knowledge=al.DISEASE_DATABASE, localize=localize,
+                                            monitor=self.monitor, cache=cache,
+                                            restrict_species=restrict_species, species_heads=heads,
+                                            embeddings=embeddings, severity=severity, cam=cam)
+                for name in self.knowledge_base.missing:
+                    print(f"⚠ No DISEASE_DATABASE entry for {name}")
+            self.timings["model_load"] = time.perf_counter() - start
+            analyze_fn = analyzer.analyze if analyzer else al.analyze_frame_with_tf
+
+            # One dummy forward pass so graph tracing / kernel selection is not paid on the first scan
+            start = time.perf_counter()
+            plant = al.PLANT_TYPES[0] if al.PLANT_TYPES else None
+            # Bypass the result cache (a cached blank frame would skip the warm-up next
+            # launch) and keep the blank frame out of the embedding store
+            bypassed = {}
+            for attr in ("cache", "embeddings"):
+                if getattr(analyzer, attr, None) is not None:
+                    bypassed[attr] = getattr(analyzer, attr)
+                    setattr(analyzer, attr, None)
+            try:
+                analyze_fn(np.zeros(self.warmup_shape, dtype=np.uint8), plant)
+            except Exception as e:
+                print(f"⚠ Model warm-up failed: {e}")
+            finally:
+                for attr, value in bypassed.items():
+                    setattr(analyzer, attr, value)
+            self.timings["first_inference"] = time.perf_counter() - start
+        except Exception as e:
+            traceback.print_exc()
+            self.on_done(None, None, self.timings, e)
+            return
+
+        self.on_done(al, analyze_fn, self.timings, None)
+
+    def _load_knowledge(self):
+        """Knowledge base without importing analysis_logic; True on success"""
+        knowledge = knowledge_base.read_disease_database()
+        self.knowledge_base = knowledge_base.load_without_model(pc.load_class_names(), knowledge)
+        self.knowledge = knowledge or {}
+        return self.knowledge_base is not None
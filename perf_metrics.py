@@ -0,0 +1,131 @@
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class PerfMonitor:
+    """Rolling per-stage latency histograms and event rates for the hot paths.
+
+    ``record``/``time`` append a duration to a bounded deque per stage (cheap
+    enough to call on every frame, from any thread); percentiles are only
+    computed when a snapshot is requested. ``tick`` counts events such as
+    displayed frames or finished inferences to derive a rate.
+    """
+
+    def __init__(self, window=500, rate_window=2.0):
+        self.window = window
+        self.rate_window = rate_window
+        self.stages = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.events = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.counts = collections.Counter()
+
+    def record(self, stage, seconds):
+        self.stages[stage].append(seconds)
+        self.counts[stage] += 1
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def tick(self, name, now=None):
+        self.events[name].append(time.perf_counter() if now is None else now)
+
+    def rate(self, name, now=None):
+        """Events per second over the last ``rate_window`` seconds"""
+        now = time.perf_counter() if now is None else now
+        recent = [t for t in list(self.events[name]) if now - t <= self.rate_window]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / max(recent[-1] - recent[0], 1e-9)
+
+    def snapshot(self):
+        stages = {}
+        for stage, samples in list(self.stages.items()):
+            samples = np.array(list(samples)) * 1000
+            if not len(samples):
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            stages[stage] = {"count": self.counts[stage], "p50_ms": float(p50),
+                             "p95_ms": float(p95), "p99_ms": float(p99)}
+        rates = {name: self.rate(name) for name in list(self.events)}
+        return {"time": time.time(), "stages": stages, "rates": rates}
+
+    def hud_lines(self):
+        """Short text lines for the on-canvas overlay"""
+        snap = self.snapshot()
+        rates = snap["rates"]
+        lines = [f"Display {rates.get('display', 0.0):5.1f} FPS   Inference {rates.get('inference', 0.0):4.1f}/s"]
+        for stage, s in sorted(snap["stages"].items()):
+            lines.append(f"{stage:<20} p50 {s['p50_ms']:7.2f}  p95 {s['p95_ms']:7.2f}  p99 {s['p99_ms']:7.2f} ms")
+        return lines
+
+
+def timed(monitor, stage):
+    """monitor.time(stage), or a no-op when no monitor is attached"""
+    return monitor.time(stage) if monitor is not None else contextlib.nullcontext()
+
+
+def to_prometheus(snapshot, prefix="plant_detector"):
+    """Prometheus text exposition format for a PerfMonitor snapshot"""
+    lines = [f"# TYPE {prefix}_stage_latency_ms summary"]
+    for stage, s in snapshot["stages"].items():
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'{prefix}_stage_latency_ms{{stage="{stage}",quantile="{quantile}"}} {s[key]:.4f}')
+        lines.append(f'{prefix}_stage_latency_ms_count{{stage="{stage}"}} {s["count"]}')
+    lines.append(f"# TYPE {prefix}_rate_per_second gauge")
+    for name, value in snapshot["rates"].items():
+        lines.append(f'{prefix}_rate_per_second{{event="{name}"}} {value:.4f}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Periodically writes PerfMonitor snapshots to a local file.
+
+    A ``.prom`` path gets Prometheus text (for node_exporter's textfile
+    collector), anything else JSON. The file is replaced atomically.
+    """
+
+    def __init__(self, monitor, path, interval=5.0):
+        self.monitor = monitor
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="MetricsExporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def write(self):
+        snapshot = self.monitor.snapshot()
+        if self.path.endswith(".prom"):
+            text = to_prometheus(snapshot)
+        else:
+            text = json.dumps(snapshot, indent=2)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"⚠ Could not write metrics to {self.path}: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(1.0)
+        try:
+            self.write()
+        except OSError:
+            pass
@@ -0,0 +1,462 @@
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import leaf_localizer
+import lesion_severity
+from perf_metrics import timed
+from result_cache import cached_predict
+
+# --- Default Artifacts (same names the Colab training script produces) ---
+MODEL_PATH = "Plant_Disease_Model_Final.h5"
+STUDENT_MODEL_PATH = "Plant_Disease_Model_Student.h5" 	# distill.py
+TFLITE_MODEL_PATH = "Plant_Disease_Model_int8.tflite"
+ONNX_MODEL_PATH = "Plant_Disease_Model_int8.onnx"
+CLASS_NAMES_PATH = "class_names.json"
+INPUT_SIZE = (224, 224)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+def load_class_names(path=CLASS_NAMES_PATH):
+    """Load the label order written by the training script"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data["class_names"]
+    return list(data)
+
+
+def preprocess_frame(frame, size=INPUT_SIZE):
+    """BGR uint8 frame -> RGB float32 model input.
+
+    EfficientNet's preprocess_input is a pass-through (rescaling lives inside
+    the model), so the network expects raw 0-255 RGB values.
+    """
+    resized = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+    return rgb.astype(np.float32)
+
+
+def load_image(path, size=INPUT_SIZE):
+    """Decode and preprocess an image file; returns None if it cannot be read"""
+    frame = cv2.imread(path, cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    return preprocess_frame(frame, size)
+
+
+def find_images(root):
+    """All image files below root, in a stable (sorted) order"""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(dirpath, name))
+    return paths
+
+
+def top_k(probs, class_names, k=3):
+    """[(class_name, probability), ...] for the k most likely classes"""
+    k = min(k, len(probs))
+    indices = np.argpartition(-probs, k - 1)[:k]
+    indices = indices[np.argsort(-probs[indices])]
+    return [(class_names[i], float(probs[i])) for i in indices]
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class KerasBackend:
+    """Runs the trained Keras .h5 model (TensorFlow is imported lazily).
+
+    Besides the full model, inference can be split into the backbone
+    (``features_batch``: pooled 1280-d embedding) and the Dense head
+    (``head_batch``), so embeddings can be stored and re-scored later.
+    ``conv_features_batch`` also returns the last backbone feature maps, from
+    which ``class_activation_maps`` are computed without another pass.
+    """
+
+    name = "keras"
+
+    def __init__(self, model_path=MODEL_PATH):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        self.input_size = tuple(self.model.input_shape[1:3][::-1])
+        self.num_classes = self.model.output_shape[-1]
+        self.feature_model = None
+        self.cam_model = None
+        self.kernel, self.bias = self.head_weights()
+        self.embedding_dim = self.kernel.shape[0]
+
+    def predict_batch(self, batch):
+        """float32 (N, H, W, 3) batch -> (N, num_classes) probabilities"""
+        return np.asarray(self.model(batch, training=False))
+
+    def features_batch(self, batch):
+        """Pooled backbone features: the input of the final Dense classifier"""
+        if self.feature_model is None:
+            import tensorflow as tf
+            self.feature_model = tf.keras.Model(self.model.input, self.model.layers[-2].output)
+        return np.asarray(self.feature_model(batch, training=False))
+
+    def conv_features_batch(self, batch):
+        """(last backbone feature maps, pooled features) from one forward pass"""
+        if self.cam_model is None:
+            import tensorflow as tf
+            layers = self.model.layers
+            base = next(layer for layer in layers if isinstance(layer, tf.keras.Model))
+            inputs = tf.keras.Input(self.model.input_shape[1:])
+            conv = x = base(inputs, training=False)
+            for layer in layers[layers.index(base) + 1:-1]:
+                x = layer(x)
+            self.cam_model = tf.keras.Model(inputs, [conv, x])
+        conv, features = self.cam_model(batch, training=False)
+        return np.asarray(conv), np.asarray(features)
+
+    def class_activation_maps(self, conv, class_indices):
+        """(N, h, w) activation maps in 0-1, one per feature map and class index.
+
+        Pooling and BatchNorm are linear per channel, so the Dense kernel
+        scaled by the BatchNorm factors weights the feature map channels.
+        """
+        import tensorflow as tf
+        bn = next(layer for layer in self.model.layers if isinstance(layer, tf.keras.layers.BatchNormalization))
+        gamma, _, _, variance = bn.get_weights()
+        weights = self.kernel[:, class_indices] * (gamma / np.sqrt(variance + bn.epsilon))[:, None]
+        maps = np.maximum(np.einsum("nhwc,cn->nhw", conv, weights), 0.0)
+        return maps / np.maximum(maps.max(axis=(1, 2), keepdims=True), 1e-12)
+
+    def head_weights(self):
+        """(kernel, bias) of the final softmax Dense layer"""
+        return self.model.layers[-1].get_weights()
+
+    def head_batch(self, features):
+        """Embeddings -> probabilities (the Dense head, without the backbone)"""
+        return softmax(features @ self.kernel + self.bias)
+
+
+def default_num_threads(reserve=0):
+    """Inference threads: all cores minus the ones reserved (e.g. for the GUI)"""
+    return max(1, (os.cpu_count() or 1) - reserve)
+
+
+class TFLiteBackend:
+    """Runs an exported (optionally int8-quantized) .tflite model"""
+
+    name = "tflite"
+
+    def __init__(self, model_path=TFLITE_MODEL_PATH, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path,
+                                       num_threads=num_threads or default_num_threads())
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.input_size = (int(self.input["shape"][2]), int(self.input["shape"][1]))
+        self.num_classes = int(self.output["shape"][-1])
+        self.batch_size = int(self.input["shape"][0])
+
+    def predict_batch(self, batch):
+        if len(batch) != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input["index"], [len(batch), *self.input["shape"][1:]])
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+            self.batch_size = len(batch)
+
+        # Fully-integer models take quantized input and return quantized scores
+        if self.input["dtype"] != np.float32:
+            scale, zero_point = self.input["quantization"]
+            batch = np.round(batch / scale + zero_point)
+            info = np.iinfo(self.input["dtype"])
+            batch = np.clip(batch, info.min, info.max).astype(self.input["dtype"])
+
+        self.interpreter.set_tensor(self.input["index"], batch)
+        self.interpreter.invoke()
+        probs = self.interpreter.get_tensor(self.output["index"])
+
+        if self.output["dtype"] != np.float32:
+            scale, zero_point = self.output["quantization"]
+            probs = (probs.astype(np.float32) - zero_point) * scale
+        return probs
+
+
+class OnnxBackend:
+    """Runs an exported .onnx model with ONNX Runtime"""
+
+    name = "onnx"
+
+    def __init__(self, model_path=ONNX_MODEL_PATH, num_threads=None):
+        import onnxruntime as ort
+
+        self.model_path = model_path
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or default_num_threads()
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size = (int(model_input.shape[2]), int(model_input.shape[1]))
+        self.num_classes = int(self.session.get_outputs()[0].shape[-1])
+
+    def predict_batch(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+BACKENDS = {"keras": KerasBackend, "tflite": TFLiteBackend, "onnx": OnnxBackend}
+
+
+def load_backend(kind=None, model_path=None, num_threads=None):
+    """Create an inference backend.
+
+    ``kind`` is one of BACKENDS; when omitted it is inferred from the model
+    file extension. Every backend exposes ``predict_batch``, ``input_size``,
+    ``num_classes`` and ``model_path``.
+    """
+    if kind is None:
+        ext = os.path.splitext(model_path or MODEL_PATH)[1].lower()
+        kind = {".tflite": "tflite", ".onnx": "onnx"}.get(ext, "keras")
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown backend '{kind}' (choose from {', '.join(BACKENDS)})")
+
+    backend_cls = BACKENDS[kind]
+    if kind == "keras":
+        return backend_cls(model_path or MODEL_PATH)
+    default_path = TFLITE_MODEL_PATH if kind == "tflite" else ONNX_MODEL_PATH
+    return backend_cls(model_path or default_path, num_threads=num_threads)
+
+
+def split_class_name(class_name):
+    """'Corn_(maize)___Common_rust_' -> ('Corn (maize)', 'Common rust')"""
+    plant, _, disease = class_name.partition("___")
+    plant = plant.replace("_", " ").strip()
+    disease = disease.replace("_", " ").strip()
+    return plant, disease
+
+
+def build_result(class_name, confidence, knowledge=None):
+    """Result dict in the shape the GUI renders in update_results_panel.
+
+    ``knowledge`` is an optional disease database (e.g. al.DISEASE_DATABASE)
+    keyed by "<plant> <disease>"; its fields (cause, symptoms, ...) are merged
+    into the result.
+    """
+    plant, disease = split_class_name(class_name)
+    healthy = disease.lower() == "healthy"
+
+    info = {}
+    if knowledge:
+        info = (knowledge.get(f"{plant} {disease}") or knowledge.get(f"{plant} {disease.lower()}")
+                or knowledge.get(class_name) or {})
+
+    result = dict(info)
+    result.update({
+        "plant": plant,
+        "disease": info.get("disease", "Healthy" if healthy else disease),
+        "status": info.get("status", "Healthy" if healthy else "Diseased"),
+        "severity": info.get("severity", "none" if healthy else "moderate"),
+        "confidence": f"{confidence * 100:.2f}%",
+        "class_name": class_name,
+    })
+    return result
+
+
+def species_key(name):
+    """Loose species name for matching: 'Corn (maize)' / 'Pepper, bell' / 'corn' -> 'corn'"""
+    return name.split("(")[0].split(",")[0].strip().lower()
+
+
+def species_index(class_names):
+    """{plant: array of class columns} in class_names order"""
+    index = {}
+    for i, name in enumerate(class_names):
+        index.setdefault(split_class_name(name)[0], []).append(i)
+    return {plant: np.array(columns) for plant, columns in index.items()}
+
+
+def restrict_probs(probs, columns):
+    """Renormalize softmax outputs over a subset of classes.
+
+    Identical to a softmax over just those logits, since the shared
+    normalizer cancels out.
+    """
+    subset = probs[:, columns]
+    return subset / np.maximum(subset.sum(axis=1, keepdims=True), 1e-12)
+
+
+class FrameAnalyzer:
+    """Frame-level analysis on top of any backend.
+
+    ``analyze(frame, plant_type)`` has the same signature and return shape as
+    analysis_logic.analyze_frame_with_tf, so the GUI can use either. With
+    ``localize`` enabled, leaf regions are found first and all crops are
+    classified together in one forward pass; the result describes the largest
+    leaf and lists every leaf under "regions". An optional
+    result_cache.ResultCache skips the forward pass for crops already seen.
+
+    With ``restrict_species``, a known ``plant_type`` limits the result to
+    that plant's classes. ``species_heads`` (see species_heads.py) replaces
+    the shared classifier by a per-species head on the backbone features
+    when the backend exposes them. With an ``embeddings`` store
+    (embedding_store.EmbeddingStore), the backbone and head run as separate
+    stages and every crop's embedding is saved for later re-scoring.
+
+    With ``severity``, every region gets its measured lesion area
+    (lesion_severity.py) and a severity stage derived from it; ``cam`` also
+    uses the class activation map of a Keras backend for that measurement.
+    """
+
+    def __init__(self, backend, class_names=None, knowledge=None, localize=True, max_regions=4,
+                 predict_fn=None, monitor=None, cache=None, restrict_species=True, species_heads=None,
+                 embeddings=None, severity=True, cam=False):
+        self.backend = backend
+        self.class_names = class_names or load_class_names()
+        self.knowledge = knowledge
+        # Knowledge lookups resolved once per class, not per result
+        self.base_results = [build_result(name, 0.0, knowledge) for name in self.class_names]
+        self.restrict_species = restrict_species
+        self.species_heads = species_heads
+        self.species_columns = species_index(self.class_names)
+        self.species_names = {plant: [self.class_names[i] for i in columns]
+                              for plant, columns in self.species_columns.items()}
+        self._species_lookup = {species_key(plant): plant for plant in self.species_columns}
+        self.localize = localize
+        self.max_regions = max_regions
+        # e.g. a shared DynamicBatcher.predict instead of calling the backend directly
+        self.predict_fn = predict_fn or backend.predict_batch
+        self.monitor = monitor 	# Optional perf_metrics.PerfMonitor
+        self.cache = cache
+        self.embeddings = embeddings
+        self.severity = severity
+        self.cam = cam and hasattr(backend, "conv_features_batch")
+
+    def species_for(self, plant_type):
+        """The class_names plant matching a GUI plant type, or None (no restriction)"""
+        if not self.restrict_species or not plant_type:
+            return None
+        if plant_type in self.species_columns:
+            return plant_type
+        return self._species_lookup.get(species_key(plant_type))
+
+    def restrict(self, probs, plant_type=None):
+        """(probs, species) with probs renormalized over the species' classes"""
+        species = self.species_for(plant_type)
+        if species is None:
+            return probs, None
+        return restrict_probs(probs, self.species_columns[species]), species
+
+    def result_from_probs(self, probs, species=None):
+        """Result dict; with ``species``, probs cover only that species' classes"""
+        local = int(np.argmax(probs))
+        if species is None:
+            idx, names = local, self.class_names
+        else:
+            idx, names = int(self.species_columns[species][local]), self.species_names[species]
+        result = dict(self.base_results[idx])
+        result["confidence"] = f"{float(probs[local]) * 100:.2f}%"
+        result["class_index"] = idx
+        result["top_k"] = top_k(probs, names, 3)
+        return result
+
+    def prepare(self, frame):
+        """Find leaf regions and build the model input batch: (boxes, batch)"""
+        boxes = []
+        if self.localize:
+            boxes = leaf_localizer.find_leaf_boxes(frame, max_regions=self.max_regions)
+        if not boxes:
+            boxes = [leaf_localizer.FULL_FRAME_BBOX]
+
+        batch = np.stack([preprocess_frame(leaf_localizer.crop(frame, bbox), self.backend.input_size)
+                          for bbox in boxes])
+        return boxes, batch
+
+    def predict(self, batch, predict_fn=None):
+        """Forward pass for the crops that are not in the result cache"""
+        return cached_predict(self.cache, predict_fn or self.predict_fn, batch)
+
+    def forward(self, batch, plant_type=None):
+        """(probs, species, conv_maps) for a prepared batch, restricted to plant_type's classes.
+
+        ``conv_maps`` (for class activation maps) is None unless ``cam`` is on.
+        """
+        species = self.species_for(plant_type)
+        use_head = species is not None and self.species_heads is not None and species in self.species_heads
+        if not hasattr(self.backend, "features_batch") or not (use_head or self.embeddings is not None
+                                                               or self.cam):
+            probs, species = self.restrict(self.predict(batch), plant_type)
+            return probs, species, None
+
+        conv = None
+        if self.cam:
+            conv, features = self.backend.conv_features_batch(batch)
+        else:
+            features = self.backend.features_batch(batch)
+        if use_head:
+            probs = self.species_heads.predict(species, features)
+        else:
+            probs, species = self.restrict(self.backend.head_batch(features), plant_type)
+        if self.embeddings is not None:
+            self.record_embeddings(features, probs, species, plant_type)
+        return probs, species, conv
+
+    def record_embeddings(self, features, probs, species, plant_type):
+        indices = np.argmax(probs, axis=1)
+        if species is not None:
+            indices = self.species_columns[species][indices]
+        now = time.time()
+        self.embeddings.add(features, [{"source": "frame", "time": now, "plant_type": plant_type,
+                                        "region": i, "class_name": self.class_names[idx]}
+                                       for i, idx in enumerate(indices)])
+
+    def finish(self, boxes, probs, species=None, crops=None, conv=None):
+        """Turn per-region probabilities into the GUI result dict.
+
+        ``crops`` (the prepared batch) enables the lesion-area severity;
+        ``conv`` (from ``forward``) adds class activation maps to it.
+        """
+        regions = []
+        for bbox, p in zip(boxes, probs):
+            region = self.result_from_probs(p, species)
+            region["bbox"] = bbox
+            regions.append(region)
+
+        if self.severity and crops is not None:
+            with timed(self.monitor, "analysis.severity"):
+                cams = None
+                if conv is not None:
+                    cams = self.backend.class_activation_maps(conv, [r["class_index"] for r in regions])
+                for region, lesions in zip(regions, lesion_severity.assess_batch(crops, cams)):
+                    region.update(lesions)
+                    if region["status"] != "Healthy":
+                        region["severity"] = lesion_severity.severity_stage(lesions["lesion_area"])
+
+        result = dict(regions[0])
+        result["regions"] = regions
+        return result
+
+    def analyze(self, frame, plant_type=None):
+        with timed(self.monitor, "analysis.preprocess"):
+            boxes, batch = self.prepare(frame)
+        with timed(self.monitor, "analysis.forward"):
+            probs, species, conv = self.forward(batch, plant_type)
+        return self.finish(boxes, probs, species, batch, conv)
@@ -0,0 +1,149 @@
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+
+def model_version_id(model_path, class_names_path):
+    """Id that changes whenever the model file or the label list changes.
+
+    The label file is hashed by content; the (large) model file by size and
+    modification time, which is enough to catch a retrained/replaced model.
+    """
+    h = hashlib.sha256()
+    with open(class_names_path, "rb") as f:
+        h.update(f.read())
+    if model_path and os.path.exists(model_path):
+        stat = os.stat(model_path)
+        h.update(f"{os.path.basename(model_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return h.hexdigest()[:16]
+
+
+def content_key(data):
+    """Digest of raw bytes or of a (preprocessed) numpy array"""
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data).data
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Content-addressed cache of class-probability vectors.
+
+    Keys are content digests (of the preprocessed model input or the image
+    file bytes) combined with the model version id, so a new model or label
+    list never sees old entries. The in-memory tier is an LRU bounded by
+    ``max_bytes``; the optional SQLite tier survives restarts and is purged of
+    entries from other model versions when opened.
+    """
+
+    def __init__(self, model_version, max_bytes=32 * 1024 * 1024, db_path=None):
+        self.model_version = model_version
+        self.max_bytes = max_bytes
+        self.memory = collections.OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS results ("
+                            "key TEXT PRIMARY KEY, model_version TEXT NOT NULL, probs BLOB NOT NULL)")
+            removed = self.db.execute("DELETE FROM results WHERE model_version != ?",
+                                      (model_version,)).rowcount
+            self.db.commit()
+            if removed > 0:
+                print(f"✓ Result cache: dropped {removed} entries from an older model version")
+
+    def _key(self, key):
+        return f"{self.model_version}:{key}"
+
+    def _remember(self, key, probs):
+        """Insert into the memory tier, evicting least-recently-used entries"""
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= old.nbytes
+        self.memory[key] = probs
+        self.memory_bytes += probs.nbytes
+        while self.memory_bytes > self.max_bytes and self.memory:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= evicted.nbytes
+
+    def get(self, key):
+        key = self._key(key)
+        with self._lock:
+            probs = self.memory.get(key)
+            if probs is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return probs
+
+            if self.db is not None:
+                row = self.db.execute("SELECT probs FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    probs = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, probs)
+                    self.hits += 1
+                    return probs
+
+            self.misses += 1
+            return None
+
+    def put_many(self, items):
+        """Store [(key, probs), ...] in both tiers (one disk transaction)"""
+        with self._lock:
+            rows = []
+            for key, probs in items:
+                key = self._key(key)
+                probs = np.asarray(probs, dtype=np.float32)
+                self._remember(key, probs)
+                rows.append((key, self.model_version, probs.tobytes()))
+            if self.db is not None and rows:
+                self.db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", rows)
+                self.db.commit()
+
+    def put(self, key, probs):
+        self.put_many([(key, probs)])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+        }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def open_cache(backend, class_names_path, db_path=None, max_bytes=32 * 1024 * 1024):
+    """ResultCache versioned by the backend's model file and the label file"""
+    version = model_version_id(getattr(backend, "model_path", None), class_names_path)
+    return ResultCache(version, max_bytes, db_path)
+
+
+def cached_predict(cache, predict_fn, batch, keys=None):
+    """predict_fn(batch) that only runs the rows missing from the cache"""
+    if cache is None:
+        return predict_fn(batch)
+
+    keys = keys or [content_key(row) for row in batch]
+    cached = [cache.get(key) for key in keys]
+    missing = [i for i, probs in enumerate(cached) if probs is None]
+
+    if missing:
+        fresh = predict_fn(batch[missing])
+        cache.put_many([(keys[i], probs) for i, probs in zip(missing, fresh)])
+        for i, probs in zip(missing, fresh):
+            cached[i] = probs
+    return np.stack(cached)
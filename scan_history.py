@@ -0,0 +1,365 @@
+"""Persistent history of every scan, for disease tracking per plant, camera and time.
+
+Layout of a history directory:
+    <dir>/history.sqlite                  one row per scan (SQLite, WAL mode)
+    <dir>/thumbnails/<YYYYMMDD>/<id>.jpg  leaf thumbnails, outside the database
+
+``ScanHistory.record`` only queues the scan; a background writer thread
+writes the thumbnails and inserts rows in batches (one transaction per
+batch), so the GUI thread never waits on the disk. Queries run on their own
+connection and use the (plant_type, status, time), (disease, time) and
+(status, time) indexes; the time index also covers the summary columns:
+    python scan_history.py query history/ --plant-type Tomato --status Diseased --days 7
+    python scan_history.py summary history/ --days 30
+    python scan_history.py bench /tmp/history_bench --rows 1000000
+"""
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import leaf_localizer
+
+DB_FILE = "history.sqlite"
+THUMBNAIL_DIR = "thumbnails"
+THUMBNAIL_SIZE = 128
+
+COLUMNS = ("time", "camera", "plant_type", "class_name", "disease", "status", "severity", "lesion_area",
+           "confidence", "regions", "thumbnail")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    camera TEXT,
+    plant_type TEXT,
+    class_name TEXT,
+    disease TEXT,
+    status TEXT,
+    severity TEXT,
+    lesion_area REAL,
+    confidence REAL,
+    regions INTEGER,
+    thumbnail TEXT
+);
+CREATE INDEX IF NOT EXISTS scans_plant_status_time ON scans (plant_type, status, time);
+CREATE INDEX IF NOT EXISTS scans_disease_time ON scans (disease, time);
+CREATE INDEX IF NOT EXISTS scans_status_time ON scans (status, time);
+CREATE INDEX IF NOT EXISTS scans_time ON scans (time, plant_type, disease, status, lesion_area);
+"""
+
+
+def connect(path):
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL") 	# WAL keeps the database consistent; only the last batch is at risk
+    return db
+
+
+def parse_confidence(value):
+    try:
+        return float(str(value).rstrip("%"))
+    except (TypeError, ValueError):
+        return None
+
+
+def scan_row(result, plant_type=None, camera=None, timestamp=None):
+    """Column values (without the thumbnail) of one analysis result"""
+    return [timestamp or time.time(), camera, plant_type or result.get("plant"), result.get("class_name"),
+            result.get("disease"), result.get("status"), result.get("severity"), result.get("lesion_area"),
+            parse_confidence(result.get("confidence")), len(result.get("regions") or [result])]
+
+
+class ScanHistory:
+    """Scan history store with a batching background writer.
+
+    ``record`` never blocks: when ``max_pending`` scans are already queued
+    the scan is dropped and counted. ``flush`` waits for queued scans to be
+    written.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=0.5, max_pending=10000, thumbnails=True):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.thumbnails = thumbnails
+        os.makedirs(os.path.join(path, THUMBNAIL_DIR), exist_ok=True)
+
+        db_path = os.path.join(path, DB_FILE)
+        self.db = connect(db_path) 	# Writer thread only
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+        self.reader = connect(db_path)
+        self._read_lock = threading.Lock()
+
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="ScanHistory", daemon=True)
+        self._thread.start()
+
+    # --- Writing ---
+
+    def record(self, result, plant_type=None, camera=None, frame=None, timestamp=None):
+        """Queue a scan (and optionally the frame its thumbnail is cut from); returns False if dropped.
+
+        The frame is read later on the writer thread, so it must not be
+        modified afterwards.
+        """
+        if not result:
+            return False
+        item = (scan_row(result, plant_type, camera, timestamp),
+                frame if self.thumbnails else None, result.get("bbox", leaf_localizer.FULL_FRAME_BBOX))
+        try:
+            self.pending.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                self.pending.task_done()
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.pending.get_nowait()
+                except queue.Empty:
+                    # Queue drained: wait a little for more scans to share the transaction
+                    try:
+                        item = self.pending.get(timeout=max(0.0, deadline - time.perf_counter()))
+                    except queue.Empty:
+                        break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"⚠ Scan history write failed ({e}); {len(batch)} scans lost")
+            for _ in range(len(batch) + stop):
+                self.pending.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        """Write the thumbnails of a batch, then insert its rows in one transaction.
+
+        A thumbnail that can't be written is logged and its row stored with
+        no thumbnail; if the insert fails, the batch's thumbnails are removed.
+        """
+        first_id = (self.db.execute("SELECT COALESCE(MAX(id), 0) FROM scans").fetchone()[0]) + 1
+        rows, written = [], []
+        for offset, (row, frame, bbox) in enumerate(batch):
+            thumbnail = None
+            if frame is not None:
+                day = time.strftime("%Y%m%d", time.localtime(row[0]))
+                thumbnail = os.path.join(THUMBNAIL_DIR, day, f"{first_id + offset:09d}.jpg")
+                try:
+                    self._save_thumbnail(thumbnail, frame, bbox)
+                    written.append(thumbnail)
+                except Exception as e:
+                    print(f"⚠ Scan history thumbnail {thumbnail} not saved ({e})")
+                    thumbnail = None
+            rows.append([first_id + offset, *row, thumbnail])
+        try:
+            with self.db:
+                self.db.executemany(f"INSERT INTO scans (id, {', '.join(COLUMNS)}) "
+                                    f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})", rows)
+        except Exception:
+            for thumbnail in written:
+                try:
+                    os.remove(os.path.join(self.path, thumbnail))
+                except OSError:
+                    pass
+            raise
+        self.written += len(rows)
+        self.batches += 1
+
+    def _save_thumbnail(self, thumbnail, frame, bbox):
+        crop = leaf_localizer.crop(frame, bbox)
+        scale = THUMBNAIL_SIZE / max(crop.shape[:2])
+        if scale < 1.0:
+            crop = cv2.resize(crop, (max(1, int(crop.shape[1] * scale)), max(1, int(crop.shape[0] * scale))),
+                              interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        full_path = os.path.join(self.path, thumbnail)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(encoded.tobytes())
+
+    def flush(self):
+        """Block until every queued scan is in the database"""
+        self.pending.join()
+
+    def close(self):
+        self.pending.put(None)
+        self._thread.join()
+        self.db.close()
+        self.reader.close()
+
+    # --- Queries ---
+
+    @staticmethod
+    def _where(plant_type=None, disease=None, status=None, camera=None, since=None, until=None):
+        clauses, params = [], []
+        for column, value in (("plant_type", plant_type), ("disease", disease), ("status", status),
+                              ("camera", camera)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("time >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("time < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _read(self, sql, params):
+        with self._read_lock:
+            return self.reader.execute(sql, params).fetchall()
+
+    def query(self, limit=100, **filters):
+        """Newest matching scans as dicts (filters: plant_type, disease, status, camera, since, until)"""
+        where, params = self._where(**filters)
+        rows = self._read(f"SELECT id, {', '.join(COLUMNS)} FROM scans{where} ORDER BY time DESC LIMIT ?",
+                          params + [limit])
+        return [dict(zip(("id",) + COLUMNS, row)) for row in rows]
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self._read(f"SELECT COUNT(*) FROM scans{where}", params)[0][0]
+
+    def summary(self, **filters):
+        """[(plant_type, disease, status, scans, mean lesion area, last seen), ...], most scans first"""
+        where, params = self._where(**filters)
+        # For a plain time window the covering time index beats the planner's choice
+        # (scanning plant_type/status order to skip a sort, reading the whole table)
+        time_only = not any(filters.get(k) is not None for k in ("plant_type", "disease", "status", "camera"))
+        source = "scans INDEXED BY scans_time" if time_only and filters.get("since") is not None else "scans"
+        return self._read("SELECT plant_type, disease, status, COUNT(*), AVG(lesion_area), MAX(time) "
+                          f"FROM {source}{where} GROUP BY plant_type, disease, status ORDER BY COUNT(*) DESC",
+                          params)
+
+    def thumbnail_path(self, scan):
+        return os.path.join(self.path, scan["thumbnail"]) if scan.get("thumbnail") else None
+
+
+def format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def run_query(args):
+    history = ScanHistory(args.history)
+    filters = {"plant_type": args.plant_type, "disease": args.disease, "status": args.status,
+               "camera": args.camera, "since": time.time() - args.days * 86400 if args.days else None}
+    start = time.perf_counter()
+    scans = history.query(args.limit, **filters)
+    total = history.count(**filters)
+    elapsed = time.perf_counter() - start
+    for scan in scans:
+        area = "" if scan["lesion_area"] is None else f"{scan['lesion_area']:.1f}%"
+        print(f"{format_time(scan['time'])}  {scan['camera'] or '-':<10} {scan['class_name'] or '-':<45} "
+              f"{scan['status'] or '-':<9} {scan['severity'] or '-':<9} {area}")
+    print(f"✓ {total} matching scans (showing {len(scans)}) in {elapsed * 1000:.1f} ms")
+    history.close()
+
+
+def run_summary(args):
+    history = ScanHistory(args.history)
+    since = time.time() - args.days * 86400 if args.days else None
+    for plant, disease, status, scans, lesion_area, last in history.summary(plant_type=args.plant_type,
+                                                                           since=since):
+        area = "-" if lesion_area is None else f"{lesion_area:.1f}%"
+        print(f"{plant or '-':<22} {disease or '-':<38} {status or '-':<9} {scans:>8} scans  "
+              f"lesion {area:>6}  last {format_time(last)}")
+    history.close()
+
+
+def run_bench(args):
+    """Ingest rate of synthetic scans and latency of typical queries"""
+    rng = np.random.default_rng(0)
+    plants = ["Tomato", "Potato", "Apple", "Corn (maize)", "Grape", "Pepper, bell", "Peach", "Strawberry"]
+    diseases = ["Healthy", "Early blight", "Late blight", "Leaf Mold", "Bacterial spot", "Common rust"]
+    history = ScanHistory(args.output, batch_size=args.batch_size, max_pending=args.rows + 1, thumbnails=False)
+    existing = history.count()
+    now = time.time()
+
+    start = time.perf_counter()
+    for i in range(args.rows):
+        plant, disease = plants[rng.integers(len(plants))], diseases[rng.integers(len(diseases))]
+        result = {"class_name": f"{plant}___{disease}", "disease": disease,
+                  "status": "Healthy" if disease == "Healthy" else "Diseased",
+                  "severity": "none" if disease == "Healthy" else "moderate",
+                  "lesion_area": float(rng.uniform(0, 40)), "confidence": "91.20%"}
+        history.record(result, plant, f"cam-{i % 8}",
+                       timestamp=now - rng.uniform(0, 90 * 86400))
+    queued = time.perf_counter() - start
+    history.flush()
+    elapsed = time.perf_counter() - start
+    print(f"✓ Ingested {args.rows} scans in {elapsed:.2f}s ({args.rows / elapsed:,.0f} scans/sec; "
+          f"record() {1e6 * queued / args.rows:.1f} µs per call, {history.batches} batches)")
+    print(f"  {existing + args.rows} rows in the store")
+
+    week = now - 7 * 86400
+    queries = {
+        "diseased tomato, last 7 days (count)": lambda: history.count(plant_type="Tomato", status="Diseased",
+                                                                       since=week),
+        "diseased tomato, last 7 days (newest 100)": lambda: history.query(100, plant_type="Tomato",
+                                                                            status="Diseased", since=week),
+        "late blight, last 7 days (count)": lambda: history.count(disease="Late blight", since=week),
+        "all scans, last 24 hours (count)": lambda: history.count(since=now - 86400),
+        "summary, last 7 days": lambda: history.summary(since=week),
+    }
+    for name, fn in queries.items():
+        fn()
+        samples = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t)
+        print(f"  {name:<44} p50 {1000 * np.median(samples):7.2f} ms   p95 {1000 * np.percentile(samples, 95):7.2f} ms")
+    history.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Query or benchmark the scan history store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query_cmd = commands.add_parser("query", help="List matching scans, newest first")
+    summary_cmd = commands.add_parser("summary", help="Scans per plant / disease / status")
+    for cmd in (query_cmd, summary_cmd):
+        cmd.add_argument("history", help="History directory (gui --history-dir)")
+        cmd.add_argument("--plant-type", default=None)
+        cmd.add_argument("--days", type=float, default=None, help="Only the last N days")
+    query_cmd.add_argument("--disease", default=None)
+    query_cmd.add_argument("--status", default=None, choices=["Healthy", "Diseased"])
+    query_cmd.add_argument("--camera", default=None)
+    query_cmd.add_argument("--limit", type=int, default=50)
+
+    bench_cmd = commands.add_parser("bench", help="Measure ingest rate and query latency")
+    bench_cmd.add_argument("output", help="Directory for the benchmark store")
+    bench_cmd.add_argument("--rows", type=int, default=1000000)
+    bench_cmd.add_argument("--batch-size", type=int, default=1000)
+    bench_cmd.add_argument("--repeat", type=int, default=20)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    {"query": run_query, "summary": run_summary, "bench": run_bench}[args.command](args)
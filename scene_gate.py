@@ -0,0 +1,83 @@
+import time
+
+import cv2
+import numpy as np
+
+
+def frame_signature(frame, size=(32, 32)):
+    """Cheap scene signature: a tiny grayscale thumbnail as float32"""
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return small.astype(np.float32)
+
+
+def signature_distance(sig_a, sig_b):
+    """Mean absolute difference between two signatures (0-255 gray levels)"""
+    return float(np.mean(np.abs(sig_a - sig_b)))
+
+
+class SceneChangeGate:
+    """Skips CNN inference while the camera keeps looking at the same scene.
+
+    Each candidate frame is reduced to a 32x32 grayscale thumbnail and compared
+    with the thumbnail of the last frame that was actually classified. While
+    the mean difference stays below ``threshold`` the cached result is reused;
+    a real scene change, a different plant type, or ``timeout`` seconds since
+    the last inference forces a new one.
+    """
+
+    def __init__(self, threshold=6.0, timeout=10.0, size=(32, 32)):
+        self.threshold = threshold
+        self.timeout = timeout
+        self.size = size
+
+        self.reference = None
+        self.reference_key = None
+        self.reference_time = 0.0
+        self.cached_result = None
+
+        self.executed = 0
+        self.skipped = 0
+        self.last_distance = None
+
+    def check(self, frame, key=None, now=None):
+        """Return (needs_inference, signature) for a candidate frame"""
+        now = time.perf_counter() if now is None else now
+        signature = frame_signature(frame, self.size)
+
+        if self.reference is None or key != self.reference_key:
+            needs_inference = True
+            self.last_distance = None
+        elif now - self.reference_time >= self.timeout:
+            needs_inference = True
+            self.last_distance = signature_distance(signature, self.reference)
+        else:
+            self.last_distance = signature_distance(signature, self.reference)
+            needs_inference = self.last_distance > self.threshold
+
+        if needs_inference:
+            self.executed += 1
+        else:
+            self.skipped += 1
+        return needs_inference, signature
+
+    def store(self, signature, result, key=None, now=None):
+        """Remember the signature and result of a frame that was classified"""
+        self.reference = signature
+        self.reference_key = key
+        self.reference_time = time.perf_counter() if now is None else now
+        self.cached_result = result
+
+    def reset(self):
+        """Forget the reference scene so the next frame is always classified"""
+        self.reference = None
+        self.cached_result = None
+
+    def stats(self):
+        total = self.executed + self.skipped
+        return {
+            "executed": self.executed,
+            "skipped": self.skipped,
+            "skip_ratio": (self.skipped / total) if total else 0.0,
+        }
@@ -0,0 +1,90 @@
+"""Small per-species classifier heads on the shared EfficientNet features.
+
+A head is a (features x classes) Dense layer over one plant's classes only,
+so a Tomato scan can never return an Apple disease and the softmax runs over
+a handful of columns. Heads are stored in one .npz file:
+    <species>.kernel   float32 (feature_dim, n)
+    <species>.bias     float32 (n,)
+    <species>.columns  int     (n,) class_names indices the head predicts
+
+Slice the trained model's own classifier into heads (a starting point for
+species-specific fine-tuning, saved in the same format):
+    python species_heads.py --output species_heads.npz
+"""
+import argparse
+
+import numpy as np
+
+import plant_classifier as pc
+
+SPECIES_HEADS_PATH = "species_heads.npz"
+
+
+class SpeciesHeads:
+    """{species: (kernel, bias, columns)} applied to backbone features"""
+
+    def __init__(self, heads):
+        self.heads = heads
+
+    def __contains__(self, species):
+        return species in self.heads
+
+    def predict(self, species, features):
+        """(N, feature_dim) features -> (N, n) probabilities over the species' classes"""
+        kernel, bias, _ = self.heads[species]
+        return pc.softmax(features @ kernel + bias)
+
+    def columns(self, species):
+        return self.heads[species][2]
+
+    @classmethod
+    def from_dense(cls, kernel, bias, class_names):
+        """Split one shared Dense classifier into per-species heads"""
+        heads = {}
+        for species, columns in pc.species_index(class_names).items():
+            heads[species] = (kernel[:, columns].astype(np.float32), bias[columns].astype(np.float32), columns)
+        return cls(heads)
+
+    def save(self, path=SPECIES_HEADS_PATH):
+        arrays = {}
+        for species, (kernel, bias, columns) in self.heads.items():
+            arrays[f"{species}.kernel"] = kernel
+            arrays[f"{species}.bias"] = bias
+            arrays[f"{species}.columns"] = columns
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path, class_names):
+        """Load heads, checking their columns (in class_names order) against class_names"""
+        heads = {}
+        with np.load(path) as data:
+            for key in data.files:
+                species, _, field = key.rpartition(".")
+                if field == "kernel":
+                    heads[species] = (data[key], data[f"{species}.bias"], data[f"{species}.columns"])
+
+        expected = pc.species_index(class_names)
+        for species, (kernel, bias, columns) in heads.items():
+            if species not in expected or not np.array_equal(columns, expected[species]):
+                raise ValueError(f"Species head '{species}' in {path} does not match class_names.json")
+            if kernel.shape[1] != len(columns) or bias.shape[0] != len(columns):
+                raise ValueError(f"Species head '{species}' in {path} has inconsistent shapes")
+        return cls(heads)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export per-species heads from the trained Keras model")
+    parser.add_argument("--model", default=pc.MODEL_PATH)
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--output", default=SPECIES_HEADS_PATH)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    class_names = pc.load_class_names(args.class_names)
+    backend = pc.KerasBackend(args.model)
+    kernel, bias = backend.head_weights()
+    heads = SpeciesHeads.from_dense(kernel, bias, class_names)
+    heads.save(args.output)
+    print(f"✓ Saved {len(heads.heads)} species heads to {args.output}")
@@ -0,0 +1,197 @@
+"""Watch several cameras / RTSP streams / video files with one shared model.
+
+Example:
+    python stream_manager.py 0 1 rtsp://greenhouse-cam-3/stream --backend tflite --output detections.jsonl
+
+Every source gets its own capture thread and scan thread. The scan threads
+localize leaves and hand their crops to a single DynamicBatcher, which merges
+the crops of all streams into shared forward passes.
+"""
+import argparse
+import json
+import threading
+import time
+import traceback
+
+import camera_capture
+import plant_classifier as pc
+from batch_engine import DynamicBatcher
+from scan_history import ScanHistory
+from scene_gate import SceneChangeGate
+
+
+class StreamWorker:
+    """Capture + periodic scanning for a single source"""
+
+    def __init__(self, stream_id, source, analyzer, batcher, on_result, scan_interval=0.5):
+        self.stream_id = stream_id
+        self.source = source
+        self.analyzer = analyzer
+        self.batcher = batcher
+        self.on_result = on_result
+        self.scan_interval = scan_interval
+
+        self.capture = camera_capture.CameraCapture(camera_capture.parse_source(source))
+        self.reader = self.capture.reader()
+        self.scene_gate = SceneChangeGate()
+        self.latest_result = None
+        self.scans = 0
+
+        self._running = False
+        self._thread = threading.Thread(target=self._run, name=f"Stream-{stream_id}", daemon=True)
+
+    @property
+    def opened(self):
+        return self.capture.opened
+
+    def start(self):
+        self._running = True
+        self.capture.start()
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            started = time.perf_counter()
+            captured = self.reader.read()
+            if captured is None:
+                if self.capture.finished:
+                    break
+                time.sleep(0.005)
+                continue
+
+            needs_inference, signature = self.scene_gate.check(captured.frame, self.stream_id)
+            if needs_inference:
+                try:
+                    boxes, batch = self.analyzer.prepare(captured.frame)
+                    probs = self.batcher.submit(batch).result()
+                    result = self.analyzer.finish(boxes, probs, crops=batch)
+                except Exception:
+                    if not self._running:
+                        break
+                    traceback.print_exc()
+                    continue
+                self.scene_gate.store(signature, result, self.stream_id)
+                self.latest_result = result
+                self.scans += 1
+                self.on_result(self.stream_id, captured.timestamp, result)
+
+            delay = self.scan_interval - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def stop(self, wait=True):
+        self._running = False
+        if wait:
+            self.capture.stop()
+            self._thread.join(2.0)
+
+    def metrics(self):
+        data = self.capture.metrics()
+        data.update(self.scene_gate.stats())
+        data["scans"] = self.scans
+        return data
+
+
+class StreamManager:
+    """Opens N sources and feeds them all into one shared batched inference engine"""
+
+    def __init__(self, sources, analyzer, on_result=None, max_batch_size=16, max_wait=0.02,
+                 scan_interval=0.5):
+        self.analyzer = analyzer
+        self.batcher = DynamicBatcher(analyzer.backend.predict_batch, max_batch_size, max_wait)
+        self.on_result = on_result or (lambda stream_id, timestamp, result: None)
+        self.workers = []
+        for i, source in enumerate(sources):
+            worker = StreamWorker(i, source, analyzer, self.batcher, self.on_result, scan_interval)
+            if worker.opened:
+                print(f"✓ Stream {i} opened: {source} ({worker.capture.width}x{worker.capture.height})")
+                self.workers.append(worker)
+            else:
+                print(f"⚠ Could not open stream {i}: {source}")
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def running(self):
+        return any(w.is_alive() for w in self.workers)
+
+    def stop(self):
+        # Signal first, then stop the engine so nobody stays blocked on a batch
+        for worker in self.workers:
+            worker.stop(wait=False)
+        self.batcher.stop()
+        for worker in self.workers:
+            worker.stop()
+
+    def metrics(self):
+        return {
+            "engine": self.batcher.metrics(),
+            "streams": {w.stream_id: w.metrics() for w in self.workers},
+        }
+
+
+def run(args):
+    backend = pc.load_backend(args.backend, args.model, args.threads)
+    analyzer = pc.FrameAnalyzer(backend, localize=not args.no_localize)
+
+    output = open(args.output, "a", encoding="utf-8") if args.output else None
+    history = ScanHistory(args.history) if args.history else None
+    lock = threading.Lock()
+
+    def on_result(stream_id, timestamp, result):
+        if history:
+            history.record(result, camera=str(args.sources[stream_id]))
+        line = {"time": time.time(), "stream": stream_id, "source": args.sources[stream_id],
+                "regions": [{k: r[k] for k in ("class_name", "status", "confidence", "bbox")}
+                            for r in result["regions"]]}
+        with lock:
+            if output:
+                output.write(json.dumps(line) + "\n")
+                output.flush()
+            else:
+                print(json.dumps(line))
+
+    manager = StreamManager(args.sources, analyzer, on_result, args.max_batch_size,
+                            args.max_wait_ms / 1000.0, args.interval)
+    if not manager.workers:
+        raise SystemExit("ERROR: no stream could be opened")
+
+    manager.start()
+    try:
+        while manager.running():
+            time.sleep(args.stats_every)
+            print(json.dumps(manager.metrics()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.stop()
+        if output:
+            output.close()
+        if history:
+            history.close()
+    print(json.dumps(manager.metrics(), indent=2))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scan several camera/RTSP/video sources with one shared model")
+    parser.add_argument("sources", nargs="+", help="Camera index, video file or stream URL")
+    parser.add_argument("--backend", choices=sorted(pc.BACKENDS))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between scans per stream")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=20.0,
+                        help="How long the engine waits to fill a batch")
+    parser.add_argument("--no-localize", action="store_true")
+    parser.add_argument("--output", default=None, help="Append detections to this JSONL file")
+    parser.add_argument("--history", default=None, help="Also keep detections in this scan history store")
+    parser.add_argument("--stats-every", type=float, default=10.0)
+    return parser
+
+
+if __name__ == "__main__":
+    run(build_parser().parse_args())
@@ -0,0 +1,175 @@
+"""Temporal smoothing of live-scan results across frames.
+
+Single-frame predictions flicker. TemporalSmoother follows every leaf region
+from frame to frame (greedy IoU matching of the 0-1000 bboxes), keeps an
+exponential moving average of its class probabilities (from the result's
+``top_k``), and reports whether the smoothed decision shown to the operator
+(top class and severity of the primary leaf) actually changed. The GUI only
+redraws its results panel on a change. A measured lesion area
+(lesion_severity) is averaged the same way, and the severity stage is
+derived from the averaged area.
+"""
+import numpy as np
+
+import lesion_severity
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU of two lists of [x1, y1, x2, y2] boxes -> (len(a), len(b)) array"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def region_scores(region):
+    """{class_name: probability} observed for one region"""
+    if region.get("top_k"):
+        return dict(region["top_k"])
+    try:
+        confidence = float(str(region.get("confidence", "0")).rstrip("%")) / 100.0
+    except ValueError:
+        confidence = 0.0
+    return {region.get("class_name"): confidence}
+
+
+class Track:
+    """One leaf followed across frames"""
+
+    __slots__ = ("track_id", "bbox", "scores", "lesion_area", "results", "hits", "misses")
+
+    def __init__(self, track_id, region):
+        self.track_id = track_id
+        self.bbox = [float(v) for v in region["bbox"]]
+        self.scores = region_scores(region)
+        self.lesion_area = region.get("lesion_area")
+        self.results = {region.get("class_name"): region} 	# Latest region dict per top class
+        self.hits = 1
+        self.misses = 0
+
+    def update(self, region, alpha, bbox_alpha):
+        observed = region_scores(region)
+        for name in set(self.scores) | set(observed):
+            self.scores[name] = alpha * observed.get(name, 0.0) + (1.0 - alpha) * self.scores.get(name, 0.0)
+        self.scores = {name: p for name, p in self.scores.items() if p >= 1e-3}
+        if region.get("lesion_area") is not None:
+            self.lesion_area = (region["lesion_area"] if self.lesion_area is None else
+                                alpha * region["lesion_area"] + (1.0 - alpha) * self.lesion_area)
+        self.bbox = [bbox_alpha * float(new) + (1.0 - bbox_alpha) * old
+                     for new, old in zip(region["bbox"], self.bbox)]
+        self.results[region.get("class_name")] = region
+        self.hits += 1
+        self.misses = 0
+
+    def smoothed(self):
+        """Region dict of the smoothed top class, with the smoothed confidence and bbox"""
+        name = max(self.results, key=lambda n: self.scores.get(n, 0.0))
+        region = dict(self.results[name])
+        region["confidence"] = f"{self.scores.get(name, 0.0) * 100:.2f}%"
+        region["bbox"] = [int(round(v)) for v in self.bbox]
+        region["track_id"] = self.track_id
+        if self.lesion_area is not None:
+            region["lesion_area"] = round(self.lesion_area, 1)
+            if region.get("status") != "Healthy":
+                region["severity"] = lesion_severity.severity_stage(self.lesion_area)
+        return region
+
+
+class TemporalSmoother:
+    """EMA of class probabilities per tracked leaf region.
+
+    ``alpha`` is the weight of the newest frame; tracks unmatched for more
+    than ``max_misses`` updates are dropped. ``update`` returns the smoothed
+    result and whether the displayed decision changed.
+    """
+
+    def __init__(self, alpha=0.4, iou_threshold=0.3, max_misses=2, bbox_alpha=0.5):
+        self.alpha = alpha
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.bbox_alpha = bbox_alpha
+
+        self.tracks = []
+        self.key = None
+        self.decision = None
+        self.stable_updates = 0 	# Consecutive updates without a decision change
+        self._next_id = 0
+
+        self.updates = 0
+        self.changes = 0
+
+    def _new_track(self, region):
+        self._next_id += 1
+        track = Track(self._next_id, region)
+        self.tracks.append(track)
+        return track
+
+    def _match(self, regions):
+        """Track for every region (greedy by IoU; unmatched regions start new tracks)"""
+        matched = [None] * len(regions)
+        if self.tracks and regions:
+            ious = iou_matrix([r["bbox"] for r in regions], [t.bbox for t in self.tracks])
+            used = set()
+            for flat in np.argsort(-ious, axis=None):
+                i, j = divmod(int(flat), len(self.tracks))
+                if ious[i, j] < self.iou_threshold:
+                    break
+                if matched[i] is None and j not in used:
+                    matched[i] = self.tracks[j]
+                    used.add(j)
+        return matched
+
+    def update(self, result, key=None):
+        """Fold in a new frame's result -> (smoothed result, decision changed)"""
+        if key != self.key:
+            self.reset()
+            self.key = key
+
+        regions = result.get("regions") or [result]
+        matched = self._match(regions)
+        current = []
+        for region, track in zip(regions, matched):
+            if track is None:
+                track = self._new_track(region)
+            else:
+                track.update(region, self.alpha, self.bbox_alpha)
+            current.append(track)
+
+        seen = {id(t) for t in current}
+        for track in self.tracks:
+            if id(track) not in seen:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        smoothed_regions = [t.smoothed() for t in current]
+        smoothed = dict(smoothed_regions[0])
+        smoothed["regions"] = smoothed_regions
+
+        decision = (smoothed.get("class_name"), smoothed.get("severity"))
+        changed = decision != self.decision
+        self.decision = decision
+        self.stable_updates = 0 if changed else self.stable_updates + 1
+        self.updates += 1
+        self.changes += changed
+        return smoothed, changed
+
+    def reset(self):
+        """Forget all tracks (new plant type, paused feed, auto-scan toggled)"""
+        self.tracks = []
+        self.decision = None
+        self.stable_updates = 0
+
+    def stats(self):
+        return {
+            "updates": self.updates,
+            "changes": self.changes,
+            "skip_ratio": (1.0 - self.changes / self.updates) if self.updates else 0.0,
+            "tracks": len(self.tracks),
+        }
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from batch_engine import DynamicBatcher
+
+
+def inputs(n, start=0):
+    return np.arange(start, start + n, dtype=np.float32).reshape(n, 1)
+
+
+class Recorder:
+    """predict_fn that doubles its input and remembers every batch size"""
+
+    def __init__(self):
+        self.sizes = []
+
+    def __call__(self, batch):
+        self.sizes.append(len(batch))
+        return batch * 2
+
+
+def test_batches_up_to_max_batch_size():
+    predict = Recorder()
+    batcher = DynamicBatcher(predict, max_batch_size=4, max_wait=0.5)
+    try:
+        futures = [batcher.submit(inputs(2, 2 * i)) for i in range(5)]
+        for i, future in enumerate(futures):
+            np.testing.assert_array_equal(future.result(timeout=5), inputs(2, 2 * i) * 2)
+    finally:
+        batcher.stop()
+    assert predict.sizes == [4, 4, 2]
+    assert batcher.metrics()["batches"] == 3
+    assert batcher.metrics()["inputs"] == 10
+
+
+def test_flushes_after_max_wait():
+    predict = Recorder()
+    batcher = DynamicBatcher(predict, max_batch_size=100, max_wait=0.05)
+    try:
+        start = time.perf_counter()
+        np.testing.assert_array_equal(batcher.submit(inputs(3)).result(timeout=5), inputs(3) * 2)
+        assert time.perf_counter() - start >= 0.05
+    finally:
+        batcher.stop()
+    assert predict.sizes == [3]
+
+
+def test_predict_error_reaches_every_future():
+    def predict(batch):
+        raise ValueError("model failed")
+
+    batcher = DynamicBatcher(predict, max_batch_size=4, max_wait=0.5)
+    try:
+        futures = [batcher.submit(inputs(2)), batcher.submit(inputs(2))]
+        for future in futures:
+            with pytest.raises(ValueError, match="model failed"):
+                future.result(timeout=5)
+        # The engine keeps running after a failed batch
+        predict_ok = Recorder()
+        batcher.predict_fn = predict_ok
+        np.testing.assert_array_equal(batcher.predict(inputs(1)), inputs(1) * 2)
+    finally:
+        batcher.stop()
+
+
+def test_submit_after_stop_fails():
+    batcher = DynamicBatcher(Recorder())
+    batcher.stop()
+    with pytest.raises(RuntimeError):
+        batcher.submit(inputs(1)).result(timeout=1)
+
+
+def test_stop_cancels_pending_requests():
+    release = threading.Event()
+    started = threading.Event()
+
+    def predict(batch):
+        started.set()
+        release.wait(5)
+        return batch
+
+    batcher = DynamicBatcher(predict, max_batch_size=1, max_wait=0.0)
+    running = batcher.submit(inputs(1))
+    assert started.wait(5)
+    waiting = batcher.submit(inputs(1))
+    batcher.stop(timeout=0.1) 	# The engine is still busy with the first request
+    assert waiting.cancelled()
+    release.set()
+    np.testing.assert_array_equal(running.result(timeout=5), inputs(1))
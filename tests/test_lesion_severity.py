@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import lesion_severity as ls
+
+SIZE = 224
+LEAF = (40, 184) 	# Square leaf, 144 x 144 pixels
+GREEN = (40, 160, 40)
+YELLOW = (220, 200, 40)
+BROWN = (120, 60, 20)
+BACKGROUND = (200, 200, 200)
+
+
+def leaf_crop(spots=()):
+    """RGB float32 crop: grey background, green square leaf, (y0, y1, x0, x1, colour) spots on it"""
+    crop = np.empty((SIZE, SIZE, 3), dtype=np.float32)
+    crop[:] = BACKGROUND
+    crop[LEAF[0]:LEAF[1], LEAF[0]:LEAF[1]] = GREEN
+    for y0, y1, x0, x1, colour in spots:
+        crop[y0:y1, x0:x1] = colour
+    return crop
+
+
+def leaf_percent(pixels):
+    return 100.0 * pixels / (LEAF[1] - LEAF[0]) ** 2
+
+
+def test_known_lesion_area():
+    result = ls.assess(leaf_crop([(80, 116, 80, 116, BROWN)]))
+    assert result["lesion_area"] == pytest.approx(leaf_percent(36 * 36), abs=0.5)
+
+
+def test_healthy_leaf_has_no_lesions():
+    assert ls.assess(leaf_crop()) == {"lesion_area": 0.0, "chlorotic_area": 0.0, "necrotic_area": 0.0}
+
+
+def test_blank_crop_has_no_leaf():
+    for value in (0, 255):
+        crop = np.full((SIZE, SIZE, 3), value, dtype=np.float32)
+        assert ls.assess(crop)["lesion_area"] == 0.0
+
+
+def test_chlorotic_and_necrotic_split():
+    result = ls.assess(leaf_crop([(60, 90, 60, 90, YELLOW), (120, 160, 120, 160, BROWN)]))
+    assert result["chlorotic_area"] == pytest.approx(leaf_percent(30 * 30), abs=0.5)
+    assert result["necrotic_area"] == pytest.approx(leaf_percent(40 * 40), abs=0.5)
+    assert result["lesion_area"] == pytest.approx(result["chlorotic_area"] + result["necrotic_area"], abs=0.1)
+
+
+def test_cam_limits_lesions_to_focus():
+    crop = leaf_crop([(60, 90, 60, 90, BROWN), (140, 170, 140, 170, BROWN)])
+    cam = np.zeros((14, 14), dtype=np.float32)
+    cam[:7, :7] = 1.0 	# Only the top-left quarter, which holds the first spot
+    full, focused = ls.assess_batch(np.stack([crop, crop]), [None, cam])
+    assert full["lesion_area"] == pytest.approx(leaf_percent(2 * 30 * 30), abs=0.5)
+    assert focused["lesion_area"] == pytest.approx(leaf_percent(30 * 30), abs=0.5)
+
+
+def test_batch_matches_single_crops():
+    crops = [leaf_crop(), leaf_crop([(80, 116, 80, 116, YELLOW)])]
+    assert ls.assess_batch(np.stack(crops)) == [ls.assess(crop) for crop in crops]
+
+
+@pytest.mark.parametrize("area, stage", [
+    (0.0, "none"), (0.99, "none"), (1.0, "mild"), (9.99, "mild"),
+    (10.0, "moderate"), (24.99, "moderate"), (25.0, "severe"), (100.0, "severe"),
+])
+def test_severity_stage_boundaries(area, stage):
+    assert ls.severity_stage(area) == stage
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from scan_history import ScanHistory
+
+NOW = 1_700_000_000.0
+DAY = 86400
+
+
+def result(disease, lesion_area=None, bbox=(100, 100, 900, 900)):
+    healthy = disease == "Healthy"
+    return {"class_name": f"Tomato___{disease.replace(' ', '_')}", "plant": "Tomato", "disease": disease,
+            "status": "Healthy" if healthy else "Diseased", "severity": "none" if healthy else "moderate",
+            "lesion_area": lesion_area, "confidence": "91.20%", "bbox": list(bbox)}
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ScanHistory(str(tmp_path), flush_interval=0.01)
+    yield history
+    history.close()
+
+
+@pytest.fixture
+def filled(history):
+    history.record(result("Late blight", 20.0), "Tomato", "cam-1", timestamp=NOW - 3 * DAY)
+    history.record(result("Late blight", 10.0), "Tomato", "cam-2", timestamp=NOW - 1 * DAY)
+    history.record(result("Healthy", 0.0), "Tomato", "cam-1", timestamp=NOW - 2 * DAY)
+    history.record(result("Common rust", 5.0), "Corn (maize)", "cam-1", timestamp=NOW - 10 * DAY)
+    history.flush()
+    return history
+
+
+def test_record_flush_count(filled):
+    assert filled.written == 4
+    assert filled.count() == 4
+    assert filled.count(plant_type="Tomato") == 3
+    assert filled.count(plant_type="Tomato", status="Diseased") == 2
+    assert filled.count(disease="Late blight", camera="cam-2") == 1
+    assert filled.count(since=NOW - 5 * DAY) == 3
+    assert filled.count(since=NOW - 5 * DAY, until=NOW - 2 * DAY) == 1
+
+
+def test_query_newest_first(filled):
+    scans = filled.query(plant_type="Tomato")
+    assert [s["time"] for s in scans] == [NOW - 1 * DAY, NOW - 2 * DAY, NOW - 3 * DAY]
+    assert scans[0]["camera"] == "cam-2"
+    assert scans[0]["confidence"] == pytest.approx(91.2)
+    assert scans[0]["regions"] == 1
+    assert [s["disease"] for s in filled.query(limit=1)] == ["Late blight"]
+    assert filled.query(status="Diseased", since=NOW - 2 * DAY)[0]["lesion_area"] == 10.0
+
+
+def test_summary(filled):
+    rows = filled.summary(since=NOW - 5 * DAY)
+    assert rows[0][:4] == ("Tomato", "Late blight", "Diseased", 2)
+    assert rows[0][4] == pytest.approx(15.0)
+    assert rows[0][5] == NOW - 1 * DAY
+    assert {r[1] for r in rows} == {"Late blight", "Healthy"}
+    assert [r[1] for r in filled.summary(plant_type="Corn (maize)")] == ["Common rust"]
+
+
+def test_thumbnails(history):
+    frame = np.full((240, 320, 3), 120, dtype=np.uint8)
+    history.record(result("Late blight", 12.0), "Tomato", frame=frame, timestamp=NOW)
+    history.flush()
+    scan = history.query()[0]
+    assert os.path.isfile(history.thumbnail_path(scan))
+
+
+def test_failed_thumbnail_keeps_the_scan(history, capsys):
+    frame = np.full((240, 320, 3), 120, dtype=np.uint8)
+    history.record(result("Late blight", 12.0, bbox=(2000, 2000, 3000, 3000)), "Tomato", frame=frame,
+                   timestamp=NOW)
+    history.flush()
+    scan = history.query()[0]
+    assert scan["thumbnail"] is None
+    assert history.thumbnail_path(scan) is None
+    assert history.written == 1
+    out = capsys.readouterr().out
+    assert "not saved" in out and "lost" not in out
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from temporal_smoothing import TemporalSmoother, iou_matrix
+
+LEFT = [0, 0, 100, 100]
+RIGHT = [500, 0, 600, 100]
+
+
+def region(class_name, bbox=LEFT, top_k=None, status="Diseased", severity="moderate", **fields):
+    """Result dict of one leaf region, as FrameAnalyzer returns it"""
+    top_k = top_k or [(class_name, 1.0)]
+    return dict(class_name=class_name, bbox=list(bbox), top_k=top_k, status=status, severity=severity,
+                confidence=f"{top_k[0][1] * 100:.2f}%", **fields)
+
+
+def frame(*regions):
+    result = dict(regions[0])
+    result["regions"] = list(regions)
+    return result
+
+
+def test_iou_matrix():
+    ious = iou_matrix([LEFT, RIGHT], [LEFT, [50, 0, 150, 100], RIGHT])
+    np.testing.assert_allclose(ious, [[1.0, 1 / 3, 0.0], [0.0, 0.0, 1.0]], atol=1e-6)
+    assert iou_matrix([], [LEFT]).shape == (0, 1)
+    assert iou_matrix([[0, 0, 0, 0]], [[0, 0, 0, 0]])[0, 0] == 0.0
+
+
+def test_match_follows_leaves_not_order():
+    smoother = TemporalSmoother()
+    first, _ = smoother.update(frame(region("A", LEFT), region("B", RIGHT)))
+    ids = {r["class_name"]: r["track_id"] for r in first["regions"]}
+
+    moved = [10, 0, 110, 100]
+    second, _ = smoother.update(frame(region("B", RIGHT), region("A", moved)))
+    assert [r["track_id"] for r in second["regions"]] == [ids["B"], ids["A"]]
+
+    far = [300, 300, 400, 400] 	# No overlap with any track: a new leaf
+    third, _ = smoother.update(frame(region("A", far)))
+    assert third["track_id"] not in ids.values()
+
+
+def test_ema_of_class_probabilities():
+    smoother = TemporalSmoother(alpha=0.4)
+    smoother.update(frame(region("A", top_k=[("A", 1.0)])))
+    flipped = region("B", top_k=[("B", 1.0), ("A", 0.0)])
+
+    smoothed, changed = smoother.update(frame(flipped))
+    assert smoothed["class_name"] == "A" 	# A: 0.6, B: 0.4
+    assert smoothed["confidence"] == "60.00%"
+    assert not changed
+
+    smoothed, changed = smoother.update(frame(flipped))
+    assert smoothed["class_name"] == "B" 	# A: 0.36, B: 0.64
+    assert smoothed["confidence"] == "64.00%"
+    assert changed
+
+
+def test_lesion_area_is_averaged_and_restaged():
+    smoother = TemporalSmoother(alpha=0.5)
+    smoother.update(frame(region("A", lesion_area=0.0)))
+    smoothed, _ = smoother.update(frame(region("A", lesion_area=30.0)))
+    assert smoothed["lesion_area"] == pytest.approx(15.0)
+    assert smoothed["severity"] == "moderate"
+
+    healthy = TemporalSmoother(alpha=0.5)
+    smoothed, _ = healthy.update(frame(region("H", status="Healthy", severity="none", lesion_area=30.0)))
+    assert smoothed["severity"] == "none" 	# Healthy results are not restaged
+
+
+def test_changed_and_stable_updates():
+    smoother = TemporalSmoother()
+    _, changed = smoother.update(frame(region("A")))
+    assert changed and smoother.stable_updates == 0
+    for expected in (1, 2, 3):
+        _, changed = smoother.update(frame(region("A")))
+        assert not changed
+        assert smoother.stable_updates == expected
+    assert smoother.stats()["updates"] == 4
+    assert smoother.stats()["changes"] == 1
+    assert smoother.stats()["skip_ratio"] == pytest.approx(0.75)
+
+
+def test_key_change_resets_tracks():
+    smoother = TemporalSmoother()
+    first, _ = smoother.update(frame(region("A")), key="Tomato")
+    smoother.update(frame(region("A")), key="Tomato")
+    assert smoother.stable_updates == 1
+
+    second, changed = smoother.update(frame(region("A")), key="Apple")
+    assert changed
+    assert smoother.stable_updates == 0
+    assert second["track_id"] != first["track_id"]
+    assert len(smoother.tracks) == 1
+
+
+def test_unmatched_tracks_are_dropped():
+    smoother = TemporalSmoother(max_misses=2)
+    smoother.update(frame(region("A", LEFT), region("B", RIGHT)))
+    for _ in range(2):
+        smoother.update(frame(region("A", LEFT)))
+    assert len(smoother.tracks) == 2
+    smoother.update(frame(region("A", LEFT)))
+    assert len(smoother.tracks) == 1
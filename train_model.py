@@ -0,0 +1,119 @@
+"""Train the EfficientNetB0 classifier locally from packed TFRecords.
+
+Same model and two-stage schedule as GOOGLE_COLAB_CODE.txt (head only, then
+fine-tuning the top 100 backbone layers), but fed by dataset_records'
+tf.data pipeline instead of ImageDataGenerator:
+    python dataset_records.py pack dataset/color --output records/
+    python train_model.py records/ --output Plant_Disease_Model_Final.h5
+
+Before training, the input pipeline's own throughput is measured; after each
+epoch the training throughput is printed next to it, so an input-bound run
+is visible immediately.
+"""
+import argparse
+import json
+import time
+
+import dataset_records
+import plant_classifier as pc
+
+
+def build_model(num_classes, input_size=pc.INPUT_SIZE):
+    """EfficientNetB0 + pooling/BatchNorm/Dropout/Dense head, as in the Colab script"""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+    from tensorflow.keras.applications import EfficientNetB0
+
+    base_model = EfficientNetB0(weights="imagenet", include_top=False,
+                                input_shape=(input_size[1], input_size[0], 3))
+    base_model.trainable = False
+
+    inputs = keras.Input(shape=(input_size[1], input_size[0], 3))
+    x = base_model(inputs, training=False)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.Dropout(0.2)(x)
+    outputs = layers.Dense(num_classes, activation="softmax")(x)
+    return keras.Model(inputs, outputs), base_model
+
+
+def throughput_callback(batch_size, input_images_per_sec):
+    """Keras callback printing training images/sec against the input pipeline's"""
+    from tensorflow import keras
+
+    class ThroughputLogger(keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+            self.batches = 0
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.batches += 1
+
+        def on_epoch_end(self, epoch, logs=None):
+            elapsed = time.perf_counter() - self.start
+            train_rate = self.batches * batch_size / max(elapsed, 1e-9)
+            note = "" if input_images_per_sec > 1.2 * train_rate else "  ⚠ close to input-bound"
+            print(f"  training {train_rate:.0f} images/sec, input pipeline {input_images_per_sec:.0f} "
+                  f"images/sec{note}")
+
+    return ThroughputLogger()
+
+
+def train(args):
+    from tensorflow import keras
+    from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+
+    manifest = dataset_records.load_manifest(args.records)
+    class_names = manifest["class_names"]
+    train_ds = dataset_records.make_dataset(args.records, "train", args.batch_size)
+    val_ds = dataset_records.make_dataset(args.records, "val", args.batch_size, cache=True)
+    print(f"✓ {manifest['counts']['train']} train / {manifest['counts']['val']} val images, "
+          f"{len(class_names)} classes")
+
+    stats = dataset_records.measure_throughput(
+        dataset_records.make_dataset(args.records, "train", args.batch_size, repeat=True), args.bench_steps)
+    print(f"✓ Input pipeline: {stats['images_per_sec']:.0f} images/sec")
+
+    model, base_model = build_model(len(class_names))
+    callbacks = [
+        ModelCheckpoint(args.output, save_best_only=True, monitor="val_loss", verbose=1),
+        EarlyStopping(patience=5, restore_best_weights=True, verbose=1),
+        throughput_callback(args.batch_size, stats["images_per_sec"]),
+    ]
+
+    print("\nSTAGE 1: Training head...")
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=1e-4),
+                  loss="categorical_crossentropy", metrics=["accuracy"])
+    model.fit(train_ds, validation_data=val_ds, epochs=args.head_epochs, callbacks=callbacks)
+
+    print("\nSTAGE 2: Fine-tuning...")
+    base_model.trainable = True
+    for layer in base_model.layers[:-args.unfreeze]:
+        layer.trainable = False
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=1e-5),
+                  loss="categorical_crossentropy", metrics=["accuracy"])
+    model.fit(train_ds, validation_data=val_ds, epochs=args.finetune_epochs, callbacks=callbacks)
+
+    model.save(args.output)
+    with open(args.class_names, "w", encoding="utf-8") as f:
+        json.dump({"class_names": class_names}, f)
+    print(f"✓ Model saved to: {args.output}")
+    print(f"✓ Class names saved to: {args.class_names}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Train the plant disease classifier from TFRecords")
+    parser.add_argument("records", help="Directory written by 'dataset_records.py pack'")
+    parser.add_argument("--output", default=pc.MODEL_PATH)
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--head-epochs", type=int, default=10)
+    parser.add_argument("--finetune-epochs", type=int, default=15)
+    parser.add_argument("--unfreeze", type=int, default=100, help="Backbone layers trained in stage 2")
+    parser.add_argument("--bench-steps", type=int, default=50,
+                        help="Batches used to measure input throughput before training")
+    return parser
+
+
+if __name__ == "__main__":
+    train(build_parser().parse_args())
@@ -0,0 +1,299 @@
+"""Offline analysis of recorded videos (drone / phone scouting footage).
+
+Example:
+    python video_replay.py field_walk.mp4 --output timeline.jsonl --annotate field_walk_annotated.mp4 \\
+        --stride 5 --scene-threshold 6 --plant-type Tomato
+
+A reader thread decodes the file as fast as it can and picks frames to
+classify: every --stride-th frame, and with --scene-threshold only those
+whose scene changed since the last classified one. Picked frames are
+classified in batches (all their leaf crops in one forward pass), not in
+real time. With --smooth, per-leaf results are averaged over consecutive
+classified frames (temporal_smoothing) to remove flicker. The timeline
+gets one JSON line per classified frame; the annotated video shows every
+frame with the latest detection drawn by
+display_pipeline.draw_bounding_box.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import display_pipeline
+import plant_classifier as pc
+from scene_gate import frame_signature, signature_distance
+from temporal_smoothing import TemporalSmoother
+
+
+class SampledFrame:
+    """A decoded frame; ``picked`` frames are classified, the rest only annotated"""
+
+    __slots__ = ("index", "timestamp", "frame", "picked")
+
+    def __init__(self, index, timestamp, frame, picked):
+        self.index = index
+        self.timestamp = timestamp
+        self.frame = frame
+        self.picked = picked
+
+
+class VideoReader:
+    """Decodes a video file on a background thread and picks the frames to classify.
+
+    Frames that are neither picked nor needed for the annotated video are
+    only grabbed, not decoded.
+    """
+
+    def __init__(self, path, stride=5, scene_threshold=None, max_gap=5.0, keep_all=False, queue_size=64):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f"Could not open video {path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.size = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.stride = max(1, stride)
+        self.scene_threshold = scene_threshold
+        self.max_gap = max_gap
+        self.keep_all = keep_all
+        self.decoded = 0
+        self.picked = 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="VideoReader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        index = 0
+        reference, reference_time = None, -np.inf
+        try:
+            while not self._stop.is_set():
+                candidate = index % self.stride == 0
+                if not (candidate or self.keep_all):
+                    if not self.capture.grab():
+                        break
+                    index += 1
+                    continue
+
+                ok, frame = self.capture.read()
+                if not ok:
+                    break
+                self.decoded += 1
+                timestamp = index / self.fps
+
+                picked = candidate
+                if candidate and self.scene_threshold is not None:
+                    signature = frame_signature(frame)
+                    picked = (reference is None or timestamp - reference_time >= self.max_gap
+                              or signature_distance(signature, reference) >= self.scene_threshold)
+                    if picked:
+                        reference, reference_time = signature, timestamp
+                self.picked += picked
+
+                self.queue.put(SampledFrame(index, timestamp, frame, picked))
+                index += 1
+        finally:
+            self.capture.release()
+            self.queue.put(None)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            yield item
+
+    def stop(self):
+        self._stop.set()
+        # Unblock the reader if it is waiting on a full queue
+        while self._thread.is_alive():
+            try:
+                self.queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def timeline_entry(item, result):
+    return {
+        "frame": item.index,
+        "time_s": round(item.timestamp, 3),
+        "class_name": result.get("class_name"),
+        "status": result.get("status"),
+        "disease": result.get("disease"),
+        "confidence": result.get("confidence"),
+        "severity": result.get("severity"),
+        "lesion_area": result.get("lesion_area"),
+        "regions": [{"bbox": r["bbox"], "class_name": r["class_name"], "confidence": r["confidence"],
+                     "lesion_area": r.get("lesion_area")}
+                    for r in result.get("regions", [])],
+    }
+
+
+def annotate(frame, result, width=None):
+    """Copy of the frame (optionally downscaled) with the detection boxes drawn"""
+    if width and frame.shape[1] > width:
+        frame = cv2.resize(frame, (width, int(frame.shape[0] * width / frame.shape[1])),
+                           interpolation=cv2.INTER_AREA)
+    else:
+        frame = frame.copy()
+    if result:
+        for region in result.get("regions", [result]):
+            display_pipeline.draw_bounding_box(frame, region["bbox"], region["status"], region["disease"])
+    return frame
+
+
+class ReplayProcessor:
+    """Batches picked frames through the analyzer and writes timeline and video in order.
+
+    Only frames behind a picked frame that is still waiting for its batch
+    are buffered (the annotated video needs its result); at most
+    ``max_buffered_frames`` of them, after which a partial batch is run.
+    """
+
+    def __init__(self, analyzer, plant_type=None, batch_size=16, timeline=None, writer=None,
+                 annotate_width=None, smoother=None, max_buffered_frames=96):
+        self.analyzer = analyzer
+        self.plant_type = plant_type
+        self.batch_size = batch_size
+        self.timeline = timeline
+        self.writer = writer
+        self.annotate_width = annotate_width
+        self.smoother = smoother
+        self.max_buffered_frames = max_buffered_frames
+        self.pending = [] 	# Frames waiting for the next batch (picked and in between)
+        self.pending_picked = 0
+        self.last_result = None
+        self.classified = 0
+        self.written = 0
+
+    def add(self, item):
+        if self.writer is None and not item.picked:
+            return
+        # Only the annotated video needs the in-between frames; keep them small
+        if not item.picked and not self.pending_picked:
+            # No classification pending before this frame: its annotation is already known
+            self.write_frame(item)
+            return
+        if not item.picked and self.annotate_width and item.frame.shape[1] > self.annotate_width:
+            item.frame = annotate(item.frame, None, self.annotate_width)
+        self.pending.append(item)
+        self.pending_picked += item.picked
+        if self.pending_picked >= self.batch_size or len(self.pending) >= self.max_buffered_frames:
+            self.flush()
+
+    def write_frame(self, item):
+        self.writer.write(annotate(item.frame, self.last_result, self.annotate_width))
+        self.written += 1
+
+    def flush(self):
+        picked = [item for item in self.pending if item.picked]
+        results = self.classify(picked) if picked else []
+        by_index = dict(zip((item.index for item in picked), results))
+
+        for item in self.pending:
+            if item.picked:
+                self.last_result = by_index[item.index]
+                if self.smoother is not None:
+                    self.last_result, _ = self.smoother.update(self.last_result, self.plant_type)
+                self.classified += 1
+                if self.timeline is not None:
+                    self.timeline.write(json.dumps(timeline_entry(item, self.last_result)) + "\n")
+            if self.writer is not None:
+                self.write_frame(item)
+        self.pending = []
+        self.pending_picked = 0
+
+    def classify(self, items):
+        """One forward pass for the leaf crops of all frames"""
+        prepared = [self.analyzer.prepare(item.frame) for item in items]
+        batch = np.concatenate([crops for _, crops in prepared])
+        probs, species = self.analyzer.restrict(self.analyzer.predict(batch), self.plant_type)
+
+        results, offset = [], 0
+        for boxes, crops in prepared:
+            results.append(self.analyzer.finish(boxes, probs[offset:offset + len(crops)], species, crops))
+            offset += len(crops)
+        return results
+
+
+def run(args):
+    backend = pc.load_backend(args.backend, args.model, args.threads)
+    analyzer = pc.FrameAnalyzer(backend, pc.load_class_names(args.class_names), localize=not args.no_localize)
+
+    reader = VideoReader(args.video, args.stride, args.scene_threshold, args.max_gap,
+                         keep_all=bool(args.annotate))
+    writer = None
+    if args.annotate:
+        width, height = reader.size
+        if args.annotate_width and width > args.annotate_width:
+            width, height = args.annotate_width, int(height * args.annotate_width / width)
+        writer = cv2.VideoWriter(args.annotate, cv2.VideoWriter_fourcc(*"mp4v"), reader.fps, (width, height))
+
+    print(f"✓ {args.video}: {reader.size[0]}x{reader.size[1]} @ {reader.fps:.1f} fps, "
+          f"{reader.frame_count or '?'} frames ({backend.name} backend)")
+    start = time.perf_counter()
+    with open(args.output, "w", encoding="utf-8") as timeline:
+        processor = ReplayProcessor(analyzer, args.plant_type, args.batch_size, timeline, writer,
+                                    args.annotate_width,
+                                    TemporalSmoother(alpha=args.smooth) if args.smooth else None,
+                                    args.max_buffered_frames)
+        reader.start()
+        last_report = start
+        try:
+            for item in reader:
+                processor.add(item)
+                now = time.perf_counter()
+                if now - last_report >= 5.0:
+                    last_report = now
+                    print(f"  frame {item.index}: {reader.decoded / (now - start):.1f} frames/sec decoded, "
+                          f"{processor.classified / (now - start):.1f} frames/sec classified")
+            processor.flush()
+        finally:
+            reader.stop()
+            if writer is not None:
+                writer.release()
+
+    elapsed = time.perf_counter() - start
+    video_seconds = (reader.frame_count or reader.decoded) / reader.fps
+    print(f"✓ Processed {video_seconds:.1f}s of video in {elapsed:.1f}s ({video_seconds / elapsed:.1f}x real time)")
+    print(f"    decoded    : {reader.decoded} frames ({reader.decoded / elapsed:.1f} frames/sec)")
+    print(f"    classified : {processor.classified} frames ({processor.classified / elapsed:.1f} frames/sec)")
+    print(f"✓ Timeline written to: {args.output}")
+    if writer is not None:
+        print(f"✓ Annotated video written to: {args.annotate} ({processor.written} frames)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Classify a recorded video offline, as fast as possible")
+    parser.add_argument("video")
+    parser.add_argument("--output", default="timeline.jsonl", help="Per-frame detections (JSONL)")
+    parser.add_argument("--annotate", default=None, help="Write an annotated .mp4 here")
+    parser.add_argument("--annotate-width", type=int, default=1280,
+                        help="Downscale the annotated video to this width (0: source size)")
+    parser.add_argument("--stride", type=int, default=5, help="Consider every Nth frame")
+    parser.add_argument("--scene-threshold", type=float, default=None,
+                        help="Only classify considered frames whose scene changed this much (gray levels)")
+    parser.add_argument("--max-gap", type=float, default=5.0,
+                        help="With --scene-threshold, classify at least once every this many seconds")
+    parser.add_argument("--batch-size", type=int, default=16, help="Frames per forward pass")
+    parser.add_argument("--max-buffered-frames", type=int, default=96,
+                        help="With --annotate, run a partial batch once this many frames wait for results")
+    parser.add_argument("--plant-type", default=None, help="Restrict results to this plant's classes")
+    parser.add_argument("--smooth", type=float, default=None, metavar="ALPHA",
+                        help="Smooth results across classified frames (weight of the newest frame, e.g. 0.4)")
+    parser.add_argument("--backend", choices=sorted(pc.BACKENDS))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--class-names", default=pc.CLASS_NAMES_PATH)
+    parser.add_argument("--no-localize", action="store_true")
+    return parser
+
+
+if __name__ == "__main__":
+    run(build_parser().parse_args())